@@ -1,4 +1,8 @@
+from django import forms
 from django.contrib import admin
+from django.forms.models import construct_instance
+
+from .ledger import ErrorInventario, registrar_movimientos
 from .models import (
     Usuario, Obra, Obrero, ObraObrero, Actividad,
     Material, Herramienta, Bodega, InventarioMaterial,
@@ -62,13 +66,55 @@ class InventarioHerramientaAdmin(admin.ModelAdmin):
     list_display = ['bodega', 'herramienta', 'fecha_ingreso']
     search_fields = ['bodega__nombre', 'herramienta__nombre']
 
+class MovimientoInventarioAdminForm(forms.ModelForm):
+    """
+    Registra el movimiento con ledger.registrar_movimientos() al validar, así
+    el stock se actualiza y la falta de stock aparece como error del
+    formulario. El admin envuelve la vista en una transacción: si algo falla
+    después, el movimiento se deshace junto con todo lo demás.
+    """
+    usuario = None
+
+    class Meta:
+        model = MovimientoInventario
+        exclude = ['usuario_responsable', 'transferencia']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.errors:
+            return cleaned_data
+        movimiento = construct_instance(self, self.instance)
+        try:
+            registrar_movimientos([movimiento], usuario=self.usuario)
+        except ErrorInventario as e:
+            raise forms.ValidationError(str(e))
+        return cleaned_data
+
+
 @admin.register(MovimientoInventario)
 class MovimientoInventarioAdmin(admin.ModelAdmin):
+    """Alta a través del ledger; un movimiento aplicado no se edita ni se borra (se corrige con un AJUSTE)."""
+    form = MovimientoInventarioAdminForm
     list_display = ['material', 'tipo_movimiento', 'cantidad', 'bodega_origen', 'bodega_destino', 'fecha_movimiento']
     list_filter = ['tipo_movimiento', 'fecha_movimiento']
     search_fields = ['material__nombre']
     date_hierarchy = 'fecha_movimiento'
 
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        form.usuario = request.user
+        return form
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        # ya lo guardó registrar_movimientos() en clean()
+        pass
+
 @admin.register(Prestamo)
 class PrestamoAdmin(admin.ModelAdmin):
     list_display = ['herramienta', 'obrero', 'obra', 'fecha_prestamo', 'fecha_devolucion_estimada', 'estado']
@@ -0,0 +1,240 @@
+"""
+API REST (v1) para clientes móviles.
+
+Los recursos son de solo lectura: paginan por cursor (ver pagination.py),
+aceptan ?fields= para traer solo algunas columnas y filtran únicamente por
+campos indexados, así una consulta desde obra baja pocos KB. Las escrituras
+son operaciones puntuales (ej: préstamo de un kit) que delegan en los
+servicios de admApp.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import BooleanField
+from django.utils import timezone
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Herramienta, Material, Bodega, InventarioMaterial, Prestamo, MovimientoInventario, UbicacionHerramienta
+from .prestamos import prestar_herramientas, devolver_prestamos, ErrorPrestamo, HerramientasNoDisponibles
+from .pagination import PaginaCursor, CursorInvalido, campos_orden, tamano_pagina
+from .serializers import (
+    campos_pedidos, HerramientaSerializer, MaterialSerializer, BodegaSerializer,
+    InventarioMaterialSerializer, PrestamoSerializer, MovimientoInventarioSerializer,
+    UbicacionHerramientaSerializer, PrestamoLoteSerializer, PrestamoDevolucionSerializer,
+)
+
+
+class KeysetPagination(BasePagination):
+    """Adaptador de PaginaCursor para DRF: {next, previous, results}."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.pagina = PaginaCursor(
+                queryset, request.query_params.get('cursor'), tamano_pagina(request), request.query_params,
+            )
+        except CursorInvalido:
+            raise NotFound('Cursor inválido')
+        return self.pagina.object_list
+
+    def _url(self, query):
+        return self.request.build_absolute_uri(f'{self.request.path}?{query}')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._url(self.pagina.next_query) if self.pagina.has_next else None,
+            'previous': self._url(self.pagina.previous_query) if self.pagina.has_previous else None,
+            'results': data,
+        })
+
+
+class EsPersonal(permissions.BasePermission):
+    """Administradores, supervisores o bodegueros (igual que staff_only)"""
+
+    def has_permission(self, request, view):
+        return request.user.rol in ('ADMIN', 'SUPERVISOR', 'BODEGUERO')
+
+
+class EsAdminOBodeguero(permissions.BasePermission):
+    """Igual que admin_or_bodeguero"""
+
+    def has_permission(self, request, view):
+        return request.user.rol in ('ADMIN', 'BODEGUERO')
+
+
+def _valor_filtro(model, lookup, valor):
+    field = model._meta.get_field(lookup.split('__')[0])
+    if isinstance(field, BooleanField):
+        return valor.lower() in ('1', 'true', 't', 'si', 'sí')
+    valor = field.to_python(valor)
+    if hasattr(valor, 'tzinfo') and timezone.is_naive(valor):
+        valor = timezone.make_aware(valor)
+    return valor
+
+
+class LecturaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Base de los recursos de la API.
+
+    `filtros` mapea parámetros de la URL a lookups del ORM; solo deben
+    aparecer campos con índice.
+    """
+    permission_classes = [permissions.IsAuthenticated, EsPersonal]
+    pagination_class = KeysetPagination
+    filtros = {}
+
+    def get_queryset(self):
+        queryset = self.queryset.all()
+        serializer_class = self.get_serializer_class()
+        campos = campos_pedidos(self.request)
+        fields = serializer_class().fields
+        fuentes = [f.source for nombre, f in fields.items() if campos is None or nombre in campos]
+
+        relaciones = [
+            r for r in serializer_class.Meta.select_related
+            if any(fuente.startswith(f'{r}.') for fuente in fuentes)
+        ]
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        if campos:
+            columnas = {fuente.replace('.', '__') for fuente in fuentes}
+            columnas.update(field.attname for field, _ in campos_orden(queryset))
+            queryset = queryset.only(*columnas)
+        return self.filtrar(queryset)
+
+    def filtrar(self, queryset):
+        condiciones = {}
+        for parametro, lookup in self.filtros.items():
+            valor = self.request.query_params.get(parametro)
+            if valor in (None, ''):
+                continue
+            try:
+                condiciones[lookup] = _valor_filtro(queryset.model, lookup, valor)
+            except DjangoValidationError:
+                raise ValidationError({parametro: f'Valor inválido: {valor}'})
+        return queryset.filter(**condiciones)
+
+
+class HerramientaViewSet(LecturaViewSet):
+    queryset = Herramienta.objects.all()
+    serializer_class = HerramientaSerializer
+    filtros = {'activo': 'activo', 'estado': 'estado', 'numero_serie': 'numero_serie'}
+
+
+class MaterialViewSet(LecturaViewSet):
+    queryset = Material.objects.all()
+    serializer_class = MaterialSerializer
+    filtros = {'activo': 'activo', 'nombre': 'nombre'}
+
+
+class BodegaViewSet(LecturaViewSet):
+    queryset = Bodega.objects.all()
+    serializer_class = BodegaSerializer
+    filtros = {'obra': 'obra_id', 'encargado': 'encargado_id'}
+
+
+class InventarioMaterialViewSet(LecturaViewSet):
+    queryset = InventarioMaterial.objects.all()
+    serializer_class = InventarioMaterialSerializer
+    filtros = {'bodega': 'bodega_id', 'material': 'material_id'}
+
+    def filtrar(self, queryset):
+        queryset = super().filtrar(queryset)
+        if self.request.query_params.get('bajo_minimo', '').lower() in ('1', 'true', 't', 'si', 'sí'):
+            queryset = queryset.bajo_minimo()
+        return queryset
+
+
+class PrestamoViewSet(LecturaViewSet):
+    queryset = Prestamo.objects.all()
+    serializer_class = PrestamoSerializer
+    filtros = {
+        'estado': 'estado',
+        'atrasado': 'atrasado',
+        'vence_antes': 'fecha_devolucion_estimada__lt',
+        'herramienta': 'herramienta_id',
+        'obrero': 'obrero_id',
+        'obra': 'obra_id',
+        'bodega': 'bodega_id',
+    }
+
+
+class MovimientoInventarioViewSet(LecturaViewSet):
+    queryset = MovimientoInventario.objects.all()
+    serializer_class = MovimientoInventarioSerializer
+    filtros = {
+        'material': 'material_id',
+        'obra': 'obra_id',
+        'bodega_origen': 'bodega_origen_id',
+        'bodega_destino': 'bodega_destino_id',
+        'transferencia': 'transferencia_id',
+        'desde': 'fecha_movimiento__gte',
+        'hasta': 'fecha_movimiento__lt',
+    }
+
+
+class UbicacionHerramientaViewSet(LecturaViewSet):
+    """Dónde está cada herramienta; ?prestadas=true|false separa las prestadas de las que están en bodega"""
+    queryset = UbicacionHerramienta.objects.all()
+    serializer_class = UbicacionHerramientaSerializer
+    filtros = {'bodega': 'bodega_id', 'obra': 'obra_id', 'obrero': 'obrero_id'}
+
+    def filtrar(self, queryset):
+        queryset = super().filtrar(queryset)
+        prestadas = self.request.query_params.get('prestadas', '').lower()
+        if prestadas:
+            queryset = queryset.filter(prestamo__isnull=prestadas not in ('1', 'true', 't', 'si', 'sí'))
+        return queryset
+
+
+class PrestamoLoteView(APIView):
+    """
+    POST: presta varias herramientas a un obrero en una sola transacción.
+
+    Responde 201 con los préstamos creados, o 409 con la lista de
+    herramientas no disponibles (en ese caso no se presta ninguna).
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdminOBodeguero]
+
+    def post(self, request):
+        entrada = PrestamoLoteSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        datos = entrada.validated_data
+        try:
+            creados = prestar_herramientas(
+                datos['herramientas'], datos['obrero'], datos['obra'], datos['bodega'],
+                datos['fecha_devolucion_estimada'], usuario=request.user,
+                observaciones=datos['observaciones_prestamo'],
+            )
+        except HerramientasNoDisponibles as e:
+            return Response({
+                'detail': 'Hay herramientas no disponibles; no se registró ningún préstamo.',
+                'herramientas': [{'id': pk, 'nombre': nombre, 'estado': estado} for pk, nombre, estado in e.herramientas],
+            }, status=status.HTTP_409_CONFLICT)
+        except ErrorPrestamo as e:
+            raise ValidationError({'herramientas': str(e)})
+        serializer = PrestamoSerializer(creados, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class PrestamoDevolucionView(APIView):
+    """
+    POST: cierra en bloque préstamos por lista de ids, obrero y/o obra.
+
+    Responde 200 con el resultado de cada préstamo (DEVUELTO, DAÑADO,
+    EXTRAVIADO, YA_CERRADO o NO_ENCONTRADO).
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdminOBodeguero]
+
+    def post(self, request):
+        entrada = PrestamoDevolucionSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        datos = entrada.validated_data
+        resultados = devolver_prestamos(
+            ids=datos.get('prestamos'), obrero=datos.get('obrero'), obra=datos.get('obra'),
+            danados=datos['danados'], extraviados=datos['extraviados'],
+            observaciones=datos['observaciones_devolucion'],
+        )
+        return Response({'resultados': resultados})
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AdmappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admApp'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .middleware import instalar_registro
+
+        connection_created.connect(instalar_registro)
+        # conexiones abiertas antes de registrar el receptor
+        for conexion in connections.all(initialized_only=True):
+            instalar_registro(sender=conexion.__class__, connection=conexion)
@@ -0,0 +1,67 @@
+"""
+Vistas async (ASGI) de solo lectura, en /administracion/async/...
+
+Mismas páginas y permisos que sus equivalentes de views.py, pero las consultas
+independientes se lanzan juntas con paralelo.en_paralelo() y el render corre
+en un hilo. Sirven servidas por prjIContruction/asgi.py (uvicorn, daphne);
+bajo WSGI funcionan, pero sin ganar concurrencia. El comando
+benchmark_async compara ambas variantes.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from .condicional import condicional_bodega
+from .decorators import admin_or_bodeguero
+from .eventos import configuracion as config_en_vivo, sse_disponible
+from .metrics import aobtener_metricas
+from .models import Bodega, InventarioMaterial
+from .paralelo import en_paralelo
+
+
+# ============================================
+# DASHBOARD
+# ============================================
+@login_required
+async def dashboard(request):
+    """Dashboard principal; las métricas que faltan en caché se calculan en paralelo"""
+    return await sync_to_async(render)(request, 'admApp/dashboard.html', await aobtener_metricas())
+
+
+# ============================================
+# BODEGAS (Admin o Bodeguero)
+# ============================================
+@login_required
+@admin_or_bodeguero
+@condicional_bodega
+async def bodega_detail(request, pk):
+    bodega, inventarios = await en_paralelo(
+        lambda: Bodega.objects.select_related('encargado').filter(pk=pk).first(),
+        lambda: list(InventarioMaterial.objects.filter(bodega_id=pk).select_related('material').con_alerta()),
+    )
+    if bodega is None:
+        raise Http404('Bodega no encontrada')
+    return await sync_to_async(render)(request, 'admApp/bodega_detail.html', {
+        'bodega': bodega,
+        'inventarios': inventarios,
+        'desde': timezone.now(),
+        'en_vivo': sse_disponible(request),
+        'intervalo': config_en_vivo()['INTERVALO'],
+    })
+
+
+# ============================================
+# INVENTARIO (Admin o Bodeguero)
+# ============================================
+@login_required
+@admin_or_bodeguero
+async def inventario_bajo_minimo_resumen(request):
+    """Conteos de alertas de stock por bodega y por material (JSON)"""
+    total, por_bodega, por_material = await en_paralelo(
+        lambda: InventarioMaterial.objects.bajo_minimo().count(),
+        lambda: list(InventarioMaterial.objects.conteo_bajo_minimo_por_bodega()),
+        lambda: list(InventarioMaterial.objects.conteo_bajo_minimo_por_material()),
+    )
+    return JsonResponse({'total': total, 'por_bodega': por_bodega, 'por_material': por_material})
@@ -0,0 +1,122 @@
+"""
+Backend de autenticación con caché de usuarios en memoria del proceso.
+
+AuthenticationMiddleware carga el usuario de la sesión en cada request. Con
+CachedModelBackend el Usuario se guarda en un LRU por pk, así una página
+normal no consulta la tabla usuario. Al guardar o borrar un Usuario las
+señales cambian su "versión" en el caché compartido de Django, y cada proceso
+descarta su copia la próxima vez que la lee.
+
+Eso solo funciona si CACHES['default'] es compartido entre procesos (Redis,
+Memcached, base de datos). Con un caché local (LocMemCache, el que viene por
+defecto) la invalidación llegaría solo al worker que guardó el usuario y los
+demás seguirían autorizando la copia vieja (ej: un usuario desactivado o con
+otro rol) hasta el TTL; en ese caso el LRU no se usa y get_user() consulta la
+base de datos como ModelBackend.
+
+Configuración (settings.USUARIOS_CACHE):
+    TAMANO   cantidad máxima de usuarios en memoria por proceso
+    TTL      segundos que una entrada vale sin volver a la base de datos
+"""
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+CONFIG_POR_DEFECTO = {
+    'TAMANO': 1000,
+    'TTL': 60,
+}
+
+# Backends de caché que viven dentro de cada proceso
+CACHES_LOCALES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_compartido():
+    return settings.CACHES['default']['BACKEND'] not in CACHES_LOCALES
+
+
+def _clave_version(pk):
+    return f'usuarios:version:{pk}'
+
+
+class CacheUsuarios:
+    """LRU de usuarios por pk, seguro entre hilos."""
+
+    def __init__(self):
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def configuracion():
+        return {**CONFIG_POR_DEFECTO, **getattr(settings, 'USUARIOS_CACHE', {})}
+
+    def obtener(self, pk):
+        with self._lock:
+            entrada = self._entradas.get(pk)
+            if entrada is not None:
+                self._entradas.move_to_end(pk)
+        if entrada is None:
+            return None
+        usuario, version, expira = entrada
+        if expira < time.monotonic() or cache.get(_clave_version(pk)) != version:
+            self.descartar(pk)
+            return None
+        return copy.copy(usuario)
+
+    def guardar(self, usuario):
+        config = self.configuracion()
+        version = cache.get(_clave_version(usuario.pk))
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.add(_clave_version(usuario.pk), version, None)
+            version = cache.get(_clave_version(usuario.pk), version)
+        with self._lock:
+            self._entradas[usuario.pk] = (copy.copy(usuario), version, time.monotonic() + config['TTL'])
+            self._entradas.move_to_end(usuario.pk)
+            while len(self._entradas) > config['TAMANO']:
+                self._entradas.popitem(last=False)
+
+    def descartar(self, pk):
+        with self._lock:
+            self._entradas.pop(pk, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+usuarios = CacheUsuarios()
+
+
+def invalidar_usuario(pk):
+    """Invalida el usuario en este proceso y, vía la versión compartida, en los demás."""
+    cache.set(_clave_version(pk), uuid.uuid4().hex, None)
+    usuarios.descartar(pk)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend que resuelve get_user() desde el LRU cuando puede."""
+
+    def get_user(self, user_id):
+        if not cache_compartido():
+            return super().get_user(user_id)
+        UserModel = get_user_model()
+        pk = UserModel._meta.pk.to_python(user_id)
+        usuario = usuarios.obtener(pk)
+        if usuario is None:
+            usuario = super().get_user(pk)
+            if usuario is None:
+                return None
+            usuarios.guardar(usuario)
+        return usuario if self.user_can_authenticate(usuario) else None
@@ -0,0 +1,164 @@
+"""
+Búsqueda global sobre herramientas, materiales, obras y bodegas.
+
+IndiceBusqueda guarda por objeto un título y un contenido de texto; las
+señales lo actualizan al guardar o borrar. buscar() consulta el índice de
+texto completo del motor:
+
+    SQLite   tabla FTS5 indice_busqueda_fts, orden por bm25 (el título pesa más)
+    MySQL    FULLTEXT (titulo, contenido) en modo booleano, orden por relevancia
+    otros    LIKE sobre titulo/contenido (sin ranking, solo para desarrollo)
+
+Cada palabra buscada se trata como prefijo, así "DeW 20" encuentra
+"DeWalt DCD2000". El índice se reconstruye completo con el comando
+reconstruir_indice_busqueda.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from .models import Herramienta, Material, Obra, Bodega, IndiceBusqueda
+
+
+Tipo = IndiceBusqueda.Tipo
+
+# modelo: (tipo, campo del título, campos del contenido)
+FUENTES = {
+    Herramienta: (Tipo.HERRAMIENTA, 'nombre', ['marca', 'modelo', 'numero_serie']),
+    Material: (Tipo.MATERIAL, 'nombre', ['proveedor']),
+    Obra: (Tipo.OBRA, 'nombre', ['ciudad', 'region', 'direccion']),
+    Bodega: (Tipo.BODEGA, 'nombre', ['ciudad', 'region', 'direccion']),
+}
+
+# Vista a la que lleva cada resultado
+URLS = {
+    Tipo.HERRAMIENTA: 'herramienta_update',
+    Tipo.MATERIAL: 'material_update',
+    Tipo.OBRA: 'obra_update',
+    Tipo.BODEGA: 'bodega_detail',
+}
+
+# Qué tipos puede ver cada rol (los mismos permisos de las vistas de destino)
+TIPOS_POR_ROL = {
+    'ADMIN': list(Tipo),
+    'BODEGUERO': [Tipo.HERRAMIENTA, Tipo.MATERIAL, Tipo.BODEGA],
+    'SUPERVISOR': [Tipo.OBRA],
+}
+
+MAX_PALABRAS = 8
+TAMANO_LOTE = 2000
+
+
+def _documento(modelo, pk, valores):
+    tipo, campo_titulo, campos = FUENTES[modelo]
+    return IndiceBusqueda(
+        tipo=tipo,
+        objeto_id=pk,
+        titulo=valores[campo_titulo] or '',
+        contenido=' '.join(str(valores[campo]) for campo in campos if valores[campo]),
+    )
+
+
+def campos_indexados(modelo):
+    _, campo_titulo, campos = FUENTES[modelo]
+    return [campo_titulo, *campos]
+
+
+def indexar(instancia):
+    """Crea o actualiza la fila del índice de un objeto."""
+    modelo = type(instancia)
+    doc = _documento(modelo, instancia.pk, {c: getattr(instancia, c) for c in campos_indexados(modelo)})
+    IndiceBusqueda.objects.update_or_create(
+        tipo=doc.tipo, objeto_id=doc.objeto_id,
+        defaults={'titulo': doc.titulo, 'contenido': doc.contenido},
+    )
+
+
+def quitar(modelo, pk):
+    IndiceBusqueda.objects.filter(tipo=FUENTES[modelo][0], objeto_id=pk).delete()
+
+
+def reconstruir_indice(tamano_lote=TAMANO_LOTE):
+    """Vacía y vuelve a llenar el índice desde las tablas. Devuelve las filas creadas."""
+    total = 0
+    with transaction.atomic():
+        IndiceBusqueda.objects.all().delete()
+        for modelo in FUENTES:
+            campos = campos_indexados(modelo)
+            lote = []
+            for fila in modelo.objects.order_by().values('pk', *campos).iterator(chunk_size=tamano_lote):
+                lote.append(_documento(modelo, fila['pk'], fila))
+                if len(lote) >= tamano_lote:
+                    IndiceBusqueda.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            IndiceBusqueda.objects.bulk_create(lote)
+            total += len(lote)
+    return total
+
+
+def palabras(texto):
+    return re.findall(r'\w+', texto or '')[:MAX_PALABRAS]
+
+
+def _buscar_sqlite(terminos, tipos, limite):
+    consulta = ' '.join(f'"{t}"*' for t in terminos)
+    filtro_tipo = ''
+    params = [consulta]
+    if tipos is not None:
+        filtro_tipo = f"AND b.tipo IN ({', '.join(['%s'] * len(tipos))})"
+        params.extend(tipos)
+    params.append(limite)
+    return list(IndiceBusqueda.objects.raw(
+        f"""SELECT b.id, b.tipo, b.objeto_id, b.titulo, b.contenido,
+                   bm25(indice_busqueda_fts, 10.0, 1.0) AS puntaje
+            FROM indice_busqueda_fts
+            JOIN indice_busqueda b ON b.id = indice_busqueda_fts.rowid
+            WHERE indice_busqueda_fts MATCH %s {filtro_tipo}
+            ORDER BY puntaje
+            LIMIT %s""",
+        params,
+    ))
+
+
+def _buscar_mysql(terminos, tipos, limite):
+    consulta = ' '.join(f'+{t}*' for t in terminos)
+    queryset = (
+        IndiceBusqueda.objects
+        .annotate(puntaje=RawSQL('MATCH (titulo, contenido) AGAINST (%s IN BOOLEAN MODE)', (consulta,)))
+        .filter(puntaje__gt=0)
+    )
+    if tipos is not None:
+        queryset = queryset.filter(tipo__in=tipos)
+    return list(queryset.order_by('-puntaje')[:limite])
+
+
+def _buscar_like(terminos, tipos, limite):
+    queryset = IndiceBusqueda.objects.all()
+    for termino in terminos:
+        queryset = queryset.filter(Q(titulo__icontains=termino) | Q(contenido__icontains=termino))
+    if tipos is not None:
+        queryset = queryset.filter(tipo__in=tipos)
+    return list(queryset.order_by('titulo')[:limite])
+
+
+def buscar(texto, tipos=None, limite=20):
+    """
+    Resultados (IndiceBusqueda) ordenados por relevancia. `tipos` limita a
+    algunos Tipo; None = todos.
+    """
+    terminos = palabras(texto)
+    if not terminos or tipos == []:
+        return []
+    if connection.vendor == 'sqlite':
+        return _buscar_sqlite(terminos, tipos, limite)
+    if connection.vendor == 'mysql':
+        return _buscar_mysql(terminos, tipos, limite)
+    return _buscar_like(terminos, tipos, limite)
+
+
+def url_resultado(resultado):
+    return reverse(URLS[resultado.tipo], args=[resultado.objeto_id])
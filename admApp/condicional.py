@@ -0,0 +1,101 @@
+"""
+GET condicional (ETag / Last-Modified) para las vistas que las tablets de obra
+consultan periódicamente.
+
+El ETag y el Last-Modified se calculan sin renderizar: con las versiones por
+modelo de versiones.py (sin consultas) o, en el detalle de bodega, con un
+MAX/COUNT sobre el índice (bodega, fecha_ultima_actualizacion). Si el cliente
+ya tiene esa versión, la vista responde 304 sin ejecutar nada más.
+
+El ETag incluye al usuario porque la página trae su nombre y los menús de su
+rol. Con mensajes flash pendientes no se generan validadores, para que el
+mensaje no se pierda detrás de un 304.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import versiones
+from .models import Bodega, InventarioMaterial, Material, Usuario
+
+
+def _mensajes_pendientes(request):
+    return len(messages.get_messages(request)) > 0
+
+
+def _etag(request, *partes):
+    datos = ':'.join(str(parte) for parte in (request.user.pk, *partes))
+    return hashlib.md5(datos.encode()).hexdigest()
+
+
+def _condicional(etag_func, last_modified_func):
+    """
+    condition() de Django más Cache-Control: private, no-cache, para que el
+    navegador guarde la página pero la revalide en cada visita.
+
+    Los validadores se calculan antes de entrar a condition(), que los llama
+    de forma síncrona también en vistas async: ahí se calculan en un hilo.
+    """
+    def validadores(request, *args, **kwargs):
+        if _mensajes_pendientes(request):
+            return None, None
+        return etag_func(request, *args, **kwargs), last_modified_func(request, *args, **kwargs)
+
+    def decorador(vista):
+        condicional = cache_control(private=True, no_cache=True)(condition(
+            lambda request, *args, **kwargs: request._validadores[0],
+            lambda request, *args, **kwargs: request._validadores[1],
+        )(vista))
+
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def vista_condicional(request, *args, **kwargs):
+                request._validadores = await sync_to_async(validadores)(request, *args, **kwargs)
+                return await condicional(request, *args, **kwargs)
+        else:
+            @wraps(vista)
+            def vista_condicional(request, *args, **kwargs):
+                request._validadores = validadores(request, *args, **kwargs)
+                return condicional(request, *args, **kwargs)
+        return vista_condicional
+    return decorador
+
+
+def condicional_por_versiones(*modelos):
+    """Validadores a partir de las versiones de los modelos que muestra la vista."""
+    return _condicional(
+        lambda request, *args, **kwargs: _etag(request, versiones.versiones(*modelos)),
+        lambda request, *args, **kwargs: versiones.modificado(*modelos),
+    )
+
+
+# Lo que muestra bodega_detail además de su propio inventario
+MODELOS_BODEGA = (Material, Bodega, Usuario)
+
+
+def _estado_bodega(request, pk):
+    """Última actualización y cantidad de filas del inventario de la bodega (una consulta por request)."""
+    if not hasattr(request, '_estado_bodega'):
+        request._estado_bodega = InventarioMaterial.objects.filter(bodega_id=pk).aggregate(
+            ultima=Max('fecha_ultima_actualizacion'), filas=Count('id'),
+        )
+    return request._estado_bodega
+
+
+def _etag_bodega(request, pk):
+    estado = _estado_bodega(request, pk)
+    return _etag(request, pk, estado['ultima'], estado['filas'], versiones.versiones(*MODELOS_BODEGA))
+
+
+def _ultima_modificacion_bodega(request, pk):
+    ultima = _estado_bodega(request, pk)['ultima']
+    modificado = versiones.modificado(*MODELOS_BODEGA)
+    return max(ultima, modificado) if ultima else modificado
+
+
+condicional_bodega = _condicional(_etag_bodega, _ultima_modificacion_bodega)
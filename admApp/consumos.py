@@ -0,0 +1,243 @@
+"""
+Acumulados de consumo de material por obra (diarios y mensuales).
+
+Cuenta como consumo de una obra:
+    SALIDA con obra      -> cantidad_salida
+    DEVOLUCION con obra  -> cantidad_devuelta
+Los demás movimientos no cambian el consumo.
+
+ledger.registrar_movimientos() llama a acumular_consumos() dentro de su
+transacción, así los reportes leen unas pocas filas ya agregadas en vez de
+agrupar todo MovimientoInventario. recalcular_consumos() y
+verificar_consumos() reconstruyen y comparan los acumulados contra el libro
+(comando recalcular_consumos).
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import reportes
+from .models import ConsumoDiario, ConsumoMensual, MovimientoInventario
+
+
+Tipo = MovimientoInventario.TipoMovimiento
+
+CAMPOS = ['cantidad_salida', 'cantidad_devuelta', 'movimientos']
+
+TAMANO_LOTE = 2000
+
+
+def primer_dia_del_mes(fecha):
+    return fecha.replace(day=1)
+
+
+def _aporte(mov):
+    """(salida, devuelta) del movimiento, o None si no es consumo de obra."""
+    if not mov.obra_id:
+        return None
+    if mov.tipo_movimiento == Tipo.SALIDA:
+        return mov.cantidad, 0
+    if mov.tipo_movimiento == Tipo.DEVOLUCION:
+        return 0, mov.cantidad
+    return None
+
+
+def _acumular(modelo, campo_fecha, deltas):
+    """
+    Suma deltas {(obra_id, material_id, fecha): [salida, devuelta, n]} a las
+    filas del modelo con el mismo patrón que el ledger: bloquear, crear las
+    que faltan y un solo bulk_update.
+    """
+    def bloquear(claves):
+        filtro = reduce(or_, (Q(obra_id=o, material_id=m, **{campo_fecha: f}) for o, m, f in claves))
+        filas = modelo.objects.select_for_update().filter(filtro).order_by('pk')
+        return {(f.obra_id, f.material_id, getattr(f, campo_fecha)): f for f in filas}
+
+    filas = bloquear(deltas)
+    faltan = [clave for clave in deltas if clave not in filas]
+    if faltan:
+        modelo.objects.bulk_create(
+            [modelo(obra_id=o, material_id=m, **{campo_fecha: f}) for o, m, f in faltan],
+            ignore_conflicts=True,
+        )
+        filas.update(bloquear(faltan))
+    for clave, (salida, devuelta, n) in deltas.items():
+        fila = filas[clave]
+        fila.cantidad_salida += salida
+        fila.cantidad_devuelta += devuelta
+        fila.movimientos += n
+    modelo.objects.bulk_update([filas[clave] for clave in deltas], CAMPOS)
+
+
+def acumular_consumos(movimientos):
+    """
+    Aplica a los acumulados los movimientos recién creados (con
+    fecha_movimiento ya asignada). Debe llamarse dentro de la transacción
+    que los crea.
+    """
+    diarios = defaultdict(lambda: [0, 0, 0])
+    for mov in movimientos:
+        aporte = _aporte(mov)
+        if aporte is None:
+            continue
+        clave = (mov.obra_id, mov.material_id, timezone.localdate(mov.fecha_movimiento))
+        diarios[clave][0] += aporte[0]
+        diarios[clave][1] += aporte[1]
+        diarios[clave][2] += 1
+    if not diarios:
+        return
+
+    mensuales = defaultdict(lambda: [0, 0, 0])
+    for (obra_id, material_id, fecha), valores in diarios.items():
+        acumulado = mensuales[(obra_id, material_id, primer_dia_del_mes(fecha))]
+        for i, valor in enumerate(valores):
+            acumulado[i] += valor
+    _acumular(ConsumoDiario, 'fecha', diarios)
+    _acumular(ConsumoMensual, 'mes', mensuales)
+
+
+def _movimientos_de_consumo(desde=None, hasta=None):
+    """Movimientos que cuentan como consumo, con fecha local en [desde, hasta]."""
+    queryset = MovimientoInventario.objects.filter(
+        obra__isnull=False, tipo_movimiento__in=[Tipo.SALIDA, Tipo.DEVOLUCION],
+    )
+    if desde:
+        queryset = queryset.filter(fecha_movimiento__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+    if hasta:
+        queryset = queryset.filter(
+            fecha_movimiento__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min)),
+        )
+    return queryset
+
+
+def consumos_desde_movimientos(desde=None, hasta=None):
+    """GROUP BY sobre el libro: {(obra_id, material_id, fecha): (salida, devuelta, n)}."""
+    filas = (
+        _movimientos_de_consumo(desde, hasta)
+        .annotate(dia=TruncDate('fecha_movimiento'))
+        .values('obra_id', 'material_id', 'dia')
+        .annotate(
+            salida=Sum('cantidad', filter=Q(tipo_movimiento=Tipo.SALIDA), default=0),
+            devuelta=Sum('cantidad', filter=Q(tipo_movimiento=Tipo.DEVOLUCION), default=0),
+            n=Count('id'),
+        )
+        .order_by()
+        .values_list('obra_id', 'material_id', 'dia', 'salida', 'devuelta', 'n')
+    )
+    return {(o, m, d): (s, dv, n) for o, m, d, s, dv, n in filas.iterator(chunk_size=TAMANO_LOTE)}
+
+
+def _rango_de_meses(desde, hasta):
+    """Amplía [desde, hasta] a meses completos, que es lo que se recalcula."""
+    if desde:
+        desde = primer_dia_del_mes(desde)
+    if hasta:
+        siguiente = primer_dia_del_mes(hasta) + timedelta(days=32)
+        hasta = primer_dia_del_mes(siguiente) - timedelta(days=1)
+    return desde, hasta
+
+
+def _filtro_rango(campo, desde, hasta):
+    filtro = Q()
+    if desde:
+        filtro &= Q(**{f'{campo}__gte': desde})
+    if hasta:
+        filtro &= Q(**{f'{campo}__lte': hasta})
+    return filtro
+
+
+def recalcular_consumos(desde=None, hasta=None):
+    """
+    Reconstruye los acumulados de [desde, hasta] (fechas; None = sin límite)
+    desde el libro de movimientos. El rango se amplía a meses completos para
+    que los mensuales salgan de días completos. Devuelve (diarios, mensuales)
+    filas escritas.
+    """
+    desde, hasta = _rango_de_meses(desde, hasta)
+    diarios = consumos_desde_movimientos(desde, hasta)
+    mensuales = defaultdict(lambda: [0, 0, 0])
+    for (obra_id, material_id, fecha), valores in diarios.items():
+        acumulado = mensuales[(obra_id, material_id, primer_dia_del_mes(fecha))]
+        for i, valor in enumerate(valores):
+            acumulado[i] += valor
+
+    with transaction.atomic():
+        ConsumoDiario.objects.filter(_filtro_rango('fecha', desde, hasta)).delete()
+        ConsumoMensual.objects.filter(_filtro_rango('mes', desde, hasta)).delete()
+        ConsumoDiario.objects.bulk_create(
+            [ConsumoDiario(obra_id=o, material_id=m, fecha=f, cantidad_salida=s, cantidad_devuelta=d, movimientos=n)
+             for (o, m, f), (s, d, n) in diarios.items()],
+            batch_size=TAMANO_LOTE,
+        )
+        ConsumoMensual.objects.bulk_create(
+            [ConsumoMensual(obra_id=o, material_id=m, mes=f, cantidad_salida=s, cantidad_devuelta=d, movimientos=n)
+             for (o, m, f), (s, d, n) in mensuales.items()],
+            batch_size=TAMANO_LOTE,
+        )
+        # bulk_create no dispara señales: el reporte financiero lee estos acumulados
+        transaction.on_commit(reportes.invalidar_todo)
+    return len(diarios), len(mensuales)
+
+
+def verificar_consumos(desde=None, hasta=None):
+    """
+    Compara los acumulados con el libro en [desde, hasta]. Devuelve una
+    lista de (tabla, clave, esperado, guardado) con las diferencias.
+    """
+    desde, hasta = _rango_de_meses(desde, hasta)
+    esperados = consumos_desde_movimientos(desde, hasta)
+    diferencias = []
+
+    guardados = {
+        (o, m, f): (s, d, n) for o, m, f, s, d, n in
+        ConsumoDiario.objects.filter(_filtro_rango('fecha', desde, hasta))
+        .values_list('obra_id', 'material_id', 'fecha', *CAMPOS).iterator(chunk_size=TAMANO_LOTE)
+    }
+    for clave in esperados.keys() | guardados.keys():
+        esperado = esperados.get(clave, (0, 0, 0))
+        guardado = guardados.get(clave, (0, 0, 0))
+        if tuple(esperado) != tuple(guardado):
+            diferencias.append(('diario', clave, esperado, guardado))
+
+    mensuales_esperados = defaultdict(lambda: (0, 0, 0))
+    for (obra_id, material_id, fecha), valores in guardados.items():
+        clave = (obra_id, material_id, primer_dia_del_mes(fecha))
+        mensuales_esperados[clave] = tuple(a + b for a, b in zip(mensuales_esperados[clave], valores))
+    mensuales = {
+        (o, m, f): (s, d, n) for o, m, f, s, d, n in
+        ConsumoMensual.objects.filter(_filtro_rango('mes', desde, hasta))
+        .values_list('obra_id', 'material_id', 'mes', *CAMPOS)
+    }
+    for clave in mensuales_esperados.keys() | mensuales.keys():
+        esperado = mensuales_esperados.get(clave, (0, 0, 0))
+        guardado = mensuales.get(clave, (0, 0, 0))
+        if esperado != guardado:
+            diferencias.append(('mensual', clave, esperado, guardado))
+    return diferencias
+
+
+def consumo_mensual(obra=None, material=None, desde=None, hasta=None):
+    """
+    Consumo por mes desde los acumulados, para reportes y gráficos:
+    queryset de dicts {mes, material_id, salida, devuelta, neto}.
+    """
+    queryset = ConsumoMensual.objects.filter(_filtro_rango('mes', desde and primer_dia_del_mes(desde), hasta))
+    if obra is not None:
+        queryset = queryset.filter(obra=obra)
+    if material is not None:
+        queryset = queryset.filter(material=material)
+    return (
+        queryset.values('mes', 'material_id', 'material__nombre', 'material__unidad_medida')
+        .annotate(
+            salida=Sum('cantidad_salida'),
+            devuelta=Sum('cantidad_devuelta'),
+            neto=Sum('cantidad_salida') - Sum('cantidad_devuelta'),
+        )
+        .order_by('mes', 'material__nombre')
+    )
@@ -0,0 +1,11 @@
+import time
+
+
+def instrumentacion(request):
+    """
+    Marca el inicio del render para InstrumentacionMiddleware: los context
+    processors corren justo antes de renderizar el template.
+    """
+    if hasattr(request, '_instrumentacion') and not hasattr(request, '_inicio_render'):
+        request._inicio_render = time.perf_counter()
+    return {}
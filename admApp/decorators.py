@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth.decorators import user_passes_test
 from django.shortcuts import redirect
 from functools import wraps
@@ -6,8 +7,23 @@ def role_required(*roles):
     """
     Decorador personalizado para requerir ciertos roles.
     Uso: @role_required('ADMIN', 'BODEGUERO')
+    Sirve también para vistas async (carga el usuario con request.auser()).
     """
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                user = await request.auser()
+                if not user.is_authenticated:
+                    return redirect('login')
+                
+                if user.rol not in roles:
+                    from django.http import HttpResponseForbidden
+                    return HttpResponseForbidden("No tienes permiso para acceder a esta página.")
+                
+                return await view_func(request, *args, **kwargs)
+            return _wrapped_async_view
+        
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             if not request.user.is_authenticated:
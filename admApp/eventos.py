@@ -0,0 +1,234 @@
+"""
+Stock en vivo por bodega con server-sent events (SSE).
+
+Las señales llaman a publicar(bodega_id, material_ids) cuando se confirman
+movimientos o cambia una fila de InventarioMaterial. Cada conexión abierta a
+bodega_stock_eventos tiene una Suscripcion en este proceso: el aviso la
+despierta, lee de la base las cantidades de esos materiales y envía las que
+cambiaron:
+
+    event: stock
+    id: <marca de tiempo>
+    data: {"cambios": [{"material": 7, "cantidad": 120, "delta": -30, "alerta": false}]}
+
+El pub/sub es solo del proceso. Los cambios hechos en otros workers o en
+comandos llegan por el respaldo de sondeo: cada INTERVALO segundos el stream
+revisa las filas con fecha_ultima_actualizacion reciente (índice
+inv_mat_bodega_fecha_idx). Al reconectar, EventSource manda Last-Event-ID y el
+stream reenvía lo que cambió desde entonces.
+
+El stream abierto solo tiene sentido bajo ASGI, donde esperar no ocupa un
+hilo. Bajo WSGI (sse_disponible() es False) la página no abre un EventSource:
+consulta bodega_stock_cambios cada INTERVALO segundos, una lectura corta que
+devuelve los cambios desde la marca anterior. Si igual llega una conexión SSE
+bajo WSGI, se responde una sola vez y se cierra; EventSource reconecta solo.
+
+Configuración (settings.STOCK_EN_VIVO):
+    INTERVALO   segundos entre sondeos / comentarios de keep-alive
+    DURACION    segundos que dura una conexión ASGI antes de pedir reconexión
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
+
+from .models import InventarioMaterial
+from .paralelo import en_paralelo
+
+
+CONFIG_POR_DEFECTO = {
+    'INTERVALO': 5,
+    'DURACION': 300,
+}
+
+# El sondeo vuelve a mirar filas un poco anteriores a la última marca: la
+# fecha se asigna antes del commit y la transacción puede confirmar más tarde
+MARGEN_SONDEO = timedelta(seconds=30)
+
+
+def configuracion():
+    return {**CONFIG_POR_DEFECTO, **getattr(settings, 'STOCK_EN_VIVO', {})}
+
+
+def sse_disponible(request):
+    """Un stream abierto solo bajo ASGI; bajo WSGI ocuparía un hilo del worker."""
+    return isinstance(request, ASGIRequest)
+
+
+# ============================================
+# PUB/SUB EN PROCESO
+# ============================================
+
+class Suscripcion:
+    """
+    Avisos pendientes de una conexión SSE. publicar() puede llamar desde
+    cualquier hilo: el asyncio.Event se marca con call_soon_threadsafe.
+    """
+
+    def __init__(self, bodega_id, loop):
+        self.bodega_id = bodega_id
+        self._loop = loop
+        self._evento = asyncio.Event()
+        self._pendientes = set()
+        self._lock = threading.Lock()
+
+    def avisar(self, material_ids):
+        with self._lock:
+            self._pendientes.update(material_ids)
+        self._loop.call_soon_threadsafe(self._evento.set)
+
+    def tomar(self):
+        """Material ids avisados desde la última llamada."""
+        # Limpiar antes de tomar: un aviso que llega en medio vuelve a marcar el evento
+        self._evento.clear()
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, set()
+        return pendientes
+
+    async def aesperar(self, segundos):
+        try:
+            await asyncio.wait_for(self._evento.wait(), segundos)
+        except asyncio.TimeoutError:
+            pass
+
+
+_suscripciones = defaultdict(set)
+_lock = threading.Lock()
+
+
+def suscribir(suscripcion):
+    with _lock:
+        _suscripciones[suscripcion.bodega_id].add(suscripcion)
+
+
+def desuscribir(suscripcion):
+    with _lock:
+        grupo = _suscripciones.get(suscripcion.bodega_id)
+        if grupo is not None:
+            grupo.discard(suscripcion)
+            if not grupo:
+                del _suscripciones[suscripcion.bodega_id]
+
+
+def publicar(bodega_id, material_ids):
+    with _lock:
+        suscripciones = list(_suscripciones.get(bodega_id, ()))
+    for suscripcion in suscripciones:
+        suscripcion.avisar(material_ids)
+
+
+# ============================================
+# STREAM
+# ============================================
+
+def desde_de_request(request):
+    """Desde cuándo enviar cambios: Last-Event-ID al reconectar, o ?desde= (epoch) de la página."""
+    valor = request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    try:
+        return datetime.fromtimestamp(float(valor), tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return timezone.now()
+
+
+class StreamStock:
+    """
+    Estado de una conexión: las cantidades que ya conoce el cliente, para
+    enviar solo cambios reales y calcular el delta.
+    """
+
+    def __init__(self, bodega_id, desde):
+        self.bodega_id = bodega_id
+        self.marca = desde
+        self.cantidades = None
+        self.config = configuracion()
+
+    def _filas(self, material_ids=(), desde=None):
+        queryset = InventarioMaterial.objects.filter(bodega_id=self.bodega_id).con_alerta()
+        if desde is not None:
+            queryset = queryset.filter(fecha_ultima_actualizacion__gte=desde)
+        if material_ids:
+            queryset = queryset.filter(material_id__in=material_ids)
+        return {
+            material_id: (cantidad, alerta)
+            for material_id, cantidad, alerta in queryset.values_list('material_id', 'cantidad_actual', 'alerta')
+        }
+
+    def cambios(self, material_ids=()):
+        """
+        Lee las filas avisadas más las modificadas desde la última marca y
+        devuelve los cambios respecto de lo que ya se envió. La primera vez
+        envía todo lo modificado desde la marca inicial (delta desconocido).
+        """
+        ahora = timezone.now()
+        if self.cantidades is None:
+            actuales = self._filas()
+            self.cantidades = {m: cantidad for m, (cantidad, _) in actuales.items()}
+            recientes = self._filas(desde=self.marca - MARGEN_SONDEO)
+            self.marca = ahora
+            return [
+                {'material': m, 'cantidad': cantidad, 'delta': None, 'alerta': alerta}
+                for m, (cantidad, alerta) in recientes.items()
+            ]
+
+        filas = self._filas(desde=self.marca - MARGEN_SONDEO)
+        if material_ids:
+            filas.update(self._filas(material_ids=material_ids))
+        self.marca = ahora
+
+        cambios = []
+        for material_id, (cantidad, alerta) in filas.items():
+            anterior = self.cantidades.get(material_id)
+            if anterior != cantidad:
+                self.cantidades[material_id] = cantidad
+                delta = None if anterior is None else cantidad - anterior
+                cambios.append({'material': material_id, 'cantidad': cantidad, 'delta': delta, 'alerta': alerta})
+        for material_id in set(material_ids) - filas.keys():
+            # fila borrada
+            if self.cantidades.pop(material_id, None) is not None:
+                cambios.append({'material': material_id, 'cantidad': None, 'delta': None, 'alerta': False})
+        return cambios
+
+    def mensaje(self, cambios):
+        if not cambios:
+            return ': ping\n\n'
+        datos = json.dumps({'cambios': cambios})
+        return f'event: stock\nid: {self.marca.timestamp():.6f}\ndata: {datos}\n\n'
+
+    def inicio(self):
+        return f"retry: {self.config['INTERVALO'] * 1000}\n\n"
+
+    def eventos(self):
+        """
+        Generador para WSGI: una lectura y cierra, sin esperar avisos; el
+        cliente reconecta a los INTERVALO segundos con Last-Event-ID.
+        """
+        yield self.inicio()
+        yield self.mensaje(self.cambios())
+
+    def sondeo(self):
+        """Respuesta de bodega_stock_cambios: cambios desde `desde` y la marca para el próximo pedido."""
+        cambios = self.cambios()
+        return {'marca': f'{self.marca.timestamp():.6f}', 'cambios': cambios}
+
+    async def aeventos(self):
+        """Generador para ASGI: no ocupa un hilo mientras espera."""
+        suscripcion = Suscripcion(self.bodega_id, asyncio.get_running_loop())
+        suscribir(suscripcion)
+        fin = time.monotonic() + self.config['DURACION']
+        try:
+            yield self.inicio()
+            cambios, = await en_paralelo(self.cambios)
+            yield self.mensaje(cambios)
+            while time.monotonic() < fin:
+                await suscripcion.aesperar(self.config['INTERVALO'])
+                material_ids = suscripcion.tomar()
+                cambios, = await en_paralelo(lambda: self.cambios(material_ids))
+                yield self.mensaje(cambios)
+        finally:
+            desuscribir(suscripcion)
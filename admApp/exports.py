@@ -0,0 +1,135 @@
+"""
+Exportación en streaming (CSV / JSONL) del libro de movimientos y préstamos.
+
+Las filas se leen como tuplas (values_list) por lotes y se escriben a medida
+que se generan, así la memoria del worker no depende del tamaño del extracto.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import MovimientoInventario, Prestamo
+
+
+TAMANO_LOTE = 2000
+
+COLUMNAS_MOVIMIENTOS = [
+    'id', 'fecha_movimiento', 'tipo_movimiento', 'material_id', 'material__nombre', 'cantidad',
+    'bodega_origen_id', 'bodega_destino_id', 'obra_id', 'usuario_responsable__username', 'motivo',
+]
+
+COLUMNAS_PRESTAMOS = [
+    'id', 'fecha_prestamo', 'fecha_devolucion_estimada', 'fecha_devolucion_real', 'estado',
+    'herramienta_id', 'herramienta__nombre', 'herramienta__numero_serie', 'obrero_id', 'obra_id',
+    'bodega_id', 'usuario_registro__username', 'observaciones_prestamo', 'observaciones_devolucion',
+]
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+
+def _inicio_del_dia(texto, parametro):
+    fecha = parse_date(texto)
+    if fecha is None:
+        raise ValueError(f'{parametro}: fecha inválida "{texto}" (use AAAA-MM-DD)')
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def filtrar_por_fechas(queryset, campo, desde=None, hasta=None):
+    """desde/hasta en AAAA-MM-DD; hasta incluye el día completo."""
+    if desde:
+        queryset = queryset.filter(**{f'{campo}__gte': _inicio_del_dia(desde, 'desde')})
+    if hasta:
+        queryset = queryset.filter(**{f'{campo}__lt': _inicio_del_dia(hasta, 'hasta') + timedelta(days=1)})
+    return queryset
+
+
+def _bodega_id(bodega):
+    if bodega in (None, ''):
+        return None
+    if not str(bodega).isdigit():
+        raise ValueError(f'bodega: id inválido "{bodega}"')
+    return int(bodega)
+
+
+def movimientos_para_exportar(desde=None, hasta=None, bodega=None):
+    queryset = filtrar_por_fechas(MovimientoInventario.objects.all(), 'fecha_movimiento', desde, hasta)
+    bodega_id = _bodega_id(bodega)
+    if bodega_id:
+        queryset = queryset.filter(Q(bodega_origen_id=bodega_id) | Q(bodega_destino_id=bodega_id))
+    return queryset.order_by('fecha_movimiento', 'id').values_list(*COLUMNAS_MOVIMIENTOS)
+
+
+def prestamos_para_exportar(desde=None, hasta=None, bodega=None):
+    queryset = filtrar_por_fechas(Prestamo.objects.all(), 'fecha_prestamo', desde, hasta)
+    bodega_id = _bodega_id(bodega)
+    if bodega_id:
+        queryset = queryset.filter(bodega_id=bodega_id)
+    return queryset.order_by('fecha_prestamo', 'id').values_list(*COLUMNAS_PRESTAMOS)
+
+
+def iterar_filas(queryset, columnas, tamano_lote=TAMANO_LOTE):
+    """
+    Recorre un values_list ordenado por (fecha, id) sin cargarlo completo.
+
+    En PostgreSQL/SQLite/Oracle basta con iterator(chunk_size=...). El driver
+    de MySQL trae el resultado entero a memoria aunque se use iterator(), así
+    que ahí se pide por lotes con cursor: (fecha, id) > último visto.
+    """
+    if connection.vendor != 'mysql':
+        yield from queryset.iterator(chunk_size=tamano_lote)
+        return
+    campo_fecha = queryset.query.order_by[0]
+    i_fecha, i_id = columnas.index(campo_fecha), columnas.index('id')
+    lote = queryset
+    while True:
+        filas = list(lote[:tamano_lote])
+        yield from filas
+        if len(filas) < tamano_lote:
+            return
+        fecha, pk = filas[-1][i_fecha], filas[-1][i_id]
+        lote = queryset.filter(Q(**{f'{campo_fecha}__gt': fecha}) | Q(**{campo_fecha: fecha, 'id__gt': pk}))
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def _json(valor):
+    return valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def lineas_csv(queryset, columnas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(columnas)
+    for fila in iterar_filas(queryset, columnas):
+        yield escritor.writerow([_texto(v) for v in fila])
+
+
+def lineas_jsonl(queryset, columnas):
+    for fila in iterar_filas(queryset, columnas):
+        yield json.dumps(dict(zip(columnas, fila)), default=_json, ensure_ascii=False) + '\n'
+
+
+def lineas(queryset, columnas, formato):
+    if formato == 'jsonl':
+        return lineas_jsonl(queryset, columnas)
+    return lineas_csv(queryset, columnas)
@@ -136,3 +136,53 @@ class PrestamoForm(forms.ModelForm):
             'observaciones_prestamo': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
 
+
+
+class PrestamoLoteForm(forms.Form):
+    """Préstamo de varias herramientas a un mismo obrero (ver prestamos.prestar_herramientas)"""
+    herramientas = forms.ModelMultipleChoiceField(
+        queryset=Herramienta.objects.filter(activo=True, estado=Herramienta.EstadoHerramienta.DISPONIBLE),
+        widget=forms.SelectMultiple(attrs={'class': 'form-control', 'size': 12}),
+    )
+    obrero = forms.ModelChoiceField(queryset=Obrero.objects.all(), widget=forms.Select(attrs={'class': 'form-control'}))
+    bodega = forms.ModelChoiceField(queryset=Bodega.objects.all(), widget=forms.Select(attrs={'class': 'form-control'}))
+    obra = forms.ModelChoiceField(queryset=Obra.objects.all(), widget=forms.Select(attrs={'class': 'form-control'}))
+    fecha_devolucion_estimada = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    observaciones_prestamo = forms.CharField(
+        required=False, widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+    )
+
+
+class DevolucionMasivaForm(forms.Form):
+    """Filtro para la devolución en bloque (ver prestamos.devolver_prestamos)"""
+    obrero = forms.ModelChoiceField(
+        queryset=Obrero.objects.all(), required=False, widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    obra = forms.ModelChoiceField(
+        queryset=Obra.objects.all(), required=False, widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+    def clean(self):
+        datos = super().clean()
+        if not datos.get('obrero') and not datos.get('obra'):
+            raise forms.ValidationError('Seleccione un obrero o una obra')
+        return datos
+
+
+class TransferenciaForm(forms.Form):
+    """Bodegas de una transferencia; las líneas vienen como cantidad_<material> (ver transferencias.transferir)"""
+    bodega_origen = forms.ModelChoiceField(
+        queryset=Bodega.objects.filter(activa=True), widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    bodega_destino = forms.ModelChoiceField(
+        queryset=Bodega.objects.filter(activa=True), widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    observaciones = forms.CharField(
+        required=False, widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
+    )
+
+    def clean(self):
+        datos = super().clean()
+        if datos.get('bodega_origen') and datos.get('bodega_origen') == datos.get('bodega_destino'):
+            raise forms.ValidationError('La bodega de origen y la de destino deben ser distintas')
+        return datos
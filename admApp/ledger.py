@@ -0,0 +1,161 @@
+"""
+Motor de registro de movimientos de inventario.
+
+registrar_movimientos() aplica un lote de MovimientoInventario sobre las filas
+de InventarioMaterial afectadas dentro de una sola transacción:
+
+    1. bloquea (SELECT ... FOR UPDATE) las filas de stock involucradas,
+    2. crea las que aún no existen,
+    3. valida que ninguna quede negativa,
+    4. actualiza todas las cantidades con un solo bulk_update,
+    5. inserta los movimientos con bulk_create,
+    6. suma las salidas/devoluciones a los acumulados de consumo por obra.
+
+El costo es un puñado de consultas sin importar cuántas líneas traiga el lote,
+y el bloqueo de filas evita que dos bodegueros pisen el stock del otro.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .consumos import acumular_consumos
+from .models import InventarioMaterial, MovimientoInventario
+from .signals import movimientos_registrados
+
+
+class ErrorInventario(Exception):
+    """Error base del motor de inventario."""
+
+
+class MovimientoInvalido(ErrorInventario):
+    """El movimiento no tiene las bodegas que su tipo exige."""
+
+
+class StockInsuficiente(ErrorInventario):
+    """Aplicar el lote dejaría alguna fila de inventario en negativo."""
+
+    def __init__(self, faltantes):
+        self.faltantes = faltantes
+        detalle = ', '.join(
+            f'{inv.material.nombre} en {inv.bodega.nombre} (disponible {inv.cantidad_actual}, faltan {falta})'
+            for inv, falta in faltantes
+        )
+        super().__init__(f'Stock insuficiente: {detalle}')
+
+
+Tipo = MovimientoInventario.TipoMovimiento
+
+
+def validar_movimiento(mov):
+    """
+    Revisa que el movimiento tenga las bodegas que corresponden a su tipo:
+
+    ENTRADA        solo destino
+    SALIDA         solo origen
+    TRANSFERENCIA  origen y destino distintos
+    AJUSTE         destino (ajuste positivo) u origen (ajuste negativo), no ambos
+    DEVOLUCION     destino, y opcionalmente el origen desde donde vuelve
+    """
+    origen, destino = mov.bodega_origen_id, mov.bodega_destino_id
+    if not mov.cantidad or mov.cantidad < 1:
+        raise MovimientoInvalido('La cantidad debe ser mayor a cero')
+    tipo = mov.tipo_movimiento
+    if tipo == Tipo.ENTRADA:
+        valido = destino and not origen
+    elif tipo == Tipo.SALIDA:
+        valido = origen and not destino
+    elif tipo == Tipo.TRANSFERENCIA:
+        valido = origen and destino and origen != destino
+    elif tipo == Tipo.AJUSTE:
+        valido = bool(origen) != bool(destino)
+    elif tipo == Tipo.DEVOLUCION:
+        valido = destino and origen != destino
+    else:
+        raise MovimientoInvalido(f'Tipo de movimiento desconocido: {tipo}')
+    if not valido:
+        raise MovimientoInvalido(f'Bodegas inválidas para un movimiento de tipo {mov.get_tipo_movimiento_display()}')
+
+
+def deltas_por_fila(movimientos):
+    """Suma el efecto neto del lote por (bodega_id, material_id)."""
+    deltas = defaultdict(int)
+    for mov in movimientos:
+        if mov.bodega_origen_id:
+            deltas[(mov.bodega_origen_id, mov.material_id)] -= mov.cantidad
+        if mov.bodega_destino_id:
+            deltas[(mov.bodega_destino_id, mov.material_id)] += mov.cantidad
+    return deltas
+
+
+def _bloquear_inventario(claves):
+    filtro = reduce(or_, (Q(bodega_id=b, material_id=m) for b, m in claves))
+    filas = (
+        InventarioMaterial.objects.select_for_update()
+        .filter(filtro)
+        .select_related('bodega', 'material')
+        .order_by('pk')
+    )
+    return {(inv.bodega_id, inv.material_id): inv for inv in filas}
+
+
+def registrar_movimientos(movimientos, usuario=None):
+    """
+    Aplica y guarda un lote de movimientos (instancias sin guardar) en una
+    sola transacción. Si alguno es inválido o falta stock no se aplica
+    ninguno. Devuelve la lista de movimientos creados.
+
+    En MySQL bulk_create no devuelve los ids, así que en un lote de varios
+    movimientos quedan con pk None; un movimiento solo se guarda con save()
+    y siempre trae su pk (ej: el alta desde el admin).
+    """
+    movimientos = list(movimientos)
+    if not movimientos:
+        return []
+    for mov in movimientos:
+        validar_movimiento(mov)
+        if usuario is not None and mov.usuario_responsable_id is None:
+            mov.usuario_responsable = usuario
+
+    deltas = deltas_por_fila(movimientos)
+    with transaction.atomic():
+        filas = _bloquear_inventario(deltas)
+        faltan = [clave for clave in deltas if clave not in filas]
+        if faltan:
+            InventarioMaterial.objects.bulk_create(
+                [InventarioMaterial(bodega_id=b, material_id=m, cantidad_actual=0) for b, m in faltan],
+                ignore_conflicts=True,
+            )
+            filas.update(_bloquear_inventario(faltan))
+
+        faltantes = []
+        for clave, delta in deltas.items():
+            inv = filas[clave]
+            if inv.cantidad_actual + delta < 0:
+                faltantes.append((inv, -(inv.cantidad_actual + delta)))
+        if faltantes:
+            raise StockInsuficiente(faltantes)
+
+        ahora = timezone.now()
+        cambiadas = []
+        for clave, delta in deltas.items():
+            if delta:
+                inv = filas[clave]
+                inv.cantidad_actual += delta
+                inv.fecha_ultima_actualizacion = ahora
+                cambiadas.append(inv)
+        InventarioMaterial.objects.bulk_update(cambiadas, ['cantidad_actual', 'fecha_ultima_actualizacion'])
+        if len(movimientos) == 1:
+            movimientos[0].save(force_insert=True)
+            creados = movimientos
+        else:
+            creados = MovimientoInventario.objects.bulk_create(movimientos)
+        acumular_consumos(creados)
+
+        transaction.on_commit(lambda: movimientos_registrados.send(
+            sender=MovimientoInventario, movimientos=creados,
+        ))
+    return creados
@@ -0,0 +1,133 @@
+"""
+Compara las vistas síncronas (WSGI) con sus versiones async (ASGI).
+
+Uso:
+    python manage.py benchmark_async
+    python manage.py benchmark_async --peticiones 500 --concurrencia 20 --sin-cache
+
+Cada vista se pide --peticiones veces con --concurrencia clientes a la vez:
+la versión sync con django.test.Client en hilos (pasa por WSGIHandler) y la
+async con AsyncClient en el event loop (pasa por ASGIHandler). Ambas corren
+en este proceso contra la base configurada, sin servidor HTTP de por medio.
+Muestra req/s y latencias p50/p99 en ms. --sin-cache borra las métricas del
+dashboard antes de cada petición, para medir las consultas y no el caché.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from admApp import metrics
+from admApp.models import Bodega, Usuario
+
+
+# vista: (url sync, url async, necesita bodega)
+VISTAS = {
+    'dashboard': ('dashboard', 'async_dashboard', False),
+    'bodega_detail': ('bodega_detail', 'async_bodega_detail', True),
+    'bajo_minimo_resumen': ('inventario_bajo_minimo_resumen', 'async_inventario_bajo_minimo_resumen', False),
+}
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y throughput de las vistas sync (WSGI) contra las async (ASGI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por vista y modo (default: 200)')
+        parser.add_argument('--concurrencia', type=int, default=10, help='Clientes simultáneos (default: 10)')
+        parser.add_argument('--usuario', help='Username con el que se hacen las peticiones (default: primer ADMIN)')
+        parser.add_argument('--host', default='localhost', help='Cabecera Host; debe estar en ALLOWED_HOSTS')
+        parser.add_argument('--vista', action='append', choices=sorted(VISTAS),
+                            help='Vista a medir (repetible; default: todas)')
+        parser.add_argument('--sin-cache', action='store_true', help='Invalida las métricas antes de cada petición')
+
+    def handle(self, *args, **options):
+        usuario = self._usuario(options['usuario'])
+        bodega = Bodega.objects.order_by('pk').first()
+        if bodega is None:
+            raise CommandError('No hay bodegas: siembre datos antes de medir')
+        self.opciones = options
+        # Una línea de log por petición taparía la tabla de resultados
+        logging.getLogger('admApp.instrumentacion').disabled = True
+
+        self.stdout.write(f"{'vista':<22} {'modo':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+        for nombre in options['vista'] or VISTAS:
+            url_sync, url_async, con_bodega = VISTAS[nombre]
+            argumentos = [bodega.pk] if con_bodega else []
+            resultados = {
+                'sync': self._medir_sync(usuario, reverse(url_sync, args=argumentos)),
+                'async': asyncio.run(self._medir_async(usuario, reverse(url_async, args=argumentos))),
+            }
+            for modo, (total, latencias, errores) in resultados.items():
+                self.stdout.write(
+                    f'{nombre:<22} {modo:<6} {len(latencias) / total:>8.1f} '
+                    f'{percentil(latencias, 50):>8.1f} {percentil(latencias, 99):>8.1f} {errores:>8}'
+                )
+
+    def _usuario(self, username):
+        usuarios = Usuario.objects.all()
+        usuario = usuarios.filter(username=username).first() if username else usuarios.filter(rol='ADMIN').first()
+        if usuario is None:
+            raise CommandError('Usuario no encontrado' if username else 'No hay usuarios ADMIN')
+        return usuario
+
+    def _antes_de_pedir(self):
+        if self.opciones['sin_cache']:
+            metrics.invalidar(*metrics.METRICAS)
+
+    def _medir_sync(self, usuario, url):
+        """(segundos totales, latencias en ms, errores) con un Client por hilo."""
+        def cliente(cantidad):
+            client = Client(headers={'host': self.opciones['host']})
+            client.force_login(usuario)
+            latencias, errores = [], 0
+            try:
+                for _ in range(cantidad):
+                    self._antes_de_pedir()
+                    inicio = time.perf_counter()
+                    respuesta = client.get(url)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                    errores += respuesta.status_code != 200
+            finally:
+                close_old_connections()
+            return latencias, errores
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(self.opciones['concurrencia']) as pool:
+            partes = list(pool.map(cliente, self._repartir()))
+        total = time.perf_counter() - inicio
+        return total, [l for latencias, _ in partes for l in latencias], sum(e for _, e in partes)
+
+    async def _medir_async(self, usuario, url):
+        """(segundos totales, latencias en ms, errores) con un AsyncClient por tarea."""
+        async def cliente(cantidad):
+            client = AsyncClient(headers={'host': self.opciones['host']})
+            await client.aforce_login(usuario)
+            latencias, errores = [], 0
+            for _ in range(cantidad):
+                self._antes_de_pedir()
+                inicio = time.perf_counter()
+                respuesta = await client.get(url)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                errores += respuesta.status_code != 200
+            return latencias, errores
+
+        inicio = time.perf_counter()
+        partes = await asyncio.gather(*(cliente(cantidad) for cantidad in self._repartir()))
+        total = time.perf_counter() - inicio
+        return total, [l for latencias, _ in partes for l in latencias], sum(e for _, e in partes)
+
+    def _repartir(self):
+        """Peticiones por cliente, repartidas lo más parejo posible."""
+        peticiones, concurrencia = self.opciones['peticiones'], self.opciones['concurrencia']
+        return [peticiones // concurrencia + (i < peticiones % concurrencia) for i in range(concurrencia)]
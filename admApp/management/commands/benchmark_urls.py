@@ -0,0 +1,253 @@
+"""
+Benchmark en proceso de todas las URLs GET de admApp, contra una línea base.
+
+Uso:
+    python manage.py sembrar_datos --escala 0.1           # base dedicada
+    python manage.py benchmark_urls --guardar              # graba la línea base
+    python manage.py benchmark_urls                        # compara; falla si empeora
+    python manage.py benchmark_urls --filtro prestamos --repeticiones 50 -v 2
+    python manage.py benchmark_urls --sin-cache --guardar  # también en frío
+
+Recorre admApp/urls.py (incluidas las rutas del router de la API), completa
+los parámetros de ruta con un objeto existente y pide cada URL con
+django.test.Client: primero --calentamiento veces sin medir y luego
+--repeticiones veces registrando latencia (p50/p90/p99) y consultas SQL.
+El calentamiento llena los cachés (métricas, reportes, fragmentos), así que
+esas cifras son "en caliente". Con --sin-cache se mide además una serie "en
+frío", vaciando todos los cachés antes de cada petición, y se informan y
+comparan por separado. Vacía el caché configurado: use uno propio del
+benchmark, no el de producción.
+
+Una URL empeora si su p50 supera al de la línea base en más de --tolerancia
+(proporción) y en más de --min-ms, si hace más consultas que antes o si su
+status cambió. Con alguna regresión el comando termina con error, así sirve
+de paso en CI. Los resultados dependen del volumen: compare corridas sobre
+la misma siembra (misma --escala y --semilla).
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+
+from admApp import urls as admapp_urls
+from admApp.backends import usuarios
+from admApp.models import Herramienta, Obra, Usuario, Bodega, Material, Prestamo
+
+
+# No se miden: streams sin fin o que recorren tablas completas
+EXCLUIDAS = {'bodega_stock_eventos', 'exportar_movimientos', 'exportar_prestamos'}
+
+# Parámetros de ruta que no se deducen del nombre de la URL
+MODELO_POR_PARAMETRO = {'id_obra': Obra}
+
+
+def parametros_get():
+    """?query de las vistas que lo necesitan para hacer su trabajo normal."""
+    herramienta = Herramienta.objects.order_by('pk').values_list('nombre', flat=True).first() or 'a'
+    return {
+        'bodega_stock_historico': {'fecha': (timezone.localdate() - timedelta(days=30)).isoformat()},
+        'buscar': {'q': herramienta.split()[0]},
+        'buscar_json': {'q': herramienta.split()[0][:3]},
+    }
+
+
+def recorrer(patrones):
+    """(nombre, patrón) de cada URL con nombre, entrando en los include()."""
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            yield from recorrer(patron.url_patterns)
+        elif isinstance(patron, URLPattern) and patron.name:
+            yield patron.name, patron
+
+
+def nombres_de_parametros(patron):
+    regex = patron.pattern.regex
+    return list(regex.groupindex)
+
+
+def modelo_de(nombre, parametro, patron):
+    """Modelo cuyo pk va en `parametro`: del ViewSet (API), del mapa o del prefijo del nombre."""
+    vista = getattr(patron.callback, 'cls', None)
+    if vista is not None and getattr(vista, 'queryset', None) is not None:
+        return vista.queryset.model
+    if parametro in MODELO_POR_PARAMETRO:
+        return MODELO_POR_PARAMETRO[parametro]
+    prefijo = nombre.removeprefix('async_').split('_')[0]
+    try:
+        return apps.get_model('admApp', prefijo)
+    except LookupError:
+        return None
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def vaciar_caches():
+    for cache in caches.all():
+        cache.clear()
+    usuarios.limpiar()
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y consultas de cada URL de admApp y compara contra una línea base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linea-base', default=str(Path(settings.BASE_DIR) / 'benchmark_linea_base.json'),
+                            help='Archivo JSON de la línea base (default: benchmark_linea_base.json, '
+                                 'ignorado por git: depende de la máquina y de la siembra)')
+        parser.add_argument('--guardar', action='store_true', help='Guarda esta corrida como nueva línea base')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Peticiones medidas por URL (default: 20)')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Peticiones previas sin medir (default: 2)')
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help='Aumento de p50 permitido, como proporción (default: 0.25)')
+        parser.add_argument('--min-ms', type=float, default=2.0,
+                            help='Ignora aumentos de p50 menores a esto en ms (default: 2)')
+        parser.add_argument('--sin-cache', action='store_true',
+                            help='Mide también en frío, vaciando los cachés antes de cada petición')
+        parser.add_argument('--filtro', help='Solo URLs cuyo nombre contenga este texto')
+        parser.add_argument('--usuario', help='Username con el que se piden las URLs (default: primer ADMIN)')
+        parser.add_argument('--host', default='localhost', help='Cabecera Host; debe estar en ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        usuario = (
+            Usuario.objects.filter(username=options['usuario']).first() if options['usuario']
+            else Usuario.objects.filter(rol=Usuario.TipoRol.ADMINISTRADOR).order_by('pk').first()
+        )
+        if usuario is None:
+            raise CommandError('No hay usuario para el benchmark (ver --usuario o sembrar_datos)')
+        # Una línea de log por petición (o un traceback por cada 500) taparía
+        # los resultados; el status queda en la tabla
+        for logger in ('admApp.instrumentacion', 'django.request'):
+            logging.getLogger(logger).disabled = True
+
+        client = Client(headers={'host': options['host']}, raise_request_exception=False)
+        client.force_login(usuario)
+        resultados = {}
+        self.stdout.write(
+            f"{'url':<45} {'':<8} {'stat':>4} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'SQL':>5}",
+        )
+        for nombre, url in self.urls(options['filtro']):
+            r = self.medir(client, url, options['calentamiento'], options['repeticiones'])
+            series = [('caliente', r)]
+            if options['sin_cache']:
+                r['frio'] = self.medir(client, url, 0, options['repeticiones'], antes=vaciar_caches)
+                series.append(('frío', r['frio']))
+            resultados[nombre] = r
+            for serie, m in series:
+                self.stdout.write(
+                    f"{nombre:<45} {serie:<8} {m['status']:>4} {m['p50_ms']:>9.1f} {m['p90_ms']:>9.1f} "
+                    f"{m['p99_ms']:>9.1f} {m['consultas']:>5}",
+                )
+
+        ruta = Path(options['linea_base'])
+        corrida = {'fecha': timezone.now().isoformat(), 'datos': self.volumen(), 'urls': resultados}
+        if options['guardar']:
+            ruta.write_text(json.dumps(corrida, indent=2, ensure_ascii=False))
+            self.stdout.write(self.style.SUCCESS(f'Línea base guardada en {ruta}'))
+            return
+        if not ruta.exists():
+            raise CommandError(f'No existe la línea base {ruta}: córralo primero con --guardar')
+        self.comparar(json.loads(ruta.read_text()), corrida, options)
+
+    def urls(self, filtro):
+        """(nombre, url) de cada ruta medible, con parámetros completados."""
+        consultas = parametros_get()
+        for nombre, patron in recorrer(admapp_urls.urlpatterns):
+            if nombre in EXCLUIDAS or (filtro and filtro not in nombre):
+                continue
+            parametros = nombres_de_parametros(patron)
+            if 'format' in parametros:
+                # variantes .json del router: misma vista
+                continue
+            kwargs = {}
+            for parametro in parametros:
+                modelo = modelo_de(nombre, parametro, patron)
+                pk = modelo and modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+                if pk is None:
+                    self.stderr.write(f'{nombre}: sin objeto para {parametro}, se omite')
+                    break
+                kwargs[parametro] = pk
+            else:
+                url = reverse(nombre, kwargs=kwargs)
+                if nombre in consultas:
+                    url += '?' + '&'.join(f'{k}={v}' for k, v in consultas[nombre].items())
+                yield nombre, url
+
+    def medir(self, client, url, calentamiento, repeticiones, antes=None):
+        """Latencias y consultas de `url`; `antes` se llama fuera de la medición antes de cada petición."""
+        for _ in range(calentamiento):
+            client.get(url)
+        latencias = []
+        consultas = 0
+        for _ in range(repeticiones):
+            if antes is not None:
+                antes()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                respuesta = client.get(url)
+                if respuesta.streaming:
+                    for _ in respuesta.streaming_content:
+                        pass
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            consultas = max(consultas, len(capturadas))
+        return {
+            'url': url,
+            'status': respuesta.status_code,
+            'p50_ms': round(percentil(latencias, 50), 2),
+            'p90_ms': round(percentil(latencias, 90), 2),
+            'p99_ms': round(percentil(latencias, 99), 2),
+            'consultas': consultas,
+        }
+
+    def volumen(self):
+        return {modelo.__name__: modelo.objects.count() for modelo in (Obra, Bodega, Material, Herramienta, Prestamo)}
+
+    def comparar(self, base, corrida, options):
+        if base.get('datos') != corrida['datos']:
+            self.stderr.write(self.style.WARNING(
+                f"El volumen de datos cambió respecto de la línea base: {base.get('datos')} -> {corrida['datos']}",
+            ))
+        regresiones = []
+        for nombre, actual in corrida['urls'].items():
+            anterior = base['urls'].get(nombre)
+            if anterior is None:
+                self.stdout.write(f'{nombre}: nueva, sin línea base')
+                continue
+            regresiones += self.regresiones(nombre, anterior, actual, options)
+            if 'frio' in actual and 'frio' in anterior:
+                regresiones += self.regresiones(f'{nombre} (frío)', anterior['frio'], actual['frio'], options)
+            elif 'frio' in actual:
+                self.stdout.write(f'{nombre}: la línea base no tiene medición en frío')
+        for nombre in base['urls'].keys() - corrida['urls'].keys():
+            if not options['filtro']:
+                self.stdout.write(f'{nombre}: está en la línea base pero no se midió')
+
+        if regresiones:
+            for regresion in regresiones:
+                self.stderr.write(self.style.ERROR(regresion))
+            raise CommandError(f'{len(regresiones)} regresiones respecto de la línea base')
+        self.stdout.write(self.style.SUCCESS('Sin regresiones respecto de la línea base'))
+
+    def regresiones(self, nombre, anterior, actual, options):
+        regresiones = []
+        if actual['status'] != anterior['status']:
+            regresiones.append(f"{nombre}: status {anterior['status']} -> {actual['status']}")
+        if actual['consultas'] > anterior['consultas']:
+            regresiones.append(f"{nombre}: consultas {anterior['consultas']} -> {actual['consultas']}")
+        aumento = actual['p50_ms'] - anterior['p50_ms']
+        if aumento > options['min_ms'] and actual['p50_ms'] > anterior['p50_ms'] * (1 + options['tolerancia']):
+            regresiones.append(f"{nombre}: p50 {anterior['p50_ms']}ms -> {actual['p50_ms']}ms")
+        return regresiones
@@ -0,0 +1,45 @@
+"""
+Exporta el libro de movimientos o los préstamos en CSV/JSONL, en streaming.
+
+Uso:
+    python manage.py exportar movimientos --desde 2025-01-01 --hasta 2025-03-31 > movimientos.csv
+    python manage.py exportar prestamos --formato jsonl --bodega 3 --salida prestamos.jsonl
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admApp import exports
+
+
+EXPORTABLES = {
+    'movimientos': (exports.movimientos_para_exportar, exports.COLUMNAS_MOVIMIENTOS),
+    'prestamos': (exports.prestamos_para_exportar, exports.COLUMNAS_PRESTAMOS),
+}
+
+
+class Command(BaseCommand):
+    help = 'Exporta movimientos de inventario o préstamos a CSV/JSONL sin cargarlos en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(EXPORTABLES))
+        parser.add_argument('--formato', choices=sorted(exports.FORMATOS), default='csv')
+        parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (incluida)')
+        parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD (incluida)')
+        parser.add_argument('--bodega', help='Id de bodega')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto, stdout)')
+
+    def handle(self, *args, **options):
+        queryset_func, columnas = EXPORTABLES[options['tipo']]
+        try:
+            queryset = queryset_func(options['desde'], options['hasta'], options['bodega'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        salida = open(options['salida'], 'w', encoding='utf-8', newline='') if options['salida'] else sys.stdout
+        try:
+            for linea in exports.lineas(queryset, columnas, options['formato']):
+                salida.write(linea)
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
@@ -0,0 +1,21 @@
+"""
+Marca los préstamos atrasados (Prestamo.atrasado) con consultas por lote.
+
+Pensado para correr seguido desde cron; si no hay cambios no escribe nada:
+    */5 * * * * python manage.py marcar_prestamos_atrasados
+"""
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from admApp.prestamos import marcar_atrasados
+
+
+class Command(BaseCommand):
+    help = 'Marca como atrasados los préstamos activos vencidos y desmarca los que ya no lo están'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=parse_date, help='Fecha de corte AAAA-MM-DD (por defecto, hoy)')
+
+    def handle(self, *args, **options):
+        marcados, desmarcados = marcar_atrasados(options['fecha'])
+        self.stdout.write(f'Préstamos marcados como atrasados: {marcados}; desmarcados: {desmarcados}')
@@ -0,0 +1,76 @@
+"""
+Lista de reposición: fecha proyectada de quiebre de stock por bodega y
+material, según el ritmo reciente de salidas (admApp/reposicion.py).
+
+Uso:
+    python manage.py planificar_reposicion
+    python manage.py planificar_reposicion --bodega 3 --limite 0 --csv reposicion.csv
+    python manage.py planificar_reposicion --ventana-corta 14 --dias-entrega 10 --con-transferencias
+
+Requiere NumPy (pip install numpy). Pensado para correr cada mañana por cron
+y enviar el CSV a compras:
+    0 6 * * * cd /ruta/proyecto && python manage.py planificar_reposicion --limite 0 --csv /tmp/reposicion.csv
+"""
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admApp.reposicion import PlanificacionNoDisponible, planificar
+
+
+COLUMNAS = ['bodega_id', 'bodega', 'material_id', 'material', 'unidad', 'cantidad', 'stock_minimo',
+            'tasa_diaria', 'dias_para_quiebre', 'fecha_quiebre', 'cantidad_sugerida']
+
+
+class Command(BaseCommand):
+    help = 'Proyecta el quiebre de stock de cada material por bodega y lista qué reponer primero'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bodega', type=int, help='Solo esta bodega (id)')
+        parser.add_argument('--limite', type=int, default=50, help='Filas a mostrar; 0 = todas (default: 50)')
+        parser.add_argument('--ventana-corta', type=int, help='Días del promedio corto (default: settings)')
+        parser.add_argument('--ventana-larga', type=int, help='Días del promedio largo (default: settings)')
+        parser.add_argument('--dias-entrega', type=int, help='Días que tarda en llegar un pedido (default: settings)')
+        parser.add_argument('--dias-cobertura', type=int, help='Días de consumo que debe cubrir el pedido (default: settings)')
+        parser.add_argument('--con-transferencias', action='store_true',
+                            help='Cuenta también las transferencias salientes como consumo')
+        parser.add_argument('--csv', help='Escribe la lista en este archivo CSV en vez de mostrarla')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            plan = planificar(
+                bodega=options['bodega'],
+                limite=options['limite'] or None,
+                con_transferencias=options['con_transferencias'],
+                VENTANA_CORTA=options['ventana_corta'],
+                VENTANA_LARGA=options['ventana_larga'],
+                DIAS_ENTREGA=options['dias_entrega'],
+                DIAS_COBERTURA=options['dias_cobertura'],
+            )
+        except PlanificacionNoDisponible as e:
+            raise CommandError(str(e))
+        duracion = time.perf_counter() - inicio
+
+        if options['csv']:
+            with open(options['csv'], 'w', encoding='utf-8', newline='') as archivo:
+                escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS)
+                escritor.writeheader()
+                escritor.writerows(plan['filas'])
+        else:
+            self.stdout.write(
+                f"{'bodega':<30} {'material':<30} {'stock':>8} {'mín':>6} {'tasa/día':>9} "
+                f"{'días':>6} {'quiebre':>10} {'pedir':>8}"
+            )
+            for fila in plan['filas']:
+                dias = '-' if fila['dias_para_quiebre'] is None else f"{fila['dias_para_quiebre']:.1f}"
+                quiebre = fila['fecha_quiebre'].isoformat() if fila['fecha_quiebre'] else '-'
+                self.stdout.write(
+                    f"{fila['bodega'][:30]:<30} {fila['material'][:30]:<30} {fila['cantidad']:>8} "
+                    f"{fila['stock_minimo']:>6} {fila['tasa_diaria']:>9.2f} {dias:>6} {quiebre:>10} "
+                    f"{fila['cantidad_sugerida']:>8}"
+                )
+        self.stdout.write(
+            f"{plan['pares']} pares bodega/material, {plan['a_reponer']} a reponer ({duracion:.2f}s)"
+        )
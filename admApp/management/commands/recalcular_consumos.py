@@ -0,0 +1,34 @@
+"""
+Reconstruye o verifica los acumulados de consumo por obra (admApp/consumos.py).
+
+    python manage.py recalcular_consumos                      # todo el historial
+    python manage.py recalcular_consumos --desde 2025-01-01   # meses desde esa fecha
+    python manage.py recalcular_consumos --verificar          # solo compara, no escribe
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from admApp.consumos import recalcular_consumos, verificar_consumos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los consumos diarios/mensuales por obra desde los movimientos, o verifica que coincidan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=parse_date, help='AAAA-MM-DD (se amplía al inicio del mes)')
+        parser.add_argument('--hasta', type=parse_date, help='AAAA-MM-DD (se amplía al fin del mes)')
+        parser.add_argument('--verificar', action='store_true', help='Solo compara; falla si hay diferencias')
+
+    def handle(self, *args, **options):
+        desde, hasta = options['desde'], options['hasta']
+        if options['verificar']:
+            diferencias = verificar_consumos(desde, hasta)
+            for tabla, clave, esperado, guardado in diferencias[:20]:
+                self.stdout.write(f'{tabla:8} obra={clave[0]} material={clave[1]} fecha={clave[2]} '
+                                  f'esperado={esperado} guardado={guardado}')
+            if diferencias:
+                raise CommandError(f'{len(diferencias)} acumulados no coinciden con los movimientos')
+            self.stdout.write(self.style.SUCCESS('Los acumulados coinciden con los movimientos'))
+            return
+        diarios, mensuales = recalcular_consumos(desde, hasta)
+        self.stdout.write(f'Filas escritas: {diarios} diarias, {mensuales} mensuales')
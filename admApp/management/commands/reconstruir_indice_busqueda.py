@@ -0,0 +1,17 @@
+"""
+Reconstruye el índice de la búsqueda global (admApp/busqueda.py).
+
+Las señales lo mantienen al día; este comando sirve para la carga inicial
+después de migrar o si se cargaron datos con bulk_create / update().
+"""
+from django.core.management.base import BaseCommand
+
+from admApp.busqueda import reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Vuelve a generar IndiceBusqueda desde herramientas, materiales, obras y bodegas'
+
+    def handle(self, *args, **options):
+        total = reconstruir_indice()
+        self.stdout.write(f'Filas indexadas: {total}')
@@ -0,0 +1,18 @@
+"""
+Reconstruye la ubicación actual de cada herramienta (admApp/ubicaciones.py).
+
+Los préstamos, devoluciones y señales la mantienen al día; este comando sirve
+para la carga inicial después de migrar o si se cargaron herramientas,
+inventario o préstamos con bulk_create / update().
+"""
+from django.core.management.base import BaseCommand
+
+from admApp.ubicaciones import reconstruir_ubicaciones
+
+
+class Command(BaseCommand):
+    help = 'Vuelve a generar UbicacionHerramienta desde InventarioHerramienta y los préstamos activos'
+
+    def handle(self, *args, **options):
+        total = reconstruir_ubicaciones()
+        self.stdout.write(f'Herramientas ubicadas: {total}')
@@ -0,0 +1,68 @@
+"""
+Utilización y préstamos de herramientas por herramienta, tipo u obra
+(admApp/uso_herramientas.py), ordenado de la más ociosa a la más usada.
+
+Uso:
+    python manage.py reporte_uso_herramientas
+    python manage.py reporte_uso_herramientas --nivel herramienta --limite 0 --csv uso.csv
+    python manage.py reporte_uso_herramientas --nivel obra --dias 365
+
+Calcula el nivel completo sin pasar por el caché. Pensado para mandar a
+compras una vez por semana:
+    0 7 * * 1 cd /ruta/proyecto && python manage.py reporte_uso_herramientas --nivel herramienta --limite 0 --csv /tmp/uso_herramientas.csv
+"""
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from admApp.uso_herramientas import NIVELES, configuracion, estadisticas
+
+
+COLUMNAS = ['clave', 'herramientas', 'prestamos', 'cerrados', 'vencidos', 'dias_prestado', 'en_uso_promedio',
+            'utilizacion', 'duracion_media', 'duracion_p95', 'tasa_atraso', 'tasa_dano', 'tasa_extravio']
+
+
+def _texto(valor, sufijo=''):
+    return '-' if valor is None else f'{valor}{sufijo}'
+
+
+class Command(BaseCommand):
+    help = 'Utilización, duración de préstamos (promedio y p95) y tasas de atraso/daño por herramienta, tipo u obra'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nivel', choices=list(NIVELES), default='tipo', help='Agrupación (default: tipo)')
+        parser.add_argument('--dias', type=int, help='Días de préstamos a considerar (default: settings)')
+        parser.add_argument('--limite', type=int, default=50, help='Filas a mostrar; 0 = todas (default: 50)')
+        parser.add_argument('--csv', help='Escribe las filas en este archivo CSV en vez de mostrarlas')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        dias = options['dias'] or configuracion()['VENTANA']
+        filas = list(estadisticas(options['nivel'], dias=dias).values())
+        duracion = time.perf_counter() - inicio
+        # por obra no hay utilización: ordena por herramientas en uso
+        orden = 'en_uso_promedio' if options['nivel'] == 'obra' else 'utilizacion'
+        filas.sort(key=lambda fila: (fila[orden] is None, fila[orden] or 0))
+        if options['limite']:
+            filas = filas[:options['limite']]
+
+        if options['csv']:
+            with open(options['csv'], 'w', encoding='utf-8', newline='') as archivo:
+                escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS)
+                escritor.writeheader()
+                escritor.writerows(filas)
+        else:
+            self.stdout.write(
+                f"{options['nivel']:<30} {'uso':>8} {'prést.':>7} {'venc.':>6} {'prom.':>7} {'p95':>7} "
+                f"{'atraso':>7} {'daño':>7} {'extrav.':>7}"
+            )
+            for fila in filas:
+                uso = fila['en_uso_promedio'] if orden == 'en_uso_promedio' else _texto(fila['utilizacion'], '%')
+                self.stdout.write(
+                    f"{str(fila['clave'])[:30]:<30} {uso:>8} {fila['prestamos']:>7} {fila['vencidos']:>6} "
+                    f"{_texto(fila['duracion_media']):>7} {_texto(fila['duracion_p95']):>7} "
+                    f"{_texto(fila['tasa_atraso'], '%'):>7} {_texto(fila['tasa_dano'], '%'):>7} "
+                    f"{_texto(fila['tasa_extravio'], '%'):>7}"
+                )
+        self.stdout.write(f"{len(filas)} filas, últimos {dias} días ({duracion:.2f}s)")
@@ -0,0 +1,396 @@
+"""
+Siembra datos sintéticos a escala para pruebas de carga y benchmarks.
+
+Uso (sobre una base dedicada y vacía, ej: después de `manage.py flush`):
+    python manage.py sembrar_datos                    # escala 1
+    python manage.py sembrar_datos --escala 0.1 --semilla 7
+
+Con --escala 1 crea miles de obras, cientos de bodegas, 100k herramientas,
+200k préstamos y 2M de movimientos. Con la misma semilla y escala los datos
+son los mismos, así los resultados de benchmark_urls son comparables entre
+corridas. Todo se inserta con bulk_create por lotes, con ids asignados por
+el comando (MySQL no devuelve los de un bulk_create); los movimientos se
+generan en orden cronológico y el stock de InventarioMaterial es el saldo que
+dejan, así que el libro y el stock cuadran. Al final se reconstruyen los
+datos derivados (consumos, índice de búsqueda, snapshot, atrasos) y se
+invalidan los cachés.
+
+Los usuarios sembrados tienen el prefijo `sem_` y la contraseña --password.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from admApp import metrics, reportes, versiones
+from admApp.busqueda import reconstruir_indice
+from admApp.consumos import recalcular_consumos
+from admApp.models import (
+    Usuario, Obra, Obrero, Actividad, Herramienta, Material, Bodega, InventarioMaterial, InventarioHerramienta,
+    MovimientoInventario, Prestamo,
+)
+from admApp.prestamos import marcar_atrasados
+from admApp.snapshots import tomar_snapshot
+from admApp.ubicaciones import reconstruir_ubicaciones
+
+
+# Cantidades con --escala 1
+BASE = {
+    'administradores': 1,
+    'supervisores': 50,
+    'bodegueros': 200,
+    'obreros': 2000,
+    'obras': 5000,
+    'actividades': 20000,
+    'bodegas': 500,
+    'materiales': 3000,
+    'herramientas': 100000,
+    'prestamos': 200000,
+    'movimientos': 2000000,
+}
+
+# Materiales distintos en cada bodega (densidad fija: no depende de la escala)
+MATERIALES_POR_BODEGA = 200
+
+# Días de historia que cubren movimientos y préstamos
+DIAS_HISTORIA = 730
+
+PREFIJO_USUARIO = 'sem_'
+
+CIUDADES = [
+    ('Santiago', 'Metropolitana'), ('Valparaíso', 'Valparaíso'), ('Concepción', 'Biobío'),
+    ('Antofagasta', 'Antofagasta'), ('Temuco', 'Araucanía'), ('Rancagua', "O'Higgins"),
+    ('Puerto Montt', 'Los Lagos'), ('La Serena', 'Coquimbo'), ('Talca', 'Maule'), ('Iquique', 'Tarapacá'),
+]
+HERRAMIENTAS = [
+    ('Taladro', 'Eléctrica'), ('Esmeril angular', 'Eléctrica'), ('Sierra circular', 'Eléctrica'),
+    ('Rotomartillo', 'Eléctrica'), ('Atornillador', 'Eléctrica'), ('Betonera', 'Maquinaria'),
+    ('Vibrador de hormigón', 'Maquinaria'), ('Generador', 'Maquinaria'), ('Nivel láser', 'Medición'),
+    ('Huincha de medir', 'Medición'), ('Andamio', 'Altura'), ('Escalera telescópica', 'Altura'),
+    ('Carretilla', 'Manual'), ('Martillo', 'Manual'), ('Llave de tubo', 'Manual'),
+]
+MARCAS = ['DeWalt', 'Makita', 'Bosch', 'Stanley', 'Milwaukee', 'Hilti', 'Black+Decker', 'Truper']
+MATERIALES = [
+    ('Cemento', 'SACO'), ('Arena', 'M3'), ('Gravilla', 'M3'), ('Fierro estriado', 'UND'), ('Clavos', 'KG'),
+    ('Tablero OSB', 'UND'), ('Pino dimensionado', 'M'), ('Cerámica', 'M2'), ('Pintura látex', 'L'),
+    ('Cañería PVC', 'M'), ('Cable eléctrico', 'M'), ('Yeso cartón', 'UND'), ('Aislante lana de vidrio', 'M2'),
+    ('Adhesivo cerámico', 'SACO'), ('Malla acma', 'UND'),
+]
+PROVEEDORES = ['Sodimac', 'Easy', 'Construmart', 'Imperial', 'MTS', 'Chilemat']
+ESPECIALIDADES = ['Albañil', 'Carpintero', 'Electricista', 'Gasfíter', 'Pintor', 'Soldador', 'Jornal']
+
+
+def escalar(nombre, escala):
+    return max(1, int(BASE[nombre] * escala))
+
+
+@contextmanager
+def fechas_explicitas(*campos):
+    """Desactiva auto_now/auto_now_add para poder sembrar fechas históricas."""
+    originales = [(campo, campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo, _, _ in originales:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Siembra datos sintéticos a escala configurable (bulk_create) para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=float, default=1.0, help='Multiplica las cantidades base (default: 1)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla aleatoria (default: 42)')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por bulk_create (default: 5000)')
+        parser.add_argument('--password', default='sembrado123', help='Contraseña de los usuarios sembrados')
+
+    def handle(self, *args, **options):
+        if Obra.objects.exists() or Usuario.objects.filter(username__startswith=PREFIJO_USUARIO).exists():
+            raise CommandError('La base ya tiene datos: siembre sobre una base vacía (ej: manage.py flush)')
+        self.escala = options['escala']
+        self.lote = options['lote']
+        self.modelos_con_ids = set()
+        self.azar = random.Random(options['semilla'])
+        self.ahora = timezone.now()
+        self.hoy = timezone.localdate()
+
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            self._paso('usuarios', self.sembrar_usuarios, options['password'])
+            self._paso('obras', self.sembrar_obras)
+            self._paso('bodegas', self.sembrar_bodegas)
+            self._paso('materiales', self.sembrar_materiales)
+            self._paso('herramientas', self.sembrar_herramientas)
+            self._paso('movimientos e inventario', self.sembrar_movimientos)
+            self._paso('préstamos', self.sembrar_prestamos)
+            self._reiniciar_secuencias()
+        self._paso('datos derivados', self.derivados)
+        self.stdout.write(self.style.SUCCESS(f'Listo en {time.perf_counter() - inicio:.1f}s'))
+
+    def _paso(self, nombre, funcion, *args):
+        inicio = time.perf_counter()
+        detalle = funcion(*args)
+        self.stdout.write(f'{nombre:<26} {detalle or "":<40} {time.perf_counter() - inicio:6.1f}s')
+
+    def _crear(self, modelo, filas):
+        """
+        bulk_create por lotes de un iterable; devuelve las instancias con pk.
+        Los ids se asignan antes de insertar: MySQL no los devuelve en un
+        bulk_create y los pasos siguientes usan las instancias como FK.
+        """
+        siguiente = (modelo.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0) + 1
+        self.modelos_con_ids.add(modelo)
+        creadas, lote = [], []
+        for fila in filas:
+            fila.pk = siguiente
+            siguiente += 1
+            lote.append(fila)
+            if len(lote) >= self.lote:
+                creadas.extend(modelo.objects.bulk_create(lote))
+                lote = []
+        creadas.extend(modelo.objects.bulk_create(lote))
+        return creadas
+
+    def _reiniciar_secuencias(self):
+        """Con ids explícitos PostgreSQL no avanza las secuencias (MySQL y SQLite sí)."""
+        sentencias = connection.ops.sequence_reset_sql(no_style(), list(self.modelos_con_ids))
+        with connection.cursor() as cursor:
+            for sql in sentencias:
+                cursor.execute(sql)
+
+    def _fecha_pasada(self, dias=DIAS_HISTORIA):
+        return self.ahora - timedelta(seconds=self.azar.randrange(dias * 86400))
+
+    # ============================================
+    # PASOS
+    # ============================================
+
+    def sembrar_usuarios(self, password):
+        clave = make_password(password)
+        cantidades = [
+            (Usuario.TipoRol.ADMINISTRADOR, escalar('administradores', self.escala)),
+            (Usuario.TipoRol.SUPERVISOR, escalar('supervisores', self.escala)),
+            (Usuario.TipoRol.BODEGUERO, escalar('bodegueros', self.escala)),
+            (Usuario.TipoRol.OBRERO, escalar('obreros', self.escala)),
+        ]
+        usuarios = self._crear(Usuario, (
+            Usuario(
+                username=f'{PREFIJO_USUARIO}{rol.lower()}{i}', password=clave, rut=f'S{rol[0]}{i}',
+                first_name=self.azar.choice(['Juan', 'María', 'Pedro', 'Camila', 'José', 'Fernanda', 'Luis']),
+                last_name=self.azar.choice(['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras']),
+                rol=rol,
+            )
+            for rol, cantidad in cantidades for i in range(cantidad)
+        ))
+        self.supervisores = [u for u in usuarios if u.rol == Usuario.TipoRol.SUPERVISOR]
+        self.bodegueros = [u for u in usuarios if u.rol == Usuario.TipoRol.BODEGUERO]
+        self.obreros = self._crear(Obrero, (
+            Obrero(usuario=u, especialidad=self.azar.choice(ESPECIALIDADES))
+            for u in usuarios if u.rol == Usuario.TipoRol.OBRERO
+        ))
+        return f'{len(usuarios)} usuarios, {len(self.obreros)} obreros'
+
+    def sembrar_obras(self):
+        estados = [Obra.EstadoObra.EN_CURSO] * 5 + [Obra.EstadoObra.PLANIFICACION, Obra.EstadoObra.FINALIZADA]
+        self.obras = []
+        for i in range(escalar('obras', self.escala)):
+            ciudad, region = self.azar.choice(CIUDADES)
+            inicio = self.hoy - timedelta(days=self.azar.randrange(DIAS_HISTORIA))
+            self.obras.append(Obra(
+                nombre=f'Obra {ciudad} {i + 1}', direccion=f'Calle {self.azar.randrange(1, 900)} #{i + 1}',
+                ciudad=ciudad, region=region, supervisor=self.azar.choice(self.supervisores),
+                fecha_inicio=inicio, fecha_fin_estimada=inicio + timedelta(days=self.azar.randrange(90, 900)),
+                estado=self.azar.choice(estados),
+                presupuesto_estimado=Decimal(self.azar.randrange(5_000, 500_000)) * 1000,
+            ))
+        self.obras = self._crear(Obra, self.obras)
+        actividades = self._crear(Actividad, (
+            Actividad(
+                obra=self.azar.choice(self.obras), tipo_actividad=self.azar.choice(ESPECIALIDADES),
+                nombre=f'Actividad {i + 1}', horas_estimadas=self.azar.randrange(1, 200),
+                estado=self.azar.choice(Actividad.EstadoActividad.values),
+            )
+            for i in range(escalar('actividades', self.escala))
+        ))
+        return f'{len(self.obras)} obras, {len(actividades)} actividades'
+
+    def sembrar_bodegas(self):
+        bodegas = []
+        for i in range(escalar('bodegas', self.escala)):
+            ciudad, region = self.azar.choice(CIUDADES)
+            central = i % 10 == 0
+            bodegas.append(Bodega(
+                nombre=f'Bodega {"Central" if central else "Obra"} {ciudad} {i + 1}',
+                tipo=Bodega.TipoBodega.CENTRAL if central else Bodega.TipoBodega.OBRA,
+                direccion=f'Av. {self.azar.randrange(1, 900)} #{i + 1}', ciudad=ciudad, region=region,
+                obra=None if central else self.azar.choice(self.obras),
+                encargado=self.azar.choice(self.bodegueros),
+                capacidad_m3=Decimal(self.azar.randrange(50, 5000)),
+            ))
+        self.bodegas = self._crear(Bodega, bodegas)
+        return f'{len(self.bodegas)} bodegas'
+
+    def sembrar_materiales(self):
+        self.materiales = self._crear(Material, (
+            Material(
+                nombre=f'{nombre} {i + 1}', unidad_medida=unidad,
+                precio_unitario=Decimal(self.azar.randrange(100, 500_000)) / 100,
+                stock_minimo=self.azar.choice([0, 5, 10, 20, 50, 100]), proveedor=self.azar.choice(PROVEEDORES),
+            )
+            for i, (nombre, unidad) in enumerate(
+                self.azar.choice(MATERIALES) for _ in range(escalar('materiales', self.escala))
+            )
+        ))
+        return f'{len(self.materiales)} materiales'
+
+    def sembrar_herramientas(self):
+        cantidad = escalar('herramientas', self.escala)
+        # Herramientas que terminan con un préstamo activo (ver sembrar_prestamos)
+        self.en_uso = set(self.azar.sample(range(cantidad), min(cantidad, escalar('prestamos', self.escala)) // 10))
+        herramientas = []
+        for i in range(cantidad):
+            nombre, tipo = self.azar.choice(HERRAMIENTAS)
+            if i in self.en_uso:
+                estado = Herramienta.EstadoHerramienta.EN_USO
+            else:
+                estado = self.azar.choices(
+                    [Herramienta.EstadoHerramienta.DISPONIBLE, Herramienta.EstadoHerramienta.MANTENIMIENTO,
+                     Herramienta.EstadoHerramienta.DAÑADA, Herramienta.EstadoHerramienta.BAJA],
+                    weights=[90, 4, 4, 2],
+                )[0]
+            herramientas.append(Herramienta(
+                nombre=nombre, marca=self.azar.choice(MARCAS), modelo=f'M{self.azar.randrange(100, 999)}',
+                numero_serie=f'SEM-{i + 1:07d}', tipo=tipo, estado=estado,
+                fecha_adquisicion=self.hoy - timedelta(days=self.azar.randrange(2000)),
+                valor_compra=Decimal(self.azar.randrange(5_000, 2_000_000)),
+                activo=estado != Herramienta.EstadoHerramienta.BAJA,
+            ))
+        self.herramientas = self._crear(Herramienta, herramientas)
+        ubicadas = self._crear(InventarioHerramienta, (
+            InventarioHerramienta(bodega=self.azar.choice(self.bodegas), herramienta=h) for h in self.herramientas
+        ))
+        return f'{len(self.herramientas)} herramientas, {len(ubicadas)} ubicadas'
+
+    def sembrar_movimientos(self):
+        """
+        Movimientos en orden cronológico sobre pares (bodega, material). El
+        stock se sigue en memoria: una salida o transferencia sin saldo se
+        convierte en entrada, así ninguna fila queda negativa.
+        """
+        Tipo = MovimientoInventario.TipoMovimiento
+        por_bodega = min(MATERIALES_POR_BODEGA, len(self.materiales))
+        pares = [
+            (bodega.pk, material.pk)
+            for bodega in self.bodegas for material in self.azar.sample(self.materiales, por_bodega)
+        ]
+        materiales_de_bodega = {}
+        for bodega_id, material_id in pares:
+            materiales_de_bodega.setdefault(material_id, []).append(bodega_id)
+        stock = dict.fromkeys(pares, 0)
+        obra_ids = [obra.pk for obra in self.obras]
+        bodegueros = [u.pk for u in self.bodegueros]
+
+        total = escalar('movimientos', self.escala)
+        paso = timedelta(days=DIAS_HISTORIA) / total
+        desde = self.ahora - timedelta(days=DIAS_HISTORIA)
+        tipos = [Tipo.ENTRADA, Tipo.SALIDA, Tipo.TRANSFERENCIA, Tipo.DEVOLUCION, Tipo.AJUSTE]
+
+        def movimientos():
+            for i in range(total):
+                bodega_id, material_id = par = self.azar.choice(pares)
+                tipo = self.azar.choices(tipos, weights=[30, 45, 10, 10, 5])[0]
+                cantidad = self.azar.randrange(1, 60)
+                mov = MovimientoInventario(
+                    material_id=material_id, tipo_movimiento=tipo, cantidad=cantidad,
+                    usuario_responsable_id=self.azar.choice(bodegueros),
+                    fecha_movimiento=desde + paso * i,
+                )
+                if tipo in (Tipo.SALIDA, Tipo.TRANSFERENCIA, Tipo.AJUSTE) and stock[par] < cantidad:
+                    tipo = mov.tipo_movimiento = Tipo.ENTRADA
+                if tipo == Tipo.TRANSFERENCIA:
+                    destinos = materiales_de_bodega[material_id]
+                    destino = self.azar.choice(destinos)
+                    if destino == bodega_id:
+                        tipo = mov.tipo_movimiento = Tipo.SALIDA
+                    else:
+                        mov.bodega_origen_id, mov.bodega_destino_id = bodega_id, destino
+                        stock[par] -= cantidad
+                        stock[(destino, material_id)] += cantidad
+                if tipo in (Tipo.SALIDA, Tipo.AJUSTE):
+                    mov.bodega_origen_id = bodega_id
+                    stock[par] -= cantidad
+                elif tipo in (Tipo.ENTRADA, Tipo.DEVOLUCION):
+                    mov.bodega_destino_id = bodega_id
+                    stock[par] += cantidad
+                if tipo in (Tipo.SALIDA, Tipo.DEVOLUCION):
+                    mov.obra_id = self.azar.choice(obra_ids)
+                yield mov
+
+        with fechas_explicitas(MovimientoInventario._meta.get_field('fecha_movimiento')):
+            creados = 0
+            lote = []
+            for mov in movimientos():
+                lote.append(mov)
+                if len(lote) >= self.lote:
+                    MovimientoInventario.objects.bulk_create(lote)
+                    creados += len(lote)
+                    lote = []
+            MovimientoInventario.objects.bulk_create(lote)
+            creados += len(lote)
+
+        with fechas_explicitas(InventarioMaterial._meta.get_field('fecha_ultima_actualizacion')):
+            filas = self._crear(InventarioMaterial, (
+                InventarioMaterial(bodega_id=b, material_id=m, cantidad_actual=cantidad, fecha_ultima_actualizacion=self.ahora)
+                for (b, m), cantidad in stock.items()
+            ))
+        return f'{creados} movimientos, {len(filas)} filas de stock'
+
+    def sembrar_prestamos(self):
+        """Préstamos cerrados repartidos en la historia y uno activo por herramienta EN_USO."""
+        Estado = Prestamo.EstadoPrestamo
+        activas = [h for i, h in enumerate(self.herramientas) if i in self.en_uso]
+        cerrados = max(0, escalar('prestamos', self.escala) - len(activas))
+
+        def prestamo(herramienta, activo):
+            fecha = self._fecha_pasada(60 if activo else DIAS_HISTORIA)
+            estimada = fecha.date() + timedelta(days=self.azar.randrange(1, 45))
+            datos = {}
+            if not activo:
+                real = fecha + timedelta(days=self.azar.randrange(0, 50))
+                datos = {
+                    'estado': self.azar.choices([Estado.DEVUELTO, Estado.DAÑADO, Estado.EXTRAVIADO], weights=[94, 4, 2])[0],
+                    'fecha_devolucion_real': min(real, self.ahora),
+                }
+            return Prestamo(
+                herramienta=herramienta, obrero=self.azar.choice(self.obreros), bodega=self.azar.choice(self.bodegas),
+                obra=self.azar.choice(self.obras), fecha_prestamo=fecha, fecha_devolucion_estimada=estimada,
+                usuario_registro=self.azar.choice(self.bodegueros), **datos,
+            )
+
+        with fechas_explicitas(Prestamo._meta.get_field('fecha_prestamo')):
+            creados = self._crear(Prestamo, (
+                prestamo(self.azar.choice(self.herramientas), activo=False) for _ in range(cerrados)
+            ))
+            creados += self._crear(Prestamo, (prestamo(h, activo=True) for h in activas))
+        return f'{len(creados)} préstamos ({len(activas)} activos)'
+
+    def derivados(self):
+        recalcular_consumos()
+        indexados = reconstruir_indice()
+        reconstruir_ubicaciones()
+        tomar_snapshot(completo=True)
+        marcar_atrasados()
+        metrics.invalidar(*metrics.METRICAS)
+        reportes.invalidar_todo()
+        versiones.incrementar(Usuario, Obra, Obrero, Herramienta, Material, Bodega, InventarioMaterial, Prestamo)
+        return f'consumos, {indexados} en índice, ubicaciones, snapshot'
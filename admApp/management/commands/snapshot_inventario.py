@@ -0,0 +1,21 @@
+"""
+Guarda un snapshot del inventario de materiales (ver admApp/snapshots.py).
+
+Pensado para correr desde cron, por ejemplo cada noche:
+    0 2 * * * python manage.py snapshot_inventario
+Por defecto solo copia las filas que cambiaron desde el snapshot anterior.
+"""
+from django.core.management.base import BaseCommand
+
+from admApp.snapshots import tomar_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Copia las cantidades actuales de inventario a SnapshotInventario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Copia todas las filas, no solo las modificadas')
+
+    def handle(self, *args, **options):
+        copiadas = tomar_snapshot(completo=options['completo'])
+        self.stdout.write(f'Filas copiadas al snapshot: {copiadas}')
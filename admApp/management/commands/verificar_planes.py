@@ -0,0 +1,171 @@
+"""
+Revisa con EXPLAIN los planes de las consultas de listados y reportes.
+
+Uso:
+    python manage.py verificar_planes
+    python manage.py verificar_planes --analyze --min-filas 1000 -v 2
+
+Termina con error si alguna consulta recorre completa una tabla con al menos
+--min-filas filas. Conviene correrlo sobre una base sembrada con volumen
+realista: con tablas casi vacías el planificador suele preferir el scan.
+"""
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from admApp.models import (
+    Herramienta, Material, Obra, Actividad, Usuario, Obrero, Bodega, InventarioMaterial,
+    MovimientoInventario, Prestamo, SnapshotInventario, UbicacionHerramienta,
+)
+from admApp.consumos import consumo_mensual
+from admApp.pagination import PaginaCursor
+from admApp.reportes import reporte_obras
+from admApp.reposicion import salidas_por_dia
+from admApp.uso_herramientas import prestamos_en_ventana
+
+
+def pagina_intermedia(queryset, tamano=50):
+    """Consulta de una página que no es la primera, como la pide un listado al avanzar."""
+    primera = PaginaCursor(queryset, None, 1)
+    cursor = primera.next_cursor
+    return PaginaCursor(queryset, cursor, tamano).consulta()
+
+
+def primer_pk(model):
+    return model.objects.order_by().values_list('pk', flat=True).first() or 0
+
+
+def consultas_criticas():
+    """
+    (nombre, queryset, tablas_permitidas) de cada consulta caliente de
+    listados y reportes. tablas_permitidas son tablas que el plan puede
+    recorrer completas a propósito.
+    """
+    hoy = timezone.localdate()
+    bodega_id = primer_pk(Bodega)
+    obra_id = primer_pk(Obra)
+    material_id = primer_pk(Material)
+    return [
+        ('herramientas_list', pagina_intermedia(Herramienta.objects.all())),
+        ('materiales_list', pagina_intermedia(Material.objects.all())),
+        ('obras_list', pagina_intermedia(Obra.objects.all())),
+        ('usuarios_list', pagina_intermedia(Usuario.objects.all())),
+        ('obreros_list', pagina_intermedia(Obrero.objects.select_related('usuario'))),
+        ('prestamos_list', pagina_intermedia(
+            Prestamo.objects.select_related('herramienta', 'obrero__usuario', 'obra'))),
+        ('inventario_list', pagina_intermedia(
+            InventarioMaterial.objects.select_related('bodega', 'material').con_alerta())),
+        # La comparación contra stock_minimo recorre el catálogo de materiales
+        # y busca en inventario por (material, cantidad_actual)
+        ('inventario_bajo_minimo', InventarioMaterial.objects.bajo_minimo().values('pk'), {'material'}),
+        ('bodega_detail', InventarioMaterial.objects.filter(bodega_id=bodega_id).select_related('material')),
+        ('actividades_obra', Actividad.objects.filter(obra_id=obra_id).order_by('fecha_inicio')),
+        ('movimientos_material', MovimientoInventario.objects.filter(material_id=material_id)
+            .order_by('-fecha_movimiento')[:50]),
+        ('herramientas_activas', Herramienta.objects.filter(activo=True).values('pk')),
+        ('herramientas_disponibles', Herramienta.objects.filter(
+            activo=True, estado=Herramienta.EstadoHerramienta.DISPONIBLE).values('pk')),
+        ('materiales_activos', Material.objects.filter(activo=True).values('pk')),
+        ('prestamos_activos', Prestamo.objects.filter(estado=Prestamo.EstadoPrestamo.ACTIVO).values('pk')),
+        ('prestamos_atrasados', Prestamo.objects.atrasados().values('pk')),
+        ('prestamos_atrasados_list', pagina_intermedia(
+            Prestamo.objects.atrasados().select_related('herramienta', 'obrero__usuario', 'obra')
+            .order_by('fecha_devolucion_estimada'))),
+        ('marcar_atrasados', Prestamo.objects.vencidos(hoy).filter(atrasado=False).values('pk')),
+        ('desmarcar_atrasados', Prestamo.objects.atrasados().values('pk')),
+        ('snapshot_anterior', SnapshotInventario.objects.filter(
+            bodega_id=bodega_id, material_id=material_id, fecha__lte=timezone.now()).order_by('-fecha')[:1]),
+        ('movimientos_par_desde_snapshot', MovimientoInventario.objects.filter(
+            Q(bodega_origen_id=bodega_id) | Q(bodega_destino_id=bodega_id),
+            material_id=material_id, fecha_movimiento__gt=timezone.now() - timedelta(days=1)).values('pk')),
+        ('consumo_mensual_obra', consumo_mensual(obra=obra_id)),
+        ('consumo_mensual_material', consumo_mensual(material=material_id, desde=hoy.replace(month=1, day=1))),
+        ('reporte_obras', reporte_obras([obra_id])),
+        ('ubicaciones_bodega', pagina_intermedia(
+            UbicacionHerramienta.objects.filter(bodega_id=bodega_id)
+            .select_related('herramienta', 'bodega', 'obrero__usuario', 'obra'))),
+        ('ubicaciones_prestadas', pagina_intermedia(
+            UbicacionHerramienta.objects.filter(prestamo__isnull=False)
+            .select_related('herramienta', 'bodega', 'obrero__usuario', 'obra'))),
+        ('ubicacion_prestamos_activos', Prestamo.objects.activos().filter(herramienta_id__in=[primer_pk(Herramienta)])
+            .values('pk')),
+        ('reposicion_salidas', salidas_por_dia(hoy, 28)),
+        ('uso_herramientas_ventana', prestamos_en_ventana(timezone.now() - timedelta(days=90), timezone.now())
+            .filter(herramienta_id__in=[primer_pk(Herramienta)]).values('herramienta_id').annotate(n=Count('id'))),
+        ('etag_bodega', InventarioMaterial.objects.filter(bodega_id=bodega_id).values('bodega_id')
+            .annotate(ultima=Max('fecha_ultima_actualizacion'), filas=Count('id'))),
+    ]
+
+
+def tablas_con_scan(plan, vendor):
+    """Nombres de tablas que el plan recorre completas, según el motor."""
+    if vendor == 'sqlite':
+        return re.findall(r'\bSCAN (\w+)\b(?! USING)', plan)
+    if vendor == 'mysql':
+        datos = json.loads(plan)
+        tablas = []
+
+        def recorrer(nodo):
+            if isinstance(nodo, dict):
+                if nodo.get('access_type') == 'ALL':
+                    tablas.append(nodo.get('table_name'))
+                for valor in nodo.values():
+                    recorrer(valor)
+            elif isinstance(nodo, list):
+                for valor in nodo:
+                    recorrer(valor)
+
+        recorrer(datos)
+        return tablas
+    if vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    raise CommandError(f'Motor no soportado: {vendor}')
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas de listados/reportes y falla si alguna hace full scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-filas', type=int, default=1000,
+                            help='Ignora full scans sobre tablas con menos filas que esto (default: 1000)')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Actualiza las estadísticas del planificador antes de revisar')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        filas_por_tabla = {}
+
+        def filas(tabla):
+            if tabla not in filas_por_tabla:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(tabla)}')
+                    filas_por_tabla[tabla] = cursor.fetchone()[0]
+            return filas_por_tabla[tabla]
+
+        fallas = []
+        for nombre, queryset, *permitidas in consultas_criticas():
+            permitidas = permitidas[0] if permitidas else set()
+            plan = queryset.explain(format='json') if vendor == 'mysql' else queryset.explain()
+            scans = [
+                t for t in tablas_con_scan(plan, vendor)
+                if t not in permitidas and filas(t) >= options['min_filas']
+            ]
+            if scans:
+                fallas.append((nombre, scans))
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {nombre}: {", ".join(scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK         {nombre}'))
+            if options['verbosity'] > 1 or scans:
+                self.stdout.write(plan)
+
+        if fallas:
+            raise CommandError(f'{len(fallas)} consulta(s) con full scan: {", ".join(n for n, _ in fallas)}')
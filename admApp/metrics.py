@@ -0,0 +1,113 @@
+"""
+Métricas del dashboard guardadas en el caché de Django.
+
+Cada métrica tiene su propia clave, versionada como en versiones.py. Las
+señales de admApp/signals.py cambian la versión (o ajustan el valor con
+incr/decr) solo de las métricas afectadas cuando cambian los modelos, así que
+en régimen normal el dashboard no hace consultas: solo recalcula lo que se
+invalidó desde la última visita. aobtener_metricas() es la variante para la
+vista async: calcula las faltantes en paralelo.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Obra, Herramienta, Material, Obrero, InventarioMaterial, Prestamo
+from .paralelo import en_paralelo
+
+
+PREFIJO = 'metricas'
+
+
+METRICAS = {
+    'total_obras': lambda: Obra.objects.count(),
+    'total_herramientas': lambda: Herramienta.objects.filter(activo=True).count(),
+    'total_materiales': lambda: Material.objects.filter(activo=True).count(),
+    'total_obreros': lambda: Obrero.objects.count(),
+    'prestamos_activos': lambda: Prestamo.objects.activos().count(),
+    'prestamos_atrasados': lambda: Prestamo.objects.atrasados().count(),
+    'total_bajo_minimo': lambda: InventarioMaterial.objects.bajo_minimo().count(),
+    'bajo_minimo_por_bodega': lambda: list(InventarioMaterial.objects.conteo_bajo_minimo_por_bodega()[:5]),
+    'bajo_minimo_por_material': lambda: list(InventarioMaterial.objects.conteo_bajo_minimo_por_material()[:5]),
+}
+
+
+def _clave_version(nombre):
+    return f'{PREFIJO}:{nombre}:version'
+
+
+def _claves(nombres, versiones):
+    return {f'{PREFIJO}:{nombre}:{versiones[_clave_version(nombre)]}': nombre for nombre in nombres}
+
+
+def _versiones(nombres):
+    """Versión actual de cada métrica; las que faltan parten de la hora, como en versiones.py."""
+    claves = [_clave_version(nombre) for nombre in nombres]
+    encontradas = cache.get_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            cache.add(clave, time.time_ns(), None)
+            encontradas[clave] = cache.get(clave)
+    return encontradas
+
+
+async def _aversiones(nombres):
+    claves = [_clave_version(nombre) for nombre in nombres]
+    encontradas = await cache.aget_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            await cache.aadd(clave, time.time_ns(), None)
+            encontradas[clave] = await cache.aget(clave)
+    return encontradas
+
+
+def obtener_metricas(nombres=None):
+    """Devuelve {nombre: valor}, calculando y guardando solo las que faltan en caché."""
+    nombres = list(nombres or METRICAS)
+    # La versión se lee antes de calcular: si una señal la cambia mientras
+    # tanto, el valor se guarda bajo la versión vieja y nadie lo vuelve a leer
+    claves = _claves(nombres, _versiones(nombres))
+    encontradas = cache.get_many(claves)
+    metricas = {claves[k]: v for k, v in encontradas.items()}
+    faltantes = {k: METRICAS[n]() for k, n in claves.items() if k not in encontradas}
+    if faltantes:
+        cache.set_many(faltantes, getattr(settings, 'METRICAS_CACHE_TIMEOUT', 3600))
+        metricas.update({claves[k]: v for k, v in faltantes.items()})
+    return metricas
+
+
+async def aobtener_metricas(nombres=None):
+    """Como obtener_metricas(), pero las que faltan se calculan en paralelo."""
+    nombres = list(nombres or METRICAS)
+    claves = _claves(nombres, await _aversiones(nombres))
+    encontradas = await cache.aget_many(claves)
+    metricas = {claves[k]: v for k, v in encontradas.items()}
+    faltan = [k for k in claves if k not in encontradas]
+    if faltan:
+        valores = await en_paralelo(*(METRICAS[claves[k]] for k in faltan))
+        faltantes = dict(zip(faltan, valores))
+        await cache.aset_many(faltantes, getattr(settings, 'METRICAS_CACHE_TIMEOUT', 3600))
+        metricas.update({claves[k]: v for k, v in faltantes.items()})
+    return metricas
+
+
+def invalidar(*nombres):
+    """Cambia la versión: los valores guardados, o que se estén calculando, quedan huérfanos."""
+    for nombre in nombres:
+        try:
+            cache.incr(_clave_version(nombre))
+        except ValueError:
+            cache.add(_clave_version(nombre), time.time_ns(), None)
+
+
+def ajustar(nombre, delta):
+    """
+    Suma delta a una métrica en caché. Si no está, puede haber un cálculo en
+    curso que ya no incluye este cambio: se invalida en vez de ignorarlo.
+    """
+    clave, = _claves([nombre], _versiones([nombre]))
+    try:
+        cache.incr(clave, delta)
+    except ValueError:
+        invalidar(nombre)
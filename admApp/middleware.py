@@ -0,0 +1,187 @@
+"""
+Middleware de instrumentación: consultas, tiempo de BD, render y total por vista.
+
+Para cada request muestreado registra cuántas consultas hizo, cuánto tiempo
+pasó en la base de datos, cuánto tardó el render del template y el total, y
+marca como sospecha de N+1 cualquier SQL que se repita muchas veces con
+distintos parámetros. El resultado sale como una línea JSON en el logger
+'admApp.instrumentacion' y, si se configura, en cabeceras Server-Timing.
+
+El registro del request queda en un ContextVar y cada conexión lleva
+instalado registrar_consulta() (apps.py, señal connection_created), que anota
+la consulta si hay un registro activo. sync_to_async copia el contexto, así
+que también se cuentan las consultas de las vistas async, tanto las del hilo
+del ORM como las de paralelo.en_paralelo() (`consultas_en_paralelo` en la
+línea de log). Las consultas de hilos lanzados a mano, que no heredan el
+contexto, no se ven: `cobertura` lo avisa. Sin registro activo el costo por
+consulta es un ContextVar.get().
+
+El middleware es sync y async: bajo ASGI no obliga a pasar cada request por
+un hilo, y sin muestreo solo sortea y delega.
+
+Configuración (settings.INSTRUMENTACION):
+    MUESTREO    fracción de requests instrumentados (0.0 a 1.0). Por defecto
+                0: se activa a propósito, porque cada request medido
+                guarda todas sus consultas y escribe una línea de log
+    UMBRAL_N1   repeticiones del mismo SQL para considerarlo N+1
+    CABECERAS   agrega Server-Timing / X-DB-Queries / X-N1-Sospecha
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+logger = logging.getLogger('admApp.instrumentacion')
+
+CONFIG_POR_DEFECTO = {
+    'MUESTREO': 0.0,
+    'UMBRAL_N1': 5,
+    'CABECERAS': False,
+}
+
+# thread_name_prefix del pool de paralelo.py
+HILOS_PARALELO = 'paralelo'
+
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def normalizar_sql(sql):
+    """Iguala consultas que solo difieren en la cantidad de parámetros de un IN (...)."""
+    return _LISTA_PARAMETROS.sub('(%s...)', sql)
+
+
+def configuracion():
+    return {**CONFIG_POR_DEFECTO, **getattr(settings, 'INSTRUMENTACION', {})}
+
+
+class RegistroConsultas:
+    """
+    execute_wrapper que anota cada consulta con su duración y el hilo que la
+    hizo. Se puede usar a la vez desde varios hilos (list.append es atómico).
+    """
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append(
+                (normalizar_sql(sql), inicio, time.perf_counter() - inicio, threading.current_thread().name)
+            )
+
+
+# Registro del request en curso; lo heredan los hilos de sync_to_async
+registro_activo = ContextVar('registro_consultas', default=None)
+
+
+def registrar_consulta(execute, sql, params, many, context):
+    """execute_wrapper permanente de cada conexión: delega en el registro activo, si lo hay."""
+    registro = registro_activo.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+    return registro(execute, sql, params, many, context)
+
+
+def instalar_registro(sender, connection, **kwargs):
+    """Receptor de connection_created. La misma conexión puede reconectarse: se instala una vez."""
+    if registrar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(registrar_consulta)
+
+
+class InstrumentacionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = configuracion()
+        if not self.muestreado(config):
+            return self.get_response(request)
+
+        registro = self.iniciar(request)
+        inicio = time.perf_counter()
+        token = registro_activo.set(registro)
+        try:
+            response = self.get_response(request)
+        finally:
+            registro_activo.reset(token)
+        return self.terminar(request, response, registro, inicio, config)
+
+    async def __acall__(self, request):
+        config = configuracion()
+        if not self.muestreado(config):
+            return await self.get_response(request)
+
+        registro = self.iniciar(request)
+        inicio = time.perf_counter()
+        token = registro_activo.set(registro)
+        try:
+            response = await self.get_response(request)
+        finally:
+            registro_activo.reset(token)
+        return self.terminar(request, response, registro, inicio, config)
+
+    @staticmethod
+    def muestreado(config):
+        return config['MUESTREO'] > 0 and random.random() < config['MUESTREO']
+
+    @staticmethod
+    def iniciar(request):
+        registro = RegistroConsultas()
+        request._instrumentacion = registro
+        return registro
+
+    def terminar(self, request, response, registro, inicio, config):
+        fin = time.perf_counter()
+
+        inicio_render = getattr(request, '_inicio_render', None)
+        repetidas = [
+            (sql, n) for sql, n in Counter(sql for sql, _, _, _ in registro.consultas).most_common()
+            if n >= config['UMBRAL_N1']
+        ]
+        datos = {
+            'vista': getattr(request.resolver_match, 'view_name', None),
+            'metodo': request.method,
+            'ruta': request.path,
+            'status': response.status_code,
+            'consultas': len(registro.consultas),
+            'consultas_en_paralelo': sum(
+                1 for _, _, _, hilo in registro.consultas if hilo.startswith(HILOS_PARALELO)
+            ),
+            # los hilos que no heredan el contexto del request no quedan registrados
+            'cobertura': 'hilos con el contexto del request',
+            'db_ms': round(sum(d for _, _, d, _ in registro.consultas) * 1000, 2),
+            'render_ms': round((fin - inicio_render) * 1000, 2) if inicio_render else None,
+            'consultas_en_render': sum(1 for _, t, _, _ in registro.consultas if inicio_render and t >= inicio_render),
+            'total_ms': round((fin - inicio) * 1000, 2),
+            'n1': [{'sql': sql[:300], 'veces': n} for sql, n in repetidas],
+        }
+        logger.log(logging.WARNING if repetidas else logging.INFO, json.dumps(datos, ensure_ascii=False))
+
+        if config['CABECERAS']:
+            tiempos = [f"db;dur={datos['db_ms']}", f"total;dur={datos['total_ms']}"]
+            if datos['render_ms'] is not None:
+                tiempos.append(f"render;dur={datos['render_ms']}")
+            response['Server-Timing'] = ', '.join(tiempos)
+            response['X-DB-Queries'] = str(datos['consultas'])
+            if repetidas:
+                sql, n = repetidas[0]
+                response['X-N1-Sospecha'] = f'{n}x {sql[:120]}'.encode('ascii', 'replace').decode()
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventariomaterial',
+            index=models.Index(fields=['material', 'cantidad_actual'], name='inv_mat_material_cant_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0002_indice_bajo_minimo'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['obra', 'fecha_inicio'], name='actividad_obra_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='herramienta',
+            index=models.Index(fields=['activo', 'estado'], name='herramienta_activo_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='herramienta',
+            index=models.Index(fields=['nombre', 'marca', 'id'], name='herramienta_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['activo'], name='material_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['material', 'fecha_movimiento'], name='mov_material_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['fecha_movimiento', 'id'], name='mov_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obra',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='obra_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(fields=['estado', 'fecha_devolucion_estimada'], name='prestamo_estado_fdev_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(fields=['fecha_prestamo', 'id'], name='prestamo_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='usuario_orden_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0004_prestamo_atrasado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField()),
+                ('fecha', models.DateTimeField()),
+                ('bodega', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='admApp.bodega')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admApp.material')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Inventario',
+                'verbose_name_plural': 'Snapshots de Inventario',
+                'db_table': 'snapshot_inventario',
+                'indexes': [models.Index(fields=['bodega', 'material', 'fecha'], name='snapshot_bod_mat_fecha_idx'), models.Index(fields=['fecha'], name='snapshot_fecha_idx')],
+            },
+        ),
+    ]
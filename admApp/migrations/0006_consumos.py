@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0005_snapshot_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad_salida', models.IntegerField(default=0)),
+                ('cantidad_devuelta', models.IntegerField(default=0)),
+                ('movimientos', models.IntegerField(default=0)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admApp.material')),
+                ('obra', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumos_diarios', to='admApp.obra')),
+            ],
+            options={
+                'verbose_name': 'Consumo Diario',
+                'verbose_name_plural': 'Consumos Diarios',
+                'db_table': 'consumo_diario',
+                'indexes': [models.Index(fields=['obra', 'fecha'], name='consumo_diario_obra_idx'), models.Index(fields=['material', 'fecha'], name='consumo_diario_material_idx'), models.Index(fields=['fecha'], name='consumo_diario_fecha_idx')],
+                'unique_together': {('obra', 'material', 'fecha')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ConsumoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('cantidad_salida', models.IntegerField(default=0)),
+                ('cantidad_devuelta', models.IntegerField(default=0)),
+                ('movimientos', models.IntegerField(default=0)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='admApp.material')),
+                ('obra', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumos_mensuales', to='admApp.obra')),
+            ],
+            options={
+                'verbose_name': 'Consumo Mensual',
+                'verbose_name_plural': 'Consumos Mensuales',
+                'db_table': 'consumo_mensual',
+                'indexes': [models.Index(fields=['obra', 'mes'], name='consumo_mensual_obra_idx'), models.Index(fields=['material', 'mes'], name='consumo_mensual_material_idx'), models.Index(fields=['mes'], name='consumo_mensual_mes_idx')],
+                'unique_together': {('obra', 'material', 'mes')},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+# Índice de texto completo según el motor. En otros motores la búsqueda usa
+# LIKE (ver admApp/busqueda.py).
+SQL_INDICE = {
+    'sqlite': [
+        """CREATE VIRTUAL TABLE indice_busqueda_fts USING fts5(
+            titulo, contenido, content='indice_busqueda', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        """CREATE TRIGGER indice_busqueda_ai AFTER INSERT ON indice_busqueda BEGIN
+            INSERT INTO indice_busqueda_fts(rowid, titulo, contenido) VALUES (new.id, new.titulo, new.contenido);
+        END""",
+        """CREATE TRIGGER indice_busqueda_ad AFTER DELETE ON indice_busqueda BEGIN
+            INSERT INTO indice_busqueda_fts(indice_busqueda_fts, rowid, titulo, contenido)
+            VALUES ('delete', old.id, old.titulo, old.contenido);
+        END""",
+        """CREATE TRIGGER indice_busqueda_au AFTER UPDATE ON indice_busqueda BEGIN
+            INSERT INTO indice_busqueda_fts(indice_busqueda_fts, rowid, titulo, contenido)
+            VALUES ('delete', old.id, old.titulo, old.contenido);
+            INSERT INTO indice_busqueda_fts(rowid, titulo, contenido) VALUES (new.id, new.titulo, new.contenido);
+        END""",
+    ],
+    'mysql': [
+        'ALTER TABLE indice_busqueda ADD FULLTEXT INDEX indice_busqueda_ft (titulo, contenido)',
+    ],
+}
+
+SQL_BORRAR_INDICE = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS indice_busqueda_ai',
+        'DROP TRIGGER IF EXISTS indice_busqueda_ad',
+        'DROP TRIGGER IF EXISTS indice_busqueda_au',
+        'DROP TABLE IF EXISTS indice_busqueda_fts',
+    ],
+    'mysql': [
+        'ALTER TABLE indice_busqueda DROP INDEX indice_busqueda_ft',
+    ],
+}
+
+
+def crear_indice_texto(apps, schema_editor):
+    for sql in SQL_INDICE.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def borrar_indice_texto(apps, schema_editor):
+    for sql in SQL_BORRAR_INDICE.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0006_consumos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('herramienta', 'Herramienta'), ('material', 'Material'), ('obra', 'Obra'), ('bodega', 'Bodega')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('titulo', models.CharField(max_length=300)),
+                ('contenido', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Índice de Búsqueda',
+                'verbose_name_plural': 'Índice de Búsqueda',
+                'db_table': 'indice_busqueda',
+                'unique_together': {('tipo', 'objeto_id')},
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, borrar_indice_texto),
+    ]
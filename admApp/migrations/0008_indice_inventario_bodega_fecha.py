@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0007_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventariomaterial',
+            index=models.Index(fields=['bodega', 'fecha_ultima_actualizacion'], name='inv_mat_bodega_fecha_idx'),
+        ),
+    ]
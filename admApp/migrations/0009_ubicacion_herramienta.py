@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admApp', '0008_indice_inventario_bodega_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UbicacionHerramienta',
+            fields=[
+                ('herramienta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ubicacion', serialize=False, to='admApp.herramienta')),
+                ('desde', models.DateTimeField(blank=True, null=True)),
+                ('bodega', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admApp.bodega')),
+                ('obra', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admApp.obra')),
+                ('obrero', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admApp.obrero')),
+                ('prestamo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='admApp.prestamo')),
+            ],
+            options={
+                'verbose_name': 'Ubicación de Herramienta',
+                'verbose_name_plural': 'Ubicaciones de Herramientas',
+                'db_table': 'ubicacion_herramienta',
+                'ordering': ['herramienta'],
+            },
+        ),
+    ]
@@ -39,6 +39,9 @@ class Usuario(AbstractUser):
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['last_name', 'first_name', 'id'], name='usuario_orden_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_rol_display()})"
@@ -81,6 +84,9 @@ class Obra(models.Model):
         verbose_name = 'Obra'
         verbose_name_plural = 'Obras'
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['fecha_inicio', 'id'], name='obra_orden_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.ciudad}"
@@ -148,6 +154,9 @@ class Actividad(models.Model):
         verbose_name = 'Actividad'
         verbose_name_plural = 'Actividades'
         ordering = ['obra', 'fecha_inicio']
+        indexes = [
+            models.Index(fields=['obra', 'fecha_inicio'], name='actividad_obra_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.obra.nombre}"
@@ -178,6 +187,9 @@ class Material(models.Model):
         verbose_name = 'Material'
         verbose_name_plural = 'Materiales'
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['activo'], name='material_activo_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} ({self.get_unidad_medida_display()})"
@@ -208,6 +220,10 @@ class Herramienta(models.Model):
         verbose_name = 'Herramienta'
         verbose_name_plural = 'Herramientas'
         ordering = ['nombre', 'marca']
+        indexes = [
+            models.Index(fields=['activo', 'estado'], name='herramienta_activo_estado_idx'),
+            models.Index(fields=['nombre', 'marca', 'id'], name='herramienta_orden_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} {self.marca} - {self.get_estado_display()}"
@@ -242,6 +258,31 @@ class Bodega(models.Model):
         return f"{self.nombre} ({self.get_tipo_display()})"
 
 
+class InventarioMaterialQuerySet(models.QuerySet):
+    
+    def con_alerta(self):
+        """Anota `alerta` (cantidad bajo el stock mínimo) calculada en la base de datos"""
+        return self.annotate(alerta=models.ExpressionWrapper(
+            models.Q(cantidad_actual__lt=models.F('material__stock_minimo')),
+            output_field=models.BooleanField(),
+        ))
+    
+    def bajo_minimo(self):
+        return self.filter(cantidad_actual__lt=models.F('material__stock_minimo'))
+    
+    def conteo_bajo_minimo_por_bodega(self):
+        return (self.bajo_minimo()
+                .values('bodega_id', 'bodega__nombre')
+                .annotate(total=models.Count('id'))
+                .order_by('-total', 'bodega__nombre'))
+    
+    def conteo_bajo_minimo_por_material(self):
+        return (self.bajo_minimo()
+                .values('material_id', 'material__nombre')
+                .annotate(total=models.Count('id'))
+                .order_by('-total', 'material__nombre'))
+
+
 class InventarioMaterial(models.Model):
     
     bodega = models.ForeignKey(Bodega, on_delete=models.CASCADE, related_name='inventario_materiales')
@@ -249,9 +290,17 @@ class InventarioMaterial(models.Model):
     cantidad_actual = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     fecha_ultima_actualizacion = models.DateTimeField(auto_now=True)
     
+    objects = InventarioMaterialQuerySet.as_manager()
+    
     class Meta:
         db_table = 'inventario_material'
         unique_together = [['bodega', 'material']]
+        indexes = [
+            # Permite buscar por material las filas con cantidad < stock_minimo
+            models.Index(fields=['material', 'cantidad_actual'], name='inv_mat_material_cant_idx'),
+            # MAX/COUNT por bodega para el ETag de bodega_detail (condicional.py)
+            models.Index(fields=['bodega', 'fecha_ultima_actualizacion'], name='inv_mat_bodega_fecha_idx'),
+        ]
         verbose_name = 'Inventario de Material'
         verbose_name_plural = 'Inventarios de Materiales'
     
@@ -259,9 +308,35 @@ class InventarioMaterial(models.Model):
         return f"{self.material.nombre} en {self.bodega.nombre}: {self.cantidad_actual}"
     
     def esta_bajo_minimo(self):
+        if hasattr(self, 'alerta'):
+            return self.alerta
         return self.cantidad_actual < self.material.stock_minimo
 
 
+class SnapshotInventario(models.Model):
+    """
+    Cantidad de un material en una bodega en un instante. Lo escribe el
+    comando snapshot_inventario; ver admApp/snapshots.py.
+    """
+    
+    bodega = models.ForeignKey(Bodega, on_delete=models.CASCADE, related_name='snapshots')
+    material = models.ForeignKey(Material, on_delete=models.CASCADE)
+    cantidad = models.IntegerField()
+    fecha = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'snapshot_inventario'
+        indexes = [
+            models.Index(fields=['bodega', 'material', 'fecha'], name='snapshot_bod_mat_fecha_idx'),
+            models.Index(fields=['fecha'], name='snapshot_fecha_idx'),
+        ]
+        verbose_name = 'Snapshot de Inventario'
+        verbose_name_plural = 'Snapshots de Inventario'
+    
+    def __str__(self):
+        return f"{self.material_id} en {self.bodega_id}: {self.cantidad} ({self.fecha:%d/%m/%Y %H:%M})"
+
+
 class InventarioHerramienta(models.Model):
     
     bodega = models.ForeignKey(Bodega, on_delete=models.CASCADE, related_name='inventario_herramientas')
@@ -278,6 +353,32 @@ class InventarioHerramienta(models.Model):
         return f"{self.herramienta} en {self.bodega.nombre}"
 
 
+class Transferencia(models.Model):
+    """
+    Documento de traspaso de materiales entre dos bodegas. Cada línea es un
+    MovimientoInventario de tipo TRANSFERENCIA que apunta a este documento;
+    se registran todas juntas con transferencias.transferir().
+    """
+    
+    bodega_origen = models.ForeignKey(Bodega, on_delete=models.CASCADE, related_name='transferencias_salida')
+    bodega_destino = models.ForeignKey(Bodega, on_delete=models.CASCADE, related_name='transferencias_entrada')
+    usuario_responsable = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
+    observaciones = models.TextField(blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'transferencia'
+        verbose_name = 'Transferencia'
+        verbose_name_plural = 'Transferencias'
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha', 'id'], name='transferencia_orden_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Transferencia #{self.pk}: {self.bodega_origen_id} → {self.bodega_destino_id} ({self.fecha:%d/%m/%Y})"
+
+
 class MovimientoInventario(models.Model):
     
     class TipoMovimiento(models.TextChoices):
@@ -295,6 +396,7 @@ class MovimientoInventario(models.Model):
     usuario_responsable = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
     obra = models.ForeignKey(Obra, on_delete=models.SET_NULL, blank=True, null=True, help_text="Obra a la que se destina el material")
     motivo = models.TextField(blank=True)
+    transferencia = models.ForeignKey(Transferencia, on_delete=models.SET_NULL, blank=True, null=True, related_name='movimientos')
     fecha_movimiento = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -302,11 +404,125 @@ class MovimientoInventario(models.Model):
         verbose_name = 'Movimiento de Inventario'
         verbose_name_plural = 'Movimientos de Inventario'
         ordering = ['-fecha_movimiento']
+        indexes = [
+            models.Index(fields=['material', 'fecha_movimiento'], name='mov_material_fecha_idx'),
+            models.Index(fields=['fecha_movimiento', 'id'], name='mov_orden_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_tipo_movimiento_display()} - {self.material.nombre} ({self.cantidad})"
 
 
+class ConsumoDiario(models.Model):
+    """
+    Material consumido por una obra en un día: salidas hacia la obra y
+    devoluciones desde ella. Lo mantiene ledger.registrar_movimientos();
+    ver admApp/consumos.py.
+    """
+    
+    obra = models.ForeignKey(Obra, on_delete=models.CASCADE, related_name='consumos_diarios')
+    material = models.ForeignKey(Material, on_delete=models.CASCADE)
+    fecha = models.DateField()
+    cantidad_salida = models.IntegerField(default=0)
+    cantidad_devuelta = models.IntegerField(default=0)
+    movimientos = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'consumo_diario'
+        unique_together = [['obra', 'material', 'fecha']]
+        indexes = [
+            models.Index(fields=['obra', 'fecha'], name='consumo_diario_obra_idx'),
+            models.Index(fields=['material', 'fecha'], name='consumo_diario_material_idx'),
+            models.Index(fields=['fecha'], name='consumo_diario_fecha_idx'),
+        ]
+        verbose_name = 'Consumo Diario'
+        verbose_name_plural = 'Consumos Diarios'
+    
+    def __str__(self):
+        return f"{self.obra_id}/{self.material_id} {self.fecha}: {self.cantidad_neta}"
+    
+    @property
+    def cantidad_neta(self):
+        return self.cantidad_salida - self.cantidad_devuelta
+
+
+class ConsumoMensual(models.Model):
+    """Igual que ConsumoDiario, por mes (mes = primer día del mes)."""
+    
+    obra = models.ForeignKey(Obra, on_delete=models.CASCADE, related_name='consumos_mensuales')
+    material = models.ForeignKey(Material, on_delete=models.CASCADE)
+    mes = models.DateField()
+    cantidad_salida = models.IntegerField(default=0)
+    cantidad_devuelta = models.IntegerField(default=0)
+    movimientos = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'consumo_mensual'
+        unique_together = [['obra', 'material', 'mes']]
+        indexes = [
+            models.Index(fields=['obra', 'mes'], name='consumo_mensual_obra_idx'),
+            models.Index(fields=['material', 'mes'], name='consumo_mensual_material_idx'),
+            models.Index(fields=['mes'], name='consumo_mensual_mes_idx'),
+        ]
+        verbose_name = 'Consumo Mensual'
+        verbose_name_plural = 'Consumos Mensuales'
+    
+    def __str__(self):
+        return f"{self.obra_id}/{self.material_id} {self.mes:%m/%Y}: {self.cantidad_neta}"
+    
+    @property
+    def cantidad_neta(self):
+        return self.cantidad_salida - self.cantidad_devuelta
+
+
+class IndiceBusqueda(models.Model):
+    """
+    Texto buscable de herramientas, materiales, obras y bodegas, una fila por
+    objeto. Lo mantienen las señales de admApp/signals.py; el índice de texto
+    completo (FTS5 en SQLite, FULLTEXT en MySQL) se crea en la migración.
+    Ver admApp/busqueda.py.
+    """
+    
+    class Tipo(models.TextChoices):
+        HERRAMIENTA = 'herramienta', 'Herramienta'
+        MATERIAL = 'material', 'Material'
+        OBRA = 'obra', 'Obra'
+        BODEGA = 'bodega', 'Bodega'
+    
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    objeto_id = models.BigIntegerField()
+    titulo = models.CharField(max_length=300)
+    contenido = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'indice_busqueda'
+        unique_together = [['tipo', 'objeto_id']]
+        verbose_name = 'Índice de Búsqueda'
+        verbose_name_plural = 'Índice de Búsqueda'
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.titulo}"
+
+
+class PrestamoQuerySet(models.QuerySet):
+    
+    def activos(self):
+        return self.filter(estado=Prestamo.EstadoPrestamo.ACTIVO)
+    
+    def vencidos(self, fecha=None):
+        """Activos con fecha de devolución anterior a `fecha` (hoy por defecto)"""
+        return self.activos().filter(fecha_devolucion_estimada__lt=fecha or timezone.localdate())
+
+    def atrasados(self):
+        """
+        Marcados por marcar_prestamos_atrasados (índice prestamo_atrasado_idx).
+        Igual a vencidos() salvo el desfase hasta la próxima corrida del comando.
+        """
+        # Con True literal Django escribe WHERE atrasado, sin comparación, y
+        # SQLite/MySQL recorren el índice completo en vez de buscar en él
+        return self.filter(atrasado=models.Value(True))
+
+
 class Prestamo(models.Model):
     
     class EstadoPrestamo(models.TextChoices):
@@ -326,12 +542,23 @@ class Prestamo(models.Model):
     observaciones_prestamo = models.TextField(blank=True)
     observaciones_devolucion = models.TextField(blank=True)
     usuario_registro = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
+    # Lo mantiene el comando marcar_prestamos_atrasados
+    atrasado = models.BooleanField(default=False, editable=False)
+    
+    objects = PrestamoQuerySet.as_manager()
     
     class Meta:
         db_table = 'prestamo'
         verbose_name = 'Préstamo'
         verbose_name_plural = 'Préstamos'
         ordering = ['-fecha_prestamo']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_devolucion_estimada'], name='prestamo_estado_fdev_idx'),
+            models.Index(fields=['fecha_prestamo', 'id'], name='prestamo_orden_idx'),
+            models.Index(fields=['atrasado', 'fecha_devolucion_estimada'], name='prestamo_atrasado_idx'),
+            # Préstamos abiertos o cerrados dentro de una ventana (uso_herramientas.py)
+            models.Index(fields=['fecha_devolucion_real'], name='prestamo_fdev_real_idx'),
+        ]
     
     def __str__(self):
         return f"{self.herramienta} → {self.obrero} ({self.get_estado_display()})"
@@ -340,3 +567,39 @@ class Prestamo(models.Model):
         if self.estado == self.EstadoPrestamo.ACTIVO:
             return timezone.now().date() > self.fecha_devolucion_estimada
         return False
+    
+    def dias_atraso(self):
+        if self.esta_atrasado():
+            return (timezone.now().date() - self.fecha_devolucion_estimada).days
+        return 0
+
+
+class UbicacionHerramienta(models.Model):
+    """
+    Dónde está cada herramienta ahora: la bodega a la que pertenece y, si está
+    prestada, el préstamo activo con su obrero y obra. Una fila por
+    herramienta, mantenida por ubicaciones.py; `desde` es la fecha en que
+    llegó a su ubicación actual (préstamo, devolución o ingreso a bodega).
+    """
+    
+    herramienta = models.OneToOneField(Herramienta, on_delete=models.CASCADE, primary_key=True, related_name='ubicacion')
+    bodega = models.ForeignKey(Bodega, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    prestamo = models.ForeignKey(Prestamo, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    obrero = models.ForeignKey(Obrero, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    obra = models.ForeignKey(Obra, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    desde = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'ubicacion_herramienta'
+        verbose_name = 'Ubicación de Herramienta'
+        verbose_name_plural = 'Ubicaciones de Herramientas'
+        ordering = ['herramienta']
+    
+    def __str__(self):
+        if self.prestamo_id:
+            return f"{self.herramienta_id}: prestada a {self.obrero_id} en obra {self.obra_id}"
+        return f"{self.herramienta_id}: en bodega {self.bodega_id}"
+    
+    @property
+    def prestada(self):
+        return self.prestamo_id is not None
@@ -0,0 +1,197 @@
+"""
+Paginación por cursor (keyset) para los listados de admApp.
+
+En lugar de OFFSET, cada página se pide como "las N filas que vienen después
+de la última fila vista", filtrando por los valores de la ordenación del
+modelo (Meta.ordering) más la clave primaria como desempate. Así el costo de
+una página es el mismo en la primera que en la página diez mil.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no se puede decodificar para este listado."""
+
+
+def tamano_pagina(request):
+    """Tamaño de página pedido en ?page_size=, acotado por la configuración."""
+    defecto = getattr(settings, 'PAGINACION_TAMANO_PAGINA', 50)
+    maximo = getattr(settings, 'PAGINACION_TAMANO_MAXIMO', 500)
+    try:
+        tamano = int(request.GET.get('page_size', defecto))
+    except (TypeError, ValueError):
+        tamano = defecto
+    return max(1, min(tamano, maximo))
+
+
+def campos_orden(queryset):
+    """
+    Devuelve la ordenación efectiva como lista de (campo, descendente),
+    terminada siempre en la clave primaria para que sea única.
+    """
+    model = queryset.model
+    orden = list(queryset.query.order_by or model._meta.ordering)
+    campos = []
+    for nombre in orden:
+        descendente = nombre.startswith('-')
+        nombre = nombre.lstrip('-')
+        if nombre == 'pk':
+            field = model._meta.pk
+        else:
+            try:
+                field = model._meta.get_field(nombre)
+            except FieldDoesNotExist:
+                raise ValueError(f"No se puede paginar por '{nombre}' en {model.__name__}")
+        if not field.concrete or field.null:
+            raise ValueError(f"'{nombre}' no sirve como clave de paginación en {model.__name__}")
+        campos.append((field, descendente))
+        if field.primary_key:
+            return campos
+    descendente = campos[-1][1] if campos else False
+    campos.append((model._meta.pk, descendente))
+    return campos
+
+
+def codificar_cursor(valores, reverso=False):
+    datos = json.dumps({'v': valores, 'r': reverso}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return list(datos['v']), bool(datos.get('r', False))
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise CursorInvalido(cursor)
+
+
+class PaginaCursor:
+    """
+    Una página de resultados paginada por cursor.
+
+    La consulta se ejecuta recién al acceder a los resultados, así que crear
+    la página no cuesta nada si el template termina usando una versión en caché.
+    """
+
+    def __init__(self, queryset, cursor=None, tamano=50, parametros=None):
+        self.campos = campos_orden(queryset)
+        self.queryset = queryset.order_by(*[
+            f"{'-' if desc else ''}{field.attname}" for field, desc in self.campos
+        ])
+        self.tamano = tamano
+        self.parametros = parametros
+        self.cursor = cursor
+        self.valores, self.reverso = (None, False)
+        if cursor:
+            valores, self.reverso = decodificar_cursor(cursor)
+            if len(valores) != len(self.campos):
+                raise CursorInvalido(cursor)
+            try:
+                self.valores = [field.to_python(v) for (field, _), v in zip(self.campos, valores)]
+            except ValidationError:
+                raise CursorInvalido(cursor)
+
+    def _filtro(self):
+        """Q equivalente a "(campo1, campo2, ...) viene después de los valores del cursor"."""
+        filtro = Q()
+        iguales = Q()
+        for (field, desc), valor in zip(self.campos, self.valores):
+            hacia_atras = desc != self.reverso
+            lookup = 'lt' if hacia_atras else 'gt'
+            filtro |= iguales & Q(**{f'{field.attname}__{lookup}': valor})
+            iguales &= Q(**{field.attname: valor})
+        return filtro
+
+    def consulta(self):
+        """Queryset de la página (una fila extra para saber si hay más)."""
+        queryset = self.queryset
+        if self.valores is not None:
+            queryset = queryset.filter(self._filtro())
+        if self.reverso:
+            queryset = queryset.reverse()
+        return queryset[:self.tamano + 1]
+
+    @cached_property
+    def _resultado(self):
+        filas = list(self.consulta())
+        hay_mas = len(filas) > self.tamano
+        filas = filas[:self.tamano]
+        if self.reverso:
+            filas.reverse()
+            return filas, True, hay_mas
+        return filas, hay_mas, self.valores is not None
+
+    @property
+    def object_list(self):
+        return self._resultado[0]
+
+    @property
+    def has_next(self):
+        return self._resultado[1]
+
+    @property
+    def has_previous(self):
+        return self._resultado[2]
+
+    def _cursor_de(self, obj, reverso):
+        valores = [field.value_to_string(obj) for field, _ in self.campos]
+        return codificar_cursor(valores, reverso)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return self._cursor_de(self.object_list[-1], reverso=False)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous:
+            return None
+        return self._cursor_de(self.object_list[0], reverso=True)
+
+    def _query(self, cursor):
+        parametros = self.parametros.copy() if self.parametros is not None else None
+        if parametros is None:
+            return f'cursor={cursor}' if cursor else ''
+        parametros.pop('cursor', None)
+        if cursor:
+            parametros['cursor'] = cursor
+        return parametros.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self._query(self.previous_cursor)
+
+    @property
+    def first_query(self):
+        return self._query(None)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginar(request, queryset):
+    """
+    Pagina un queryset según ?cursor= y ?page_size= del request.
+    Un cursor inválido (manipulado o de otro listado) vuelve a la primera página.
+    """
+    tamano = tamano_pagina(request)
+    try:
+        return PaginaCursor(queryset, request.GET.get('cursor'), tamano, request.GET)
+    except CursorInvalido:
+        return PaginaCursor(queryset, None, tamano, request.GET)
@@ -0,0 +1,100 @@
+"""
+Consultas concurrentes para las vistas async (async_views.py).
+
+El ORM de Django es síncrono: sus métodos a* corren en un único hilo
+compartido, uno detrás de otro. en_paralelo() ejecuta cada función en un hilo
+del pool con su propia conexión a la base de datos, así las consultas
+independientes de una vista (agregados del dashboard, detalle + filas) se
+esperan juntas y la vista tarda lo que la más lenta, no la suma.
+
+Cada hilo del pool conserva su conexión entre llamadas: abrirla en cada
+consulta costaba más que la consulta. Como contrapartida el proceso mantiene
+hasta HILOS conexiones extra abiertas (cuentan para max_connections) y no se
+aplica CONN_MAX_AGE. Una conexión que falló, o que estuvo inactiva más de
+INACTIVIDAD segundos (ej: wait_timeout de MySQL), se verifica y se reabre si
+ya no sirve. cerrar() las cierra todas; se llama al terminar el proceso.
+
+Si el request está instrumentado (middleware.py), sync_to_async copia el
+contexto con el registro activo y las consultas del pool también se cuentan.
+"""
+import asyncio
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import connections, connection
+
+from .middleware import HILOS_PARALELO
+
+
+HILOS = 8
+INACTIVIDAD = 60
+
+_pool = None
+_lock = threading.Lock()
+_hilo = threading.local()
+
+
+def _obtener_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=HILOS, thread_name_prefix=HILOS_PARALELO)
+        return _pool
+
+
+def _revisar_conexion():
+    """Descarta la conexión del hilo si quedó rota o puede haber expirado en el servidor."""
+    if connection.connection is None:
+        return
+    inactiva = time.monotonic() - getattr(_hilo, 'ultimo_uso', 0) > INACTIVIDAD
+    if (connection.errors_occurred or inactiva) and not connection.is_usable():
+        connection.close()
+    connection.errors_occurred = False
+
+
+def _con_conexion_propia(funcion):
+    def ejecutar():
+        _revisar_conexion()
+        try:
+            return funcion()
+        finally:
+            _hilo.ultimo_uso = time.monotonic()
+    return ejecutar
+
+
+async def en_paralelo(*funciones):
+    """Resultados de las funciones (síncronas, sin argumentos), en el mismo orden."""
+    pool = _obtener_pool()
+    return await asyncio.gather(*(
+        sync_to_async(_con_conexion_propia(funcion), thread_sensitive=False, executor=pool)()
+        for funcion in funciones
+    ))
+
+
+def cerrar():
+    """Cierra las conexiones de los hilos del pool y lo apaga (se recrea en el próximo uso)."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is None:
+        return
+    # Una tarea por hilo: la barrera impide que un mismo hilo tome dos
+    barrera = threading.Barrier(HILOS)
+
+    def cerrar_conexiones():
+        connections.close_all()
+        barrera.wait(timeout=5)
+    try:
+        for _ in range(HILOS):
+            pool.submit(cerrar_conexiones)
+    except RuntimeError:
+        # al salir del intérprete concurrent.futures ya detuvo los hilos (y
+        # con ellos sus conexiones) antes que los atexit
+        pass
+    pool.shutdown(wait=True)
+
+
+atexit.register(cerrar)
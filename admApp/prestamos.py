@@ -0,0 +1,197 @@
+"""
+Operaciones en bloque sobre préstamos de herramientas.
+
+Trabajan con update()/bulk_* en lugar de guardar préstamo por préstamo; como
+eso no dispara post_save, al terminar envían signals.prestamos_actualizados.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ubicaciones
+from .models import Herramienta, Prestamo
+from .signals import prestamos_actualizados
+
+
+class ErrorPrestamo(Exception):
+    pass
+
+
+class HerramientasNoDisponibles(ErrorPrestamo):
+    """Alguna herramienta no existe, está inactiva o no está DISPONIBLE."""
+
+    def __init__(self, herramientas):
+        # herramientas: lista de (id, nombre, estado); nombre/estado None si no existe
+        self.herramientas = herramientas
+        detalle = ', '.join(
+            f'{nombre or f"#{pk}"} ({estado or "no existe"})' for pk, nombre, estado in herramientas
+        )
+        super().__init__(f'Herramientas no disponibles: {detalle}')
+
+
+def _notificar(ids):
+    """ids=None indica que el cambio pudo tocar cualquier préstamo."""
+    transaction.on_commit(lambda: prestamos_actualizados.send(sender=Prestamo, prestamos=ids))
+
+
+def prestar_herramientas(herramientas, obrero, obra, bodega, fecha_devolucion_estimada,
+                         usuario=None, observaciones=''):
+    """
+    Presta varias herramientas a un obrero en una sola transacción.
+
+    Bloquea las herramientas (SELECT ... FOR UPDATE) para que dos bodegueros
+    no presten la misma a la vez; si alguna no está disponible no se presta
+    ninguna. Son cuatro consultas (más BEGIN/COMMIT) sin importar cuántas
+    herramientas sean: bloqueo, INSERT de préstamos, UPDATE de estados y
+    upsert de sus ubicaciones.
+
+    `herramientas` acepta instancias o ids. Devuelve los Prestamo creados.
+    """
+    ids = list(dict.fromkeys(getattr(h, 'pk', h) for h in herramientas))
+    if not ids:
+        raise ErrorPrestamo('Debe indicar al menos una herramienta')
+
+    with transaction.atomic():
+        bloqueadas = {
+            h.pk: h for h in Herramienta.objects.select_for_update()
+            .filter(pk__in=ids).order_by('pk').only('id', 'nombre', 'estado', 'activo')
+        }
+        rechazadas = [
+            (pk, bloqueadas[pk].nombre, bloqueadas[pk].estado) if pk in bloqueadas else (pk, None, None)
+            for pk in ids
+            if pk not in bloqueadas
+            or not bloqueadas[pk].activo
+            or bloqueadas[pk].estado != Herramienta.EstadoHerramienta.DISPONIBLE
+        ]
+        if rechazadas:
+            raise HerramientasNoDisponibles(rechazadas)
+
+        prestamos = Prestamo.objects.bulk_create([
+            Prestamo(
+                herramienta=bloqueadas[pk], obrero=obrero, obra=obra, bodega=bodega,
+                fecha_devolucion_estimada=fecha_devolucion_estimada,
+                estado=Prestamo.EstadoPrestamo.ACTIVO,
+                observaciones_prestamo=observaciones,
+                usuario_registro=usuario,
+            )
+            for pk in ids
+        ])
+        Herramienta.objects.filter(pk__in=ids).update(estado=Herramienta.EstadoHerramienta.EN_USO)
+        ubicaciones.registrar_prestamos(prestamos)
+        # MySQL no devuelve los ids creados por bulk_create
+        creados = [p.pk for p in prestamos]
+        _notificar(creados if None not in creados else None)
+    return prestamos
+
+
+# Estado final de la herramienta según cómo se cierra el préstamo
+ESTADO_HERRAMIENTA_AL_CERRAR = {
+    Prestamo.EstadoPrestamo.DEVUELTO: Herramienta.EstadoHerramienta.DISPONIBLE,
+    Prestamo.EstadoPrestamo.DAÑADO: Herramienta.EstadoHerramienta.DAÑADA,
+    Prestamo.EstadoPrestamo.EXTRAVIADO: Herramienta.EstadoHerramienta.BAJA,
+}
+
+YA_CERRADO = 'YA_CERRADO'
+NO_ENCONTRADO = 'NO_ENCONTRADO'
+
+
+def devolver_prestamos(ids=None, obrero=None, obra=None, danados=(), extraviados=(),
+                       observaciones='', fecha=None):
+    """
+    Cierra en bloque los préstamos de una lista de ids, de un obrero y/o de
+    una obra (los filtros se combinan).
+
+    Los préstamos en `danados` quedan DAÑADO y su herramienta DAÑADA; los de
+    `extraviados` quedan EXTRAVIADO y la herramienta BAJA; el resto DEVUELTO
+    con la herramienta DISPONIBLE. Todo en una transacción, con un UPDATE de
+    préstamos y uno de herramientas por cada estado final, más uno de
+    ubicaciones.
+
+    Devuelve una lista con un dict por préstamo: {'prestamo', 'herramienta',
+    'resultado', 'estado'}. `resultado` es el estado con que se cerró,
+    YA_CERRADO si no estaba activo (solo al pasar ids) o NO_ENCONTRADO.
+    """
+    if ids is None and obrero is None and obra is None:
+        raise ErrorPrestamo('Indique los préstamos, el obrero o la obra a devolver')
+    fecha = fecha or timezone.now()
+    danados = {int(pk) for pk in danados}
+    extraviados = {int(pk) for pk in extraviados}
+
+    with transaction.atomic():
+        queryset = Prestamo.objects.select_for_update()
+        if ids is not None:
+            ids = list(dict.fromkeys(int(pk) for pk in ids))
+            queryset = queryset.filter(pk__in=ids)
+        else:
+            queryset = queryset.filter(estado=Prestamo.EstadoPrestamo.ACTIVO)
+        if obrero is not None:
+            queryset = queryset.filter(obrero=obrero)
+        if obra is not None:
+            queryset = queryset.filter(obra=obra)
+        filas = {
+            pk: (herramienta_id, bodega_id, estado)
+            for pk, herramienta_id, bodega_id, estado
+            in queryset.order_by('pk').values_list('id', 'herramienta_id', 'bodega_id', 'estado')
+        }
+
+        resultados = {}
+        por_estado = {estado: [] for estado in ESTADO_HERRAMIENTA_AL_CERRAR}
+        for pk, (herramienta_id, _, estado) in filas.items():
+            if estado != Prestamo.EstadoPrestamo.ACTIVO:
+                resultados[pk] = {'prestamo': pk, 'herramienta': herramienta_id, 'resultado': YA_CERRADO, 'estado': estado}
+                continue
+            if pk in danados:
+                nuevo = Prestamo.EstadoPrestamo.DAÑADO
+            elif pk in extraviados:
+                nuevo = Prestamo.EstadoPrestamo.EXTRAVIADO
+            else:
+                nuevo = Prestamo.EstadoPrestamo.DEVUELTO
+            por_estado[nuevo].append((pk, herramienta_id))
+            resultados[pk] = {'prestamo': pk, 'herramienta': herramienta_id, 'resultado': nuevo.value, 'estado': nuevo.value}
+
+        for estado, prestamos in por_estado.items():
+            if not prestamos:
+                continue
+            Prestamo.objects.filter(pk__in=[pk for pk, _ in prestamos]).update(
+                estado=estado, fecha_devolucion_real=fecha, observaciones_devolucion=observaciones, atrasado=False,
+            )
+            Herramienta.objects.filter(pk__in=[h for _, h in prestamos]).update(
+                estado=ESTADO_HERRAMIENTA_AL_CERRAR[estado],
+            )
+        cerrados = [pk for pks in por_estado.values() for pk, _ in pks]
+        if cerrados:
+            ubicaciones.registrar_devoluciones(
+                [(h, filas[pk][1]) for pks in por_estado.values() for pk, h in pks], fecha,
+            )
+            _notificar(cerrados)
+
+    for pk in ids or ():
+        resultados.setdefault(pk, {'prestamo': pk, 'herramienta': None, 'resultado': NO_ENCONTRADO, 'estado': None})
+    return [resultados[pk] for pk in (ids or filas)]
+
+
+def marcar_atrasados(fecha=None):
+    """
+    Sincroniza Prestamo.atrasado con la fecha actual: marca los activos
+    vencidos y desmarca los que ya no lo están (devueltos o con la fecha
+    extendida). Primero bloquea y lee los ids de ambos grupos sobre índices,
+    así la notificación solo invalida esos préstamos, y luego los actualiza
+    por pk. Es idempotente: si no cambió nada, no escribe nada. Devuelve
+    (marcados, desmarcados).
+    """
+    fecha = fecha or timezone.localdate()
+    with transaction.atomic():
+        por_marcar = list(
+            Prestamo.objects.vencidos(fecha).filter(atrasado=False)
+            .select_for_update().order_by().values_list('pk', flat=True)
+        )
+        por_desmarcar = list(
+            Prestamo.objects.atrasados()
+            .filter(~Q(estado=Prestamo.EstadoPrestamo.ACTIVO) | Q(fecha_devolucion_estimada__gte=fecha))
+            .select_for_update().order_by().values_list('pk', flat=True)
+        )
+        marcados = Prestamo.objects.filter(pk__in=por_marcar).update(atrasado=True) if por_marcar else 0
+        desmarcados = Prestamo.objects.filter(pk__in=por_desmarcar).update(atrasado=False) if por_desmarcar else 0
+        if marcados or desmarcados:
+            _notificar(por_marcar + por_desmarcar)
+    return marcados, desmarcados
@@ -0,0 +1,127 @@
+"""
+Reporte financiero de obras: presupuesto contra gasto.
+
+Gasto de una obra = materiales consumidos (salidas menos devoluciones, desde
+los acumulados de consumos.py) por su precio unitario + valor de compra de las
+herramientas que tiene prestadas. reporte_obras() lo calcula para todas las
+obras en una sola consulta con subconsultas Sum/F; obtener_reportes() guarda
+cada obra en el caché bajo una versión por obra, y las señales cambian solo
+la versión de las obras afectadas.
+"""
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import ConsumoMensual, Obra, Prestamo
+from .versiones import incrementar_versiones, leer_versiones
+
+
+PREFIJO = 'reporte_obra'
+
+CAMPOS = ['id', 'nombre', 'estado', 'presupuesto_estimado', 'gasto_materiales', 'valor_herramientas',
+          'gasto_total', 'saldo', 'porcentaje_usado']
+
+_DINERO = DecimalField(max_digits=16, decimal_places=2)
+_CERO = Value(Decimal('0'), output_field=_DINERO)
+
+
+def _total_por_obra(queryset, expresion):
+    """Subconsulta correlacionada con la suma de `expresion` para la obra exterior."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(obra=OuterRef('pk')).values('obra')
+            .annotate(total=Sum(expresion, output_field=_DINERO)).values('total'),
+            output_field=_DINERO,
+        ),
+        _CERO,
+    )
+
+
+def reporte_obras(obras=None):
+    """
+    Queryset de Obra anotado con gasto_materiales, valor_herramientas,
+    gasto_total, saldo y porcentaje_usado, calculado en la base de datos.
+    `obras` limita a un queryset o lista de ids.
+    """
+    queryset = Obra.objects.all()
+    if obras is not None:
+        queryset = queryset.filter(pk__in=obras)
+    return (
+        queryset
+        .annotate(
+            gasto_materiales=_total_por_obra(
+                ConsumoMensual.objects.all(),
+                (F('cantidad_salida') - F('cantidad_devuelta')) * F('material__precio_unitario'),
+            ),
+            valor_herramientas=_total_por_obra(
+                Prestamo.objects.activos(), Coalesce(F('herramienta__valor_compra'), _CERO),
+            ),
+        )
+        .annotate(gasto_total=ExpressionWrapper(F('gasto_materiales') + F('valor_herramientas'), output_field=_DINERO))
+        .annotate(
+            saldo=ExpressionWrapper(F('presupuesto_estimado') - F('gasto_total'), output_field=_DINERO),
+            porcentaje_usado=ExpressionWrapper(
+                F('gasto_total') * 100 / NullIf(F('presupuesto_estimado'), _CERO), output_field=_DINERO,
+            ),
+        )
+        .order_by()
+    )
+
+
+def _generacion():
+    """
+    Número que forma parte de las claves y que cambia al invalidar todo (ej:
+    cambió un precio). Parte de la hora actual para que, si el caché lo
+    pierde, nunca vuelva a un valor ya usado.
+    """
+    generacion = cache.get(f'{PREFIJO}:generacion')
+    if generacion is None:
+        cache.add(f'{PREFIJO}:generacion', time.time_ns(), None)
+        generacion = cache.get(f'{PREFIJO}:generacion')
+    return generacion
+
+
+def _clave_version(generacion, pk):
+    return f'{PREFIJO}:{generacion}:{pk}:version'
+
+
+def obtener_reportes(obra_ids):
+    """
+    {obra_id: dict del reporte} para las obras pedidas. Lo que falta en
+    caché se calcula con una sola consulta y se guarda bajo la versión de
+    cada obra leída antes de calcular (ver versiones.leer_versiones).
+    """
+    generacion = _generacion()
+    obra_ids = list(obra_ids)
+    version = leer_versiones(_clave_version(generacion, pk) for pk in obra_ids)
+    claves = {f'{PREFIJO}:{generacion}:{pk}:{version[_clave_version(generacion, pk)]}': pk for pk in obra_ids}
+    encontrados = cache.get_many(claves)
+    reportes = {claves[k]: v for k, v in encontrados.items()}
+    faltan = {pk: k for k, pk in claves.items() if k not in encontrados}
+    if faltan:
+        nuevos = {fila['id']: fila for fila in reporte_obras(list(faltan)).values(*CAMPOS)}
+        cache.set_many(
+            {faltan[pk]: fila for pk, fila in nuevos.items()},
+            getattr(settings, 'REPORTES_CACHE_TIMEOUT', 3600),
+        )
+        reportes.update(nuevos)
+    return reportes
+
+
+def invalidar_obras(obra_ids):
+    """Cambia la versión de esas obras; un cálculo en curso queda guardado en una clave huérfana."""
+    obra_ids = [pk for pk in set(obra_ids) if pk]
+    if obra_ids:
+        generacion = _generacion()
+        incrementar_versiones([_clave_version(generacion, pk) for pk in obra_ids])
+
+
+def invalidar_todo():
+    try:
+        cache.incr(f'{PREFIJO}:generacion')
+    except ValueError:
+        _generacion()
@@ -0,0 +1,206 @@
+"""
+Planificador de reposición: cuándo se queda sin stock cada material en cada
+bodega según su ritmo reciente de salidas.
+
+Para cada fila de InventarioMaterial (par bodega/material):
+
+    tasa diaria      la mayor entre el promedio de salidas de los últimos
+                     VENTANA_CORTA días y el de los últimos VENTANA_LARGA
+                     (si el consumo se aceleró, manda la ventana corta)
+    días a quiebre   cantidad_actual / tasa
+    punto de pedido  tasa * DIAS_ENTREGA + stock_minimo
+    sugerido         lo que falta para cubrir DIAS_ENTREGA + DIAS_COBERTURA
+                     días de consumo más el stock mínimo
+
+Se propone reponer lo que está en o bajo su punto de pedido, ordenado por
+días a quiebre. El historial se lee con un GROUP BY por (bodega, material,
+día) sobre la ventana larga y el cálculo corre en una sola pasada de NumPy
+sobre todos los pares, así que el costo lo domina leer InventarioMaterial.
+
+NumPy es una dependencia opcional: solo se importa al planificar y, si no
+está instalado, se levanta PlanificacionNoDisponible.
+
+Configuración (settings.REPOSICION): VENTANA_CORTA, VENTANA_LARGA,
+DIAS_ENTREGA, DIAS_COBERTURA y CACHE_TIMEOUT (segundos que la vista guarda un
+plan; la clave incluye la versión del inventario).
+"""
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import versiones
+from .models import Bodega, InventarioMaterial, Material, MovimientoInventario
+
+
+CONFIG_POR_DEFECTO = {
+    'VENTANA_CORTA': 7,
+    'VENTANA_LARGA': 28,
+    'DIAS_ENTREGA': 7,
+    'DIAS_COBERTURA': 30,
+    'CACHE_TIMEOUT': 900,
+}
+
+TAMANO_LOTE = 5000
+
+# Filas que guarda y muestra la vista
+LIMITE_VISTA = 200
+
+Tipo = MovimientoInventario.TipoMovimiento
+
+
+class PlanificacionNoDisponible(Exception):
+    """Falta NumPy o la configuración no sirve para planificar."""
+
+
+def configuracion(**cambios):
+    """settings.REPOSICION sobre los valores por defecto; `cambios` (no None) tiene prioridad."""
+    config = {**CONFIG_POR_DEFECTO, **getattr(settings, 'REPOSICION', {})}
+    config.update({clave: valor for clave, valor in cambios.items() if valor is not None})
+    if not 1 <= config['VENTANA_CORTA'] <= config['VENTANA_LARGA']:
+        raise PlanificacionNoDisponible('Se requiere 1 <= VENTANA_CORTA <= VENTANA_LARGA')
+    return config
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise PlanificacionNoDisponible('El planificador de reposición requiere NumPy (pip install numpy)')
+    return numpy
+
+
+def salidas_por_dia(hoy, dias, bodega=None, con_transferencias=False):
+    """
+    (bodega_id, material_id, día, cantidad) de las salidas de los `dias` días
+    completos anteriores a `hoy`. Con `con_transferencias` también cuentan
+    las transferencias salientes (ej: la bodega central que abastece obras).
+    """
+    tipos = [Tipo.SALIDA, Tipo.TRANSFERENCIA] if con_transferencias else [Tipo.SALIDA]
+    queryset = MovimientoInventario.objects.filter(
+        tipo_movimiento__in=tipos,
+        bodega_origen__isnull=False,
+        fecha_movimiento__gte=timezone.make_aware(datetime.combine(hoy - timedelta(days=dias), time.min)),
+        fecha_movimiento__lt=timezone.make_aware(datetime.combine(hoy, time.min)),
+    )
+    if bodega is not None:
+        queryset = queryset.filter(bodega_origen=bodega)
+    return (
+        queryset.annotate(dia=TruncDate('fecha_movimiento'))
+        .values('bodega_origen_id', 'material_id', 'dia')
+        .annotate(total=Sum('cantidad'))
+        .order_by()
+        .values_list('bodega_origen_id', 'material_id', 'dia', 'total')
+    )
+
+
+def calcular(np, stock, salidas, hoy, config):
+    """
+    Pasada vectorizada sobre todos los pares.
+
+    stock: arreglo (n, 4) de [bodega_id, material_id, cantidad, stock_minimo].
+    salidas: (bodega_ids, material_ids, dias, cantidades) de salidas_por_dia().
+    Devuelve (índices de `stock` a reponer ya ordenados, tasa, días a quiebre,
+    sugerido), estos tres alineados con `stock`.
+    """
+    bodegas, materiales, cantidad, minimo = stock.T
+    corta, larga = config['VENTANA_CORTA'], config['VENTANA_LARGA']
+
+    salida_corta = np.zeros(len(stock))
+    salida_larga = np.zeros(len(stock))
+    if len(salidas[0]):
+        s_bodegas = np.asarray(salidas[0], dtype=np.int64)
+        s_materiales = np.asarray(salidas[1], dtype=np.int64)
+        antiguedad = (np.datetime64(hoy, 'D') - np.asarray(salidas[2], dtype='datetime64[D]')).astype(np.int64)
+        totales = np.asarray(salidas[3], dtype=np.float64)
+
+        # Cada par como una sola clave entera para cruzar salidas con stock
+        ancho = int(max(materiales.max(), s_materiales.max())) + 1
+        claves = bodegas * ancho + materiales
+        orden = np.argsort(claves)
+        s_claves = s_bodegas * ancho + s_materiales
+        posicion = np.minimum(np.searchsorted(claves[orden], s_claves), len(claves) - 1)
+        en_stock = claves[orden][posicion] == s_claves
+        filas = orden[posicion[en_stock]]
+        totales, antiguedad = totales[en_stock], antiguedad[en_stock]
+        salida_larga = np.bincount(filas, weights=totales, minlength=len(stock))
+        salida_corta = np.bincount(filas, weights=totales * (antiguedad <= corta), minlength=len(stock))
+
+    tasa = np.maximum(salida_corta / corta, salida_larga / larga)
+    dias_quiebre = np.divide(cantidad, tasa, out=np.full(len(stock), np.inf), where=tasa > 0)
+    punto_pedido = tasa * config['DIAS_ENTREGA'] + minimo
+    # Sin consumo solo se repone lo que ya está bajo el mínimo
+    reponer = (cantidad <= punto_pedido) & ((tasa > 0) | (cantidad < minimo))
+    sugerido = np.ceil(tasa * (config['DIAS_ENTREGA'] + config['DIAS_COBERTURA']) + minimo - cantidad).clip(min=0)
+
+    indices = np.flatnonzero(reponer)
+    # primero el quiebre más cercano; a igual fecha, el de mayor consumo
+    indices = indices[np.lexsort((-tasa[indices], dias_quiebre[indices]))]
+    return indices, tasa, dias_quiebre, sugerido
+
+
+def planificar(hoy=None, bodega=None, limite=None, con_transferencias=False, **config):
+    """
+    Lista de reposición ordenada. Devuelve {'pares', 'a_reponer', 'filas'},
+    donde cada fila trae bodega, material, cantidad, stock_minimo,
+    tasa_diaria, dias_para_quiebre / fecha_quiebre (None si no consume) y
+    cantidad_sugerida. `limite` acota las filas devueltas (None = todas).
+    """
+    np = _numpy()
+    config = configuracion(**config)
+    hoy = hoy or timezone.localdate()
+
+    queryset = InventarioMaterial.objects.order_by()
+    if bodega is not None:
+        queryset = queryset.filter(bodega=bodega)
+    filas_stock = queryset.values_list('bodega_id', 'material_id', 'cantidad_actual', 'material__stock_minimo')
+    # fromiter sobre el cursor: sin lista intermedia de tuplas
+    stock = np.fromiter(chain.from_iterable(filas_stock.iterator(chunk_size=TAMANO_LOTE)), dtype=np.int64).reshape(-1, 4)
+    if not len(stock):
+        return {'pares': 0, 'a_reponer': 0, 'filas': []}
+    salidas = list(salidas_por_dia(hoy, config['VENTANA_LARGA'], bodega, con_transferencias))
+    columnas = tuple(zip(*salidas)) if salidas else ((), (), (), ())
+
+    indices, tasa, dias_quiebre, sugerido = calcular(np, stock, columnas, hoy, config)
+    elegidos = indices if limite is None else indices[:limite]
+
+    bodegas = Bodega.objects.only('nombre').in_bulk({int(stock[i, 0]) for i in elegidos})
+    materiales = Material.objects.only('nombre', 'unidad_medida').in_bulk({int(stock[i, 1]) for i in elegidos})
+    filas = []
+    for i in elegidos:
+        bodega_id, material_id, cantidad, minimo = (int(v) for v in stock[i])
+        dias = float(dias_quiebre[i]) if np.isfinite(dias_quiebre[i]) else None
+        filas.append({
+            'bodega_id': bodega_id,
+            'bodega': bodegas[bodega_id].nombre,
+            'material_id': material_id,
+            'material': materiales[material_id].nombre,
+            'unidad': materiales[material_id].get_unidad_medida_display(),
+            'cantidad': cantidad,
+            'stock_minimo': minimo,
+            'tasa_diaria': round(float(tasa[i]), 2),
+            'dias_para_quiebre': None if dias is None else round(dias, 1),
+            'fecha_quiebre': None if dias is None else hoy + timedelta(days=int(dias)),
+            'cantidad_sugerida': int(sugerido[i]),
+        })
+    return {'pares': len(stock), 'a_reponer': len(indices), 'filas': filas}
+
+
+def obtener_plan(bodega=None, limite=LIMITE_VISTA):
+    """
+    planificar() con la configuración de settings, guardado en caché hasta
+    que cambie el inventario, un material o una bodega (versiones.py), o el día.
+    """
+    clave = (
+        f'reposicion:{versiones.versiones(InventarioMaterial, Material, Bodega)}:'
+        f'{timezone.localdate()}:{bodega}:{limite}'
+    )
+    plan = cache.get(clave)
+    if plan is None:
+        plan = planificar(bodega=bodega, limite=limite)
+        cache.set(clave, plan, configuracion()['CACHE_TIMEOUT'])
+    return plan
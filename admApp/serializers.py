@@ -0,0 +1,122 @@
+from rest_framework import serializers
+
+from .models import (
+    Herramienta, Material, Bodega, InventarioMaterial, Prestamo, MovimientoInventario, Obrero, Obra, UbicacionHerramienta,
+)
+
+
+class CamposDinamicosMixin:
+    """
+    Permite pedir solo algunos campos con ?fields=id,nombre,estado.
+
+    Meta.select_related indica qué relaciones usa cada campo anidado, para que
+    la vista haga el JOIN solo si el cliente pidió esos campos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = campos_pedidos(self.context.get('request'))
+        if campos:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+
+def campos_pedidos(request):
+    if request is None:
+        return None
+    valor = request.query_params.get('fields')
+    if not valor:
+        return None
+    return [c.strip() for c in valor.split(',') if c.strip()]
+
+
+class HerramientaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Herramienta
+        fields = ['id', 'nombre', 'marca', 'modelo', 'numero_serie', 'tipo', 'estado', 'fecha_adquisicion', 'valor_compra', 'activo']
+        select_related = ()
+
+
+class MaterialSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Material
+        fields = ['id', 'nombre', 'unidad_medida', 'precio_unitario', 'stock_minimo', 'proveedor', 'activo']
+        select_related = ()
+
+
+class BodegaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Bodega
+        fields = ['id', 'nombre', 'tipo', 'direccion', 'ciudad', 'region', 'obra', 'encargado', 'capacidad_m3', 'activa']
+        select_related = ()
+
+
+class InventarioMaterialSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    bodega_nombre = serializers.CharField(source='bodega.nombre', read_only=True)
+    material_nombre = serializers.CharField(source='material.nombre', read_only=True)
+    unidad_medida = serializers.CharField(source='material.unidad_medida', read_only=True)
+    stock_minimo = serializers.IntegerField(source='material.stock_minimo', read_only=True)
+
+    class Meta:
+        model = InventarioMaterial
+        fields = ['id', 'bodega', 'bodega_nombre', 'material', 'material_nombre', 'unidad_medida',
+                  'cantidad_actual', 'stock_minimo', 'fecha_ultima_actualizacion']
+        select_related = ('bodega', 'material')
+
+
+class PrestamoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    herramienta_nombre = serializers.CharField(source='herramienta.nombre', read_only=True)
+
+    class Meta:
+        model = Prestamo
+        fields = ['id', 'herramienta', 'herramienta_nombre', 'obrero', 'bodega', 'obra', 'fecha_prestamo',
+                  'fecha_devolucion_estimada', 'fecha_devolucion_real', 'estado', 'atrasado']
+        select_related = ('herramienta',)
+
+
+class MovimientoInventarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    material_nombre = serializers.CharField(source='material.nombre', read_only=True)
+
+    class Meta:
+        model = MovimientoInventario
+        fields = ['id', 'material', 'material_nombre', 'tipo_movimiento', 'cantidad', 'bodega_origen',
+                  'bodega_destino', 'obra', 'transferencia', 'usuario_responsable', 'fecha_movimiento']
+        select_related = ('material',)
+
+
+class UbicacionHerramientaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    herramienta_nombre = serializers.CharField(source='herramienta.nombre', read_only=True)
+    estado = serializers.CharField(source='herramienta.estado', read_only=True)
+    bodega_nombre = serializers.CharField(source='bodega.nombre', read_only=True, default=None)
+    obra_nombre = serializers.CharField(source='obra.nombre', read_only=True, default=None)
+
+    class Meta:
+        model = UbicacionHerramienta
+        fields = ['herramienta', 'herramienta_nombre', 'estado', 'bodega', 'bodega_nombre', 'prestamo',
+                  'obrero', 'obra', 'obra_nombre', 'desde']
+        select_related = ('herramienta', 'bodega', 'obra')
+
+
+class PrestamoLoteSerializer(serializers.Serializer):
+    """Entrada de POST /api/v1/prestamos/lote/"""
+    herramientas = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    obrero = serializers.PrimaryKeyRelatedField(queryset=Obrero.objects.all())
+    bodega = serializers.PrimaryKeyRelatedField(queryset=Bodega.objects.all())
+    obra = serializers.PrimaryKeyRelatedField(queryset=Obra.objects.all())
+    fecha_devolucion_estimada = serializers.DateField()
+    observaciones_prestamo = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class PrestamoDevolucionSerializer(serializers.Serializer):
+    """Entrada de POST /api/v1/prestamos/devolucion/"""
+    prestamos = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=2000)
+    obrero = serializers.PrimaryKeyRelatedField(queryset=Obrero.objects.all(), required=False)
+    obra = serializers.PrimaryKeyRelatedField(queryset=Obra.objects.all(), required=False)
+    danados = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    extraviados = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    observaciones_devolucion = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, datos):
+        if not any(datos.get(campo) for campo in ('prestamos', 'obrero', 'obra')):
+            raise serializers.ValidationError('Indique prestamos, obrero u obra')
+        return datos
@@ -0,0 +1,353 @@
+"""
+Señales propias de admApp.
+
+Las operaciones masivas (bulk_create / bulk_update / update) no disparan
+post_save, así que los servicios envían estas señales al confirmar la
+transacción para que cachés e índices derivados se enteren del cambio.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from . import busqueda, eventos, metrics, reportes, ubicaciones, uso_herramientas, versiones
+from .backends import invalidar_usuario
+from .models import (
+    Usuario, Obra, Obrero, Herramienta, Material, Bodega, InventarioMaterial, InventarioHerramienta, Prestamo,
+    MovimientoInventario, ConsumoMensual,
+)
+
+
+# Enviada por ledger.registrar_movimientos() tras el commit.
+# Argumentos: movimientos (lista de MovimientoInventario ya aplicados). En
+# motores que no devuelven los ids de un bulk_create (MySQL) los lotes de más
+# de un movimiento llegan con pk None: los receptores deben usar solo los
+# campos (bodegas, material, obra, cantidad), no el id.
+movimientos_registrados = Signal()
+
+# Enviada por los servicios de prestamos.py tras actualizar préstamos en bloque.
+# Argumentos: prestamos (lista de ids afectados, o None si pudo ser cualquiera).
+prestamos_actualizados = Signal()
+
+
+# ============================================
+# VALORES ANTERIORES
+# ============================================
+# Los receptores de post_save que dependen de un campo puntual preguntan si
+# cambió en instance._cambios ({campo: valor anterior}): una sola consulta
+# por guardado, y ninguna en altas o si update_fields no incluye esos campos.
+
+VIGILADOS = {
+    Material: ['precio_unitario'],
+    Herramienta: ['valor_compra', 'tipo'],
+    Prestamo: ['herramienta_id', 'obra_id'],
+}
+
+
+@receiver(pre_save, sender=Material)
+@receiver(pre_save, sender=Herramienta)
+@receiver(pre_save, sender=Prestamo)
+def registrar_cambios(sender, instance, update_fields=None, **kwargs):
+    # update_fields trae nombres de campo; las FK se vigilan por su columna (_id)
+    campos = [
+        c for c in VIGILADOS[sender]
+        if update_fields is None or c in update_fields or c.removesuffix('_id') in update_fields
+    ]
+    instance._cambios = {}
+    if instance._state.adding or not campos:
+        return
+    anteriores = sender.objects.filter(pk=instance.pk).values(*campos).first() or {}
+    instance._cambios = {
+        campo: valor for campo, valor in anteriores.items() if valor != getattr(instance, campo)
+    }
+
+
+# ============================================
+# INVALIDACIÓN DE MÉTRICAS DEL DASHBOARD
+# ============================================
+# Los receptores se registran desde AdmappConfig.ready(). Los cambios se
+# aplican al caché recién en el commit, para que una lectura concurrente no
+# vuelva a guardar el valor anterior.
+
+BAJO_MINIMO = ('total_bajo_minimo', 'bajo_minimo_por_bodega', 'bajo_minimo_por_material')
+PRESTAMOS = ('prestamos_activos', 'prestamos_atrasados')
+
+
+@receiver(post_save, sender=Obra)
+@receiver(post_save, sender=Obrero)
+def contar_alta(sender, instance, created, **kwargs):
+    if created:
+        nombre = 'total_obras' if sender is Obra else 'total_obreros'
+        transaction.on_commit(lambda: metrics.ajustar(nombre, 1))
+
+
+@receiver(post_delete, sender=Obra)
+@receiver(post_delete, sender=Obrero)
+def contar_baja(sender, instance, **kwargs):
+    nombre = 'total_obras' if sender is Obra else 'total_obreros'
+    transaction.on_commit(lambda: metrics.ajustar(nombre, -1))
+
+
+@receiver(post_save, sender=Herramienta)
+@receiver(post_delete, sender=Herramienta)
+def invalidar_herramientas(sender, **kwargs):
+    transaction.on_commit(lambda: metrics.invalidar('total_herramientas'))
+
+
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+def invalidar_materiales(sender, **kwargs):
+    # stock_minimo también cambia las alertas de stock
+    transaction.on_commit(lambda: metrics.invalidar('total_materiales', *BAJO_MINIMO))
+
+
+@receiver(post_save, sender=InventarioMaterial)
+@receiver(post_delete, sender=InventarioMaterial)
+@receiver(movimientos_registrados, sender=MovimientoInventario)
+def invalidar_stock(sender, **kwargs):
+    transaction.on_commit(lambda: metrics.invalidar(*BAJO_MINIMO))
+
+
+@receiver(post_save, sender=Bodega)
+def invalidar_bodegas(sender, created, **kwargs):
+    # el conteo por bodega guarda su nombre; una bodega nueva aún no tiene stock
+    # (al borrarla, el CASCADE de InventarioMaterial ya invalida)
+    if not created:
+        transaction.on_commit(lambda: metrics.invalidar('bajo_minimo_por_bodega'))
+
+
+@receiver(post_save, sender=Prestamo)
+@receiver(post_delete, sender=Prestamo)
+@receiver(prestamos_actualizados, sender=Prestamo)
+def invalidar_prestamos(sender, **kwargs):
+    transaction.on_commit(lambda: metrics.invalidar(*PRESTAMOS))
+
+
+# ============================================
+# INVALIDACIÓN DEL CACHÉ DE USUARIOS (backends.py)
+# ============================================
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_cache_usuario(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidar_usuario(pk))
+
+
+# ============================================
+# INVALIDACIÓN DEL REPORTE FINANCIERO DE OBRAS (reportes.py)
+# ============================================
+
+@receiver(movimientos_registrados, sender=MovimientoInventario)
+def invalidar_reporte_por_movimientos(sender, movimientos, **kwargs):
+    obras = {mov.obra_id for mov in movimientos}
+    transaction.on_commit(lambda: reportes.invalidar_obras(obras))
+
+
+@receiver(post_save, sender=Obra)
+@receiver(post_delete, sender=Obra)
+@receiver(post_save, sender=Prestamo)
+@receiver(post_delete, sender=Prestamo)
+def invalidar_reporte_obra(sender, instance, **kwargs):
+    obra_id = instance.pk if sender is Obra else instance.obra_id
+    transaction.on_commit(lambda: reportes.invalidar_obras([obra_id]))
+
+
+@receiver(prestamos_actualizados, sender=Prestamo)
+def invalidar_reporte_por_prestamos(sender, prestamos, **kwargs):
+    if prestamos is None:
+        transaction.on_commit(reportes.invalidar_todo)
+        return
+    obras = set(Prestamo.objects.filter(pk__in=prestamos).values_list('obra_id', flat=True).distinct())
+    transaction.on_commit(lambda: reportes.invalidar_obras(obras))
+
+
+# Campo de cada modelo que entra en el gasto de las obras
+PRECIOS = {Material: 'precio_unitario', Herramienta: 'valor_compra'}
+
+
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Herramienta)
+def invalidar_reportes_por_precios(sender, instance, **kwargs):
+    # Un alta o un cambio de nombre no mueven el gasto: solo el precio, y solo
+    # en las obras que consumieron el material o tienen la herramienta prestada
+    if PRECIOS[sender] not in instance._cambios:
+        return
+    if sender is Material:
+        obras = ConsumoMensual.objects.filter(material_id=instance.pk)
+    else:
+        obras = Prestamo.objects.activos().filter(herramienta_id=instance.pk)
+    obras = set(obras.order_by().values_list('obra_id', flat=True).distinct())
+    transaction.on_commit(lambda: reportes.invalidar_obras(obras))
+
+
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Herramienta)
+def invalidar_reportes_por_baja(sender, **kwargs):
+    # la cascada ya borró consumos y préstamos: no se sabe qué obras tenían
+    transaction.on_commit(reportes.invalidar_todo)
+
+
+# ============================================
+# ÍNDICE DE BÚSQUEDA GLOBAL (busqueda.py)
+# ============================================
+# Se escribe en la misma transacción que el objeto, así un rollback también
+# deshace el cambio en el índice.
+
+@receiver(post_save, sender=Herramienta)
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Obra)
+@receiver(post_save, sender=Bodega)
+def indexar_busqueda(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(busqueda.campos_indexados(sender)):
+        return
+    busqueda.indexar(instance)
+
+
+@receiver(post_delete, sender=Herramienta)
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Obra)
+@receiver(post_delete, sender=Bodega)
+def quitar_de_busqueda(sender, instance, **kwargs):
+    busqueda.quitar(sender, instance.pk)
+
+
+# ============================================
+# VERSIONES DE LOS LISTADOS (versiones.py)
+# ============================================
+# Cualquier cambio en un modelo invalida los fragmentos en caché de los
+# listados que lo muestran (ej: renombrar una bodega cambia inventario_list).
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_save, sender=Obra)
+@receiver(post_delete, sender=Obra)
+@receiver(post_save, sender=Obrero)
+@receiver(post_delete, sender=Obrero)
+@receiver(post_save, sender=Herramienta)
+@receiver(post_delete, sender=Herramienta)
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+@receiver(post_save, sender=Bodega)
+@receiver(post_delete, sender=Bodega)
+@receiver(post_save, sender=InventarioMaterial)
+@receiver(post_delete, sender=InventarioMaterial)
+@receiver(post_save, sender=Prestamo)
+@receiver(post_delete, sender=Prestamo)
+def incrementar_version(sender, **kwargs):
+    transaction.on_commit(lambda: versiones.incrementar(sender))
+
+
+@receiver(movimientos_registrados, sender=MovimientoInventario)
+def incrementar_version_inventario(sender, **kwargs):
+    transaction.on_commit(lambda: versiones.incrementar(InventarioMaterial))
+
+
+@receiver(prestamos_actualizados, sender=Prestamo)
+def incrementar_version_prestamos(sender, **kwargs):
+    # prestar y devolver también cambian el estado de las herramientas
+    transaction.on_commit(lambda: versiones.incrementar(Prestamo, Herramienta))
+
+
+# ============================================
+# STOCK EN VIVO (eventos.py)
+# ============================================
+
+@receiver(movimientos_registrados, sender=MovimientoInventario)
+def publicar_movimientos(sender, movimientos, **kwargs):
+    por_bodega = defaultdict(set)
+    for mov in movimientos:
+        for bodega_id in (mov.bodega_origen_id, mov.bodega_destino_id):
+            if bodega_id:
+                por_bodega[bodega_id].add(mov.material_id)
+
+    def publicar():
+        for bodega_id, material_ids in por_bodega.items():
+            eventos.publicar(bodega_id, material_ids)
+    transaction.on_commit(publicar)
+
+
+@receiver(post_save, sender=InventarioMaterial)
+@receiver(post_delete, sender=InventarioMaterial)
+def publicar_inventario(sender, instance, **kwargs):
+    bodega_id, material_id = instance.bodega_id, instance.material_id
+    transaction.on_commit(lambda: eventos.publicar(bodega_id, {material_id}))
+
+
+# ============================================
+# UBICACIÓN DE HERRAMIENTAS (ubicaciones.py)
+# ============================================
+# prestar/devolver la actualizan en su propia transacción; esto cubre los
+# cambios hechos de a uno (alta de herramienta, admin). Se recalcula tras el
+# commit: al borrar una herramienta, la cascada pasa por aquí antes de que
+# desaparezca la herramienta.
+
+@receiver(post_save, sender=Herramienta)
+def ubicar_herramienta_nueva(sender, instance, created, **kwargs):
+    if created:
+        pk = instance.pk
+        transaction.on_commit(lambda: ubicaciones.actualizar([pk]))
+
+
+@receiver(post_save, sender=InventarioHerramienta)
+@receiver(post_delete, sender=InventarioHerramienta)
+@receiver(post_save, sender=Prestamo)
+@receiver(post_delete, sender=Prestamo)
+def actualizar_ubicacion(sender, instance, **kwargs):
+    herramienta_id = instance.herramienta_id
+    transaction.on_commit(lambda: ubicaciones.actualizar([herramienta_id]))
+
+
+# ============================================
+# ESTADÍSTICAS DE USO DE HERRAMIENTAS (uso_herramientas.py)
+# ============================================
+# Solo se borran los grupos de los préstamos tocados; el resto sigue en caché.
+
+@receiver(post_save, sender=Prestamo)
+@receiver(post_delete, sender=Prestamo)
+def invalidar_uso_prestamo(sender, instance, **kwargs):
+    # si la edición lo movió de herramienta u obra, también los grupos anteriores
+    cambios = getattr(instance, '_cambios', {})
+    herramientas = {instance.herramienta_id, cambios.get('herramienta_id')} - {None}
+    obras = [instance.obra_id, cambios.get('obra_id')]
+    tipos = list(Herramienta.objects.filter(pk__in=herramientas).values_list('tipo', flat=True).distinct())
+    transaction.on_commit(lambda: uso_herramientas.invalidar(herramientas, tipos, obras))
+
+
+@receiver(prestamos_actualizados, sender=Prestamo)
+def invalidar_uso_por_prestamos(sender, prestamos, **kwargs):
+    if prestamos is None:
+        transaction.on_commit(uso_herramientas.invalidar_todo)
+        return
+    grupos = uso_herramientas.grupos_de_prestamos(prestamos)
+    transaction.on_commit(lambda: uso_herramientas.invalidar(*grupos))
+
+
+@receiver(post_save, sender=Herramienta)
+def invalidar_uso_herramienta(sender, instance, created, **kwargs):
+    # altas y cambios de tipo mueven la cantidad de herramientas de los tipos;
+    # editar otros campos no cambia ninguna estadística
+    if created:
+        tipos = [instance.tipo]
+    elif 'tipo' in instance._cambios:
+        tipos = [instance._cambios['tipo'], instance.tipo]
+    else:
+        return
+    herramientas = [instance.pk]
+
+    def invalidar():
+        uso_herramientas.invalidar(herramientas, tipos)
+        uso_herramientas.invalidar_lista_de_tipos()
+    transaction.on_commit(invalidar)
+
+
+@receiver(post_delete, sender=Herramienta)
+def invalidar_uso_herramienta_borrada(sender, instance, **kwargs):
+    # sus préstamos ya pasaron por invalidar_uso_prestamo en la cascada
+    herramientas, tipos = [instance.pk], [instance.tipo]
+
+    def invalidar():
+        uso_herramientas.invalidar(herramientas, tipos)
+        uso_herramientas.invalidar_lista_de_tipos()
+    transaction.on_commit(invalidar)
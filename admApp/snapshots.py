@@ -0,0 +1,162 @@
+"""
+Stock histórico a partir de snapshots de inventario.
+
+tomar_snapshot() copia InventarioMaterial.cantidad_actual a SnapshotInventario.
+Para saber cuánto había de un material en una bodega en una fecha se parte del
+snapshot más cercano anterior a esa fecha y se suman solo los movimientos
+posteriores, así el costo depende de la frecuencia de los snapshots y no de la
+antigüedad del libro de movimientos.
+
+Convención de signos (igual que ledger.deltas_por_fila): un movimiento suma en
+su bodega_destino y resta en su bodega_origen.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import InventarioMaterial, MovimientoInventario, SnapshotInventario
+
+
+TAMANO_LOTE = 5000
+
+# Los snapshots incrementales vuelven a copiar las filas modificadas un poco
+# antes del snapshot anterior, por si alguna transacción confirmó tarde
+MARGEN_INCREMENTAL = timedelta(minutes=10)
+
+
+def tomar_snapshot(completo=False, tamano_lote=TAMANO_LOTE):
+    """
+    Guarda la cantidad actual de las filas de inventario, por lotes de pk.
+
+    Si completo=False solo copia las filas modificadas desde el último
+    snapshot: las que no cambiaron siguen representadas por su snapshot
+    anterior. Cada lote bloquea sus filas y toma la hora después del bloqueo,
+    para que el snapshot incluya exactamente los movimientos con fecha
+    anterior. Devuelve la cantidad de filas copiadas.
+    """
+    queryset = InventarioMaterial.objects.all()
+    if not completo:
+        ultimo = SnapshotInventario.objects.aggregate(fecha=Max('fecha'))['fecha']
+        if ultimo:
+            queryset = queryset.filter(fecha_ultima_actualizacion__gt=ultimo - MARGEN_INCREMENTAL)
+
+    copiadas = 0
+    desde = 0
+    while True:
+        with transaction.atomic():
+            filas = list(
+                queryset.select_for_update().filter(pk__gt=desde).order_by('pk')
+                .values_list('pk', 'bodega_id', 'material_id', 'cantidad_actual')[:tamano_lote]
+            )
+            if not filas:
+                return copiadas
+            fecha = timezone.now()
+            SnapshotInventario.objects.bulk_create([
+                SnapshotInventario(bodega_id=bodega_id, material_id=material_id, cantidad=cantidad, fecha=fecha)
+                for _, bodega_id, material_id, cantidad in filas
+            ])
+        copiadas += len(filas)
+        desde = filas[-1][0]
+
+
+def _delta(bodega_id):
+    """Expresión del efecto neto de un movimiento sobre `bodega_id`."""
+    return Case(
+        When(bodega_destino_id=bodega_id, then='cantidad'),
+        When(bodega_origen_id=bodega_id, then=-F('cantidad')),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _neto(bodega_id, material_id, desde=None, hasta=None):
+    """Suma de movimientos del par en (desde, hasta]."""
+    movimientos = MovimientoInventario.objects.filter(
+        Q(bodega_origen_id=bodega_id) | Q(bodega_destino_id=bodega_id), material_id=material_id,
+    )
+    if desde is not None:
+        movimientos = movimientos.filter(fecha_movimiento__gt=desde)
+    if hasta is not None:
+        movimientos = movimientos.filter(fecha_movimiento__lte=hasta)
+    return movimientos.aggregate(neto=Coalesce(Sum(_delta(bodega_id)), 0))['neto']
+
+
+def stock_en_fecha(bodega, material, fecha):
+    """
+    Cantidad de `material` en `bodega` al momento `fecha`.
+
+    Usa el snapshot anterior más cercano y suma los movimientos hasta `fecha`.
+    Si no hay ninguno anterior, parte del snapshot siguiente (o del stock
+    actual) y descuenta los movimientos posteriores a `fecha`.
+    """
+    bodega_id = getattr(bodega, 'pk', bodega)
+    material_id = getattr(material, 'pk', material)
+    snapshots = SnapshotInventario.objects.filter(bodega_id=bodega_id, material_id=material_id)
+
+    anterior = snapshots.filter(fecha__lte=fecha).order_by('-fecha').values_list('cantidad', 'fecha').first()
+    if anterior:
+        cantidad, desde = anterior
+        return cantidad + _neto(bodega_id, material_id, desde=desde, hasta=fecha)
+
+    siguiente = snapshots.filter(fecha__gt=fecha).order_by('fecha').values_list('cantidad', 'fecha').first()
+    if siguiente:
+        cantidad, hasta = siguiente
+    else:
+        cantidad = (
+            InventarioMaterial.objects.filter(bodega_id=bodega_id, material_id=material_id)
+            .values_list('cantidad_actual', flat=True).first() or 0
+        )
+        hasta = None
+    return cantidad - _neto(bodega_id, material_id, desde=fecha, hasta=hasta)
+
+
+def stock_bodega_en_fecha(bodega, fecha):
+    """
+    {material_id: cantidad} de todos los materiales de la bodega a `fecha`.
+
+    Una consulta resuelve, por material, el snapshot anterior y la suma de
+    movimientos posteriores. Los materiales sin snapshot anterior (fechas
+    previas al primer snapshot) se calculan con una segunda consulta,
+    descontando del stock actual los movimientos posteriores a `fecha`.
+    """
+    bodega_id = getattr(bodega, 'pk', bodega)
+    snapshot = SnapshotInventario.objects.filter(
+        bodega_id=OuterRef('bodega_id'), material_id=OuterRef('material_id'), fecha__lte=fecha,
+    ).order_by('-fecha')
+    movimientos = MovimientoInventario.objects.filter(
+        Q(bodega_origen_id=OuterRef('bodega_id')) | Q(bodega_destino_id=OuterRef('bodega_id')),
+        material_id=OuterRef('material_id'),
+        fecha_movimiento__gt=OuterRef('snapshot_fecha'),
+        fecha_movimiento__lte=fecha,
+    ).values('material_id').annotate(neto=Sum(_delta(bodega_id))).values('neto')
+
+    filas = (
+        InventarioMaterial.objects.filter(bodega_id=bodega_id)
+        .annotate(
+            snapshot_cantidad=Subquery(snapshot.values('cantidad')[:1]),
+            snapshot_fecha=Subquery(snapshot.values('fecha')[:1]),
+        )
+        .annotate(neto=Coalesce(Subquery(movimientos, output_field=IntegerField()), 0))
+        .values_list('material_id', 'snapshot_cantidad', 'neto', 'cantidad_actual')
+    )
+    stock = {}
+    sin_snapshot = {}
+    for material_id, cantidad, neto, cantidad_actual in filas:
+        if cantidad is None:
+            sin_snapshot[material_id] = cantidad_actual
+        else:
+            stock[material_id] = cantidad + neto
+
+    if sin_snapshot:
+        posteriores = dict(
+            MovimientoInventario.objects
+            .filter(Q(bodega_origen_id=bodega_id) | Q(bodega_destino_id=bodega_id),
+                    material_id__in=list(sin_snapshot), fecha_movimiento__gt=fecha)
+            .values('material_id').annotate(neto=Sum(_delta(bodega_id))).values_list('material_id', 'neto')
+        )
+        for material_id, cantidad_actual in sin_snapshot.items():
+            stock[material_id] = cantidad_actual - posteriores.get(material_id, 0)
+    return stock
@@ -0,0 +1,49 @@
+"""Objetos mínimos para las pruebas de admApp."""
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import count
+
+from admApp.models import Bodega, Herramienta, InventarioMaterial, Material, Obra, Obrero, Usuario
+
+
+_secuencia = count(1)
+
+
+def usuario(rol=Usuario.TipoRol.ADMINISTRADOR, **campos):
+    n = next(_secuencia)
+    return Usuario.objects.create_user(
+        username=f'usuario{n}', password='clave-de-prueba', rut=f'{n}-K', rol=rol, **campos,
+    )
+
+
+def obra(**campos):
+    return Obra.objects.create(**{
+        'nombre': f'Obra {next(_secuencia)}', 'direccion': 'Calle 1', 'ciudad': 'Santiago', 'region': 'RM',
+        'fecha_inicio': date.today(), 'fecha_fin_estimada': date.today() + timedelta(days=90),
+        'presupuesto_estimado': Decimal('1000000'), **campos,
+    })
+
+
+def bodega(**campos):
+    return Bodega.objects.create(**{
+        'nombre': f'Bodega {next(_secuencia)}', 'direccion': 'Calle 2', 'ciudad': 'Santiago', 'region': 'RM',
+        **campos,
+    })
+
+
+def material(**campos):
+    return Material.objects.create(**{
+        'nombre': f'Material {next(_secuencia)}', 'precio_unitario': Decimal('1000'), **campos,
+    })
+
+
+def stock(bodega, material, cantidad):
+    return InventarioMaterial.objects.create(bodega=bodega, material=material, cantidad_actual=cantidad)
+
+
+def herramienta(**campos):
+    return Herramienta.objects.create(**{'nombre': f'Taladro {next(_secuencia)}', 'tipo': 'Eléctrica', **campos})
+
+
+def obrero(**campos):
+    return Obrero.objects.create(usuario=usuario(rol=Usuario.TipoRol.OBRERO), especialidad='Albañil', **campos)
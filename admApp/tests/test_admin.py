@@ -0,0 +1,36 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from admApp.models import InventarioMaterial, MovimientoInventario
+
+from . import datos
+
+
+class MovimientoInventarioAdminTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(datos.usuario(is_staff=True, is_superuser=True))
+        self.bodega = datos.bodega()
+        self.material = datos.material()
+        datos.stock(self.bodega, self.material, 5)
+        self.url = reverse('admin:admApp_movimientoinventario_add')
+
+    def post(self, cantidad):
+        return self.client.post(self.url, {
+            'material': self.material.pk, 'bodega_origen': self.bodega.pk, 'tipo_movimiento': 'SALIDA',
+            'cantidad': cantidad, 'motivo': '',
+        }, headers={'host': 'localhost'})
+
+    def test_alta_descuenta_stock(self):
+        respuesta = self.post(3)
+        self.assertEqual(respuesta.status_code, 302)
+        movimiento = MovimientoInventario.objects.get()
+        self.assertEqual(InventarioMaterial.objects.get().cantidad_actual, 2)
+        self.assertIsNotNone(movimiento.usuario_responsable)
+
+    def test_stock_insuficiente_es_error_del_formulario(self):
+        respuesta = self.post(6)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'Stock insuficiente')
+        self.assertFalse(MovimientoInventario.objects.exists())
+        self.assertEqual(InventarioMaterial.objects.get().cantidad_actual, 5)
@@ -0,0 +1,66 @@
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from admApp.backends import CachedModelBackend, invalidar_usuario, usuarios
+from admApp.models import Usuario
+
+from . import datos
+
+
+class CachedModelBackendTests(TestCase):
+
+    def setUp(self):
+        usuarios.limpiar()
+        self.backend = CachedModelBackend()
+        self.usuario = datos.usuario(rol=Usuario.TipoRol.BODEGUERO)
+
+    def test_con_cache_local_siempre_consulta_la_base(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.backend.get_user(self.usuario.pk), self.usuario)
+
+
+class CachedModelBackendCompartidoTests(TestCase):
+    """Con un caché compartido entre procesos (aquí, en archivos) el LRU sí se usa."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        cambio = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directorio.name,
+        }})
+        cambio.enable()
+        self.addCleanup(cambio.disable)
+        usuarios.limpiar()
+        self.addCleanup(usuarios.limpiar)
+        self.backend = CachedModelBackend()
+        self.usuario = datos.usuario(rol=Usuario.TipoRol.BODEGUERO)
+
+    def test_segunda_lectura_sale_del_lru(self):
+        self.backend.get_user(self.usuario.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.usuario.pk).rol, Usuario.TipoRol.BODEGUERO)
+
+    def test_invalidar_descarta_la_copia(self):
+        self.backend.get_user(self.usuario.pk)
+        Usuario.objects.filter(pk=self.usuario.pk).update(rol=Usuario.TipoRol.SUPERVISOR)
+        invalidar_usuario(self.usuario.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get_user(self.usuario.pk).rol, Usuario.TipoRol.SUPERVISOR)
+
+    def test_otro_proceso_ve_la_version_nueva(self):
+        self.backend.get_user(self.usuario.pk)
+        # otro worker solo cambia la versión compartida; la copia local de este sigue ahí
+        copia = usuarios._entradas[self.usuario.pk]
+        invalidar_usuario(self.usuario.pk)
+        usuarios._entradas[self.usuario.pk] = copia
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.usuario.pk)
+
+    def test_desactivar_al_guardar_invalida_tras_el_commit(self):
+        self.backend.get_user(self.usuario.pk)
+        self.usuario.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.save()
+        self.assertIsNone(self.backend.get_user(self.usuario.pk))
@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from admApp.ledger import MovimientoInvalido, StockInsuficiente, registrar_movimientos
+from admApp.models import InventarioMaterial, MovimientoInventario
+
+from . import datos
+
+
+Tipo = MovimientoInventario.TipoMovimiento
+
+
+def cantidad(bodega, material):
+    return InventarioMaterial.objects.get(bodega=bodega, material=material).cantidad_actual
+
+
+class RegistrarMovimientosTests(TestCase):
+
+    def setUp(self):
+        self.central = datos.bodega(tipo='CENTRAL')
+        self.obra = datos.bodega()
+        self.cemento = datos.material()
+        self.arena = datos.material()
+        datos.stock(self.central, self.cemento, 100)
+        datos.stock(self.central, self.arena, 10)
+
+    def movimiento(self, material, cantidad, tipo=Tipo.TRANSFERENCIA, origen=None, destino=None):
+        return MovimientoInventario(
+            material=material, cantidad=cantidad, tipo_movimiento=tipo,
+            bodega_origen=origen, bodega_destino=destino,
+        )
+
+    def test_lote_aplica_el_efecto_neto_por_fila(self):
+        registrar_movimientos([
+            self.movimiento(self.cemento, 30, origen=self.central, destino=self.obra),
+            self.movimiento(self.cemento, 5, Tipo.SALIDA, origen=self.central),
+            self.movimiento(self.arena, 4, origen=self.central, destino=self.obra),
+            self.movimiento(self.cemento, 2, Tipo.ENTRADA, destino=self.central),
+        ])
+        self.assertEqual(cantidad(self.central, self.cemento), 67)
+        self.assertEqual(cantidad(self.obra, self.cemento), 30)
+        self.assertEqual(cantidad(self.central, self.arena), 6)
+        self.assertEqual(cantidad(self.obra, self.arena), 4)
+        self.assertEqual(MovimientoInventario.objects.count(), 4)
+
+    def test_stock_insuficiente_no_aplica_nada_del_lote(self):
+        with self.assertRaises(StockInsuficiente) as error:
+            registrar_movimientos([
+                self.movimiento(self.cemento, 30, origen=self.central, destino=self.obra),
+                self.movimiento(self.arena, 11, origen=self.central, destino=self.obra),
+            ])
+        self.assertEqual([(inv.material, falta) for inv, falta in error.exception.faltantes], [(self.arena, 1)])
+        self.assertEqual(cantidad(self.central, self.cemento), 100)
+        self.assertEqual(cantidad(self.central, self.arena), 10)
+        self.assertFalse(InventarioMaterial.objects.filter(bodega=self.obra).exists())
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+    def test_crea_las_filas_de_inventario_que_faltan(self):
+        nuevo = datos.material()
+        registrar_movimientos([
+            self.movimiento(nuevo, 7, Tipo.ENTRADA, destino=self.obra),
+            self.movimiento(self.cemento, 3, origen=self.central, destino=self.obra),
+        ])
+        self.assertEqual(cantidad(self.obra, nuevo), 7)
+        self.assertEqual(cantidad(self.obra, self.cemento), 3)
+
+    def test_movimiento_invalido(self):
+        with self.assertRaises(MovimientoInvalido):
+            registrar_movimientos([self.movimiento(self.cemento, 1, Tipo.SALIDA, destino=self.obra)])
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+    def test_consultas_constantes_segun_el_tamano_del_lote(self):
+        materiales = [datos.material() for _ in range(20)]
+        for m in materiales:
+            datos.stock(self.central, m, 50)
+            datos.stock(self.obra, m, 0)
+
+        def lote(n):
+            return [self.movimiento(m, 1, origen=self.central, destino=self.obra) for m in materiales[:n]]
+
+        # un lote diez veces mayor hace las mismas consultas
+        with CaptureQueriesContext(connection) as chico:
+            registrar_movimientos(lote(2))
+        with self.assertNumQueries(len(chico)):
+            registrar_movimientos(lote(20))
+        self.assertEqual(cantidad(self.obra, materiales[19]), 1)
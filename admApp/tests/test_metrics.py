@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from admApp import metrics
+
+from . import datos
+
+
+class AjustarTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.total = 10
+
+    def obtener(self):
+        return metrics.obtener_metricas(['total_obras'])['total_obras']
+
+    def calcular(self):
+        return self.total
+
+    def test_ajusta_el_valor_en_cache(self):
+        with mock.patch.dict(metrics.METRICAS, {'total_obras': self.calcular}):
+            self.assertEqual(self.obtener(), 10)
+            self.total = 99
+            metrics.ajustar('total_obras', 1)
+            self.assertEqual(self.obtener(), 11)
+
+    def test_un_cambio_durante_el_calculo_no_deja_el_valor_viejo(self):
+        def calcular_y_cambiar():
+            # otra transacción confirma un alta mientras se cuenta
+            valor = self.total
+            self.total += 1
+            metrics.ajustar('total_obras', 1)
+            return valor
+
+        with mock.patch.dict(metrics.METRICAS, {'total_obras': calcular_y_cambiar}):
+            self.assertEqual(self.obtener(), 10)
+        with mock.patch.dict(metrics.METRICAS, {'total_obras': self.calcular}):
+            self.assertEqual(self.obtener(), 11)
+
+    def test_invalidar_descarta_el_valor(self):
+        with mock.patch.dict(metrics.METRICAS, {'total_obras': self.calcular}):
+            self.obtener()
+            self.total = 12
+            metrics.invalidar('total_obras')
+            self.assertEqual(self.obtener(), 12)
+
+
+class InvalidarPorBodegaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.bodega = datos.bodega(nombre='Bodega Norte')
+        datos.stock(self.bodega, datos.material(stock_minimo=10), 2)
+
+    def nombres(self):
+        filas = metrics.obtener_metricas(['bajo_minimo_por_bodega'])['bajo_minimo_por_bodega']
+        return [fila['bodega__nombre'] for fila in filas]
+
+    def test_renombrar_la_bodega_actualiza_el_conteo(self):
+        self.assertEqual(self.nombres(), ['Bodega Norte'])
+        self.bodega.nombre = 'Bodega Sur'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bodega.save()
+        self.assertEqual(self.nombres(), ['Bodega Sur'])
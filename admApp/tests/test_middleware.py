@@ -0,0 +1,57 @@
+import json
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from admApp import paralelo
+from admApp.middleware import InstrumentacionMiddleware
+from admApp.models import Usuario
+
+from . import datos
+
+
+@override_settings(INSTRUMENTACION={'MUESTREO': 1.0})
+class InstrumentacionTests(TransactionTestCase):
+
+    def setUp(self):
+        self.addCleanup(paralelo.cerrar)
+        self.client.force_login(datos.usuario(rol=Usuario.TipoRol.BODEGUERO))
+
+    def registrar(self, url):
+        with self.assertLogs('admApp.instrumentacion') as logs:
+            self.client.get(url)
+        return json.loads(logs.records[-1].getMessage())
+
+    def test_vista_sincrona(self):
+        linea = self.registrar(reverse('inventario_bajo_minimo_resumen'))
+        self.assertGreater(linea['consultas'], 0)
+        self.assertEqual(linea['consultas_en_paralelo'], 0)
+
+    def test_cuenta_las_consultas_de_en_paralelo(self):
+        linea = self.registrar(reverse('async_inventario_bajo_minimo_resumen'))
+        self.assertGreaterEqual(linea['consultas_en_paralelo'], 3)
+
+    @override_settings(INSTRUMENTACION={'MUESTREO': 0.0})
+    def test_apagado_por_defecto_no_registra(self):
+        with self.assertNoLogs('admApp.instrumentacion'):
+            self.client.get(reverse('inventario_bajo_minimo_resumen'))
+
+    async def test_ruta_async_sin_pasar_por_un_hilo(self):
+        async def vista(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(InstrumentacionMiddleware(vista)))
+        self.assertFalse(iscoroutinefunction(InstrumentacionMiddleware(lambda request: HttpResponse())))
+
+    async def test_cuenta_las_consultas_de_una_vista_async(self):
+        # sesión y usuario se leen en el hilo del ORM; el resto, en el pool
+        usuario = await sync_to_async(datos.usuario)(rol=Usuario.TipoRol.BODEGUERO)
+        await self.async_client.aforce_login(usuario)
+        with self.assertLogs('admApp.instrumentacion') as logs:
+            await self.async_client.get(reverse('async_inventario_bajo_minimo_resumen'))
+        linea = json.loads(logs.records[-1].getMessage())
+        self.assertGreaterEqual(linea['consultas_en_paralelo'], 3)
+        self.assertGreater(linea['consultas'], linea['consultas_en_paralelo'])
+
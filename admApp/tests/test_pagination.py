@@ -0,0 +1,52 @@
+from django.test import RequestFactory, TestCase
+
+from admApp.models import Herramienta
+from admApp.pagination import PaginaCursor, paginar
+
+from . import datos
+
+
+class PaginaCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # nombres repetidos fuerzan el desempate por pk
+        for i in range(7):
+            datos.herramienta(nombre=f'Taladro {i // 2}', marca='Bosch')
+        cls.todos = list(Herramienta.objects.order_by('nombre', 'marca', 'pk'))
+
+    def test_avanza_y_retrocede_sin_saltar_ni_repetir(self):
+        paginas = []
+        pagina = PaginaCursor(Herramienta.objects.all(), None, 3)
+        while True:
+            paginas.append(list(pagina))
+            if not pagina.has_next:
+                break
+            pagina = PaginaCursor(Herramienta.objects.all(), pagina.next_cursor, 3)
+        self.assertEqual([m for p in paginas for m in p], self.todos)
+        self.assertEqual([len(p) for p in paginas], [3, 3, 1])
+        self.assertTrue(pagina.has_previous)
+
+        # desde la última hacia atrás se recorren las mismas páginas
+        atras = [list(pagina)]
+        while pagina.has_previous:
+            pagina = PaginaCursor(Herramienta.objects.all(), pagina.previous_cursor, 3)
+            atras.append(list(pagina))
+        self.assertEqual(atras[::-1], paginas)
+        self.assertFalse(pagina.has_previous)
+
+    def test_orden_descendente(self):
+        queryset = Herramienta.objects.order_by('-nombre')
+        primera = PaginaCursor(queryset, None, 4)
+        segunda = PaginaCursor(queryset, primera.next_cursor, 4)
+        self.assertEqual(list(primera) + list(segunda), self.todos[::-1])
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        request = RequestFactory().get('/', {'cursor': 'no-es-un-cursor', 'page_size': 2})
+        self.assertEqual(list(paginar(request, Herramienta.objects.all())), self.todos[:2])
+
+    def test_consultas_de_la_pagina(self):
+        pagina = PaginaCursor(Herramienta.objects.all(), PaginaCursor(Herramienta.objects.all(), None, 3).next_cursor, 3)
+        with self.assertNumQueries(1):
+            list(pagina)
+            pagina.has_next, pagina.has_previous
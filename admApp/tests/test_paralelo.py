@@ -0,0 +1,41 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TransactionTestCase
+
+from admApp import paralelo
+from admApp.models import Bodega
+
+
+def conexion_usada():
+    Bodega.objects.exists()
+    return connection
+
+
+class EnParaleloTests(TransactionTestCase):
+
+    def setUp(self):
+        cambio = mock.patch.object(paralelo, 'HILOS', 1)
+        cambio.start()
+        self.addCleanup(cambio.stop)
+        paralelo.cerrar()
+        self.addCleanup(paralelo.cerrar)
+
+    def test_reutiliza_la_conexion_del_hilo(self):
+        primera, = async_to_sync(paralelo.en_paralelo)(conexion_usada)
+        abierta = primera.connection
+        segunda, = async_to_sync(paralelo.en_paralelo)(conexion_usada)
+        self.assertIs(segunda, primera)
+        self.assertIs(segunda.connection, abierta)
+
+    def test_cerrar_cierra_las_conexiones_en_cada_hilo_del_pool(self):
+        # SQLite en memoria ignora close(): se verifica en qué hilo se llama
+        hilos = []
+        async_to_sync(paralelo.en_paralelo)(conexion_usada)
+        with mock.patch.object(paralelo.connections, 'close_all',
+                               side_effect=lambda: hilos.append(threading.current_thread().name)):
+            paralelo.cerrar()
+        self.assertEqual(len(hilos), 1)
+        self.assertTrue(hilos[0].startswith('paralelo'))
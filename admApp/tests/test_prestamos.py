@@ -0,0 +1,183 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from admApp.models import Herramienta, Prestamo, UbicacionHerramienta
+from admApp.prestamos import (
+    NO_ENCONTRADO, YA_CERRADO, ErrorPrestamo, HerramientasNoDisponibles, devolver_prestamos, marcar_atrasados,
+    prestar_herramientas,
+)
+from admApp.signals import prestamos_actualizados
+
+from . import datos
+
+
+Estado = Herramienta.EstadoHerramienta
+
+
+class PrestamosBase(TestCase):
+
+    def setUp(self):
+        self.obra = datos.obra()
+        self.bodega = datos.bodega(obra=self.obra)
+        self.obrero = datos.obrero()
+        self.herramientas = [datos.herramienta() for _ in range(4)]
+
+    def prestar(self, herramientas, obrero=None):
+        return prestar_herramientas(
+            herramientas, obrero or self.obrero, self.obra, self.bodega, timezone.localdate() + timedelta(days=7),
+        )
+
+    def estado(self, herramienta):
+        return Herramienta.objects.get(pk=herramienta.pk).estado
+
+
+class PrestarHerramientasTests(PrestamosBase):
+
+    def test_presta_todas_en_una_transaccion(self):
+        prestamos = self.prestar(self.herramientas[:3])
+        self.assertEqual(len(prestamos), 3)
+        self.assertEqual(Prestamo.objects.activos().count(), 3)
+        self.assertEqual([self.estado(h) for h in self.herramientas], [Estado.EN_USO] * 3 + [Estado.DISPONIBLE])
+        self.assertEqual(
+            set(UbicacionHerramienta.objects.filter(prestamo__isnull=False).values_list('herramienta_id', flat=True)),
+            {h.pk for h in self.herramientas[:3]},
+        )
+
+    def test_una_no_disponible_rechaza_el_lote(self):
+        self.prestar([self.herramientas[0]])
+        inactiva = datos.herramienta(activo=False)
+        with self.assertRaises(HerramientasNoDisponibles) as error:
+            self.prestar([self.herramientas[1], self.herramientas[0], inactiva, 999999])
+        self.assertEqual(
+            [pk for pk, _, _ in error.exception.herramientas], [self.herramientas[0].pk, inactiva.pk, 999999],
+        )
+        self.assertEqual(Prestamo.objects.count(), 1)
+        self.assertEqual(self.estado(self.herramientas[1]), Estado.DISPONIBLE)
+
+    def test_sin_herramientas(self):
+        with self.assertRaises(ErrorPrestamo):
+            self.prestar([])
+
+    def test_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pocas:
+            self.prestar(self.herramientas[:1])
+        with self.assertNumQueries(len(pocas)):
+            self.prestar(self.herramientas[1:])
+
+    @skipUnless(connection.features.has_select_for_update, 'el motor no soporta SELECT ... FOR UPDATE')
+    def test_bloquea_las_herramientas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.prestar(self.herramientas[:2])
+        self.assertIn('FOR UPDATE', consultas[1]['sql'])
+
+    def test_notifica_los_prestamos_creados_tras_el_commit(self):
+        recibidos = []
+        receptor = lambda prestamos, **kwargs: recibidos.append(prestamos)  # noqa: E731
+        prestamos_actualizados.connect(receptor, sender=Prestamo)
+        self.addCleanup(prestamos_actualizados.disconnect, receptor, sender=Prestamo)
+        with self.captureOnCommitCallbacks(execute=True):
+            prestamos = self.prestar(self.herramientas[:2])
+        self.assertEqual(recibidos, [[p.pk for p in prestamos]])
+
+
+class DevolverPrestamosTests(PrestamosBase):
+
+    def setUp(self):
+        super().setUp()
+        self.prestamos = self.prestar(self.herramientas[:3])
+        self.otro_obrero = datos.obrero()
+        self.ajeno = self.prestar([self.herramientas[3]], obrero=self.otro_obrero)[0]
+
+    def test_cierra_por_ids_con_estado_final_por_prestamo(self):
+        devuelto, danado, extraviado = self.prestamos
+        resultado = devolver_prestamos([devuelto.pk, danado.pk, extraviado.pk], danados=[danado.pk],
+                                       extraviados=[extraviado.pk])
+        self.assertEqual([r['resultado'] for r in resultado], ['DEVUELTO', 'DAÑADO', 'EXTRAVIADO'])
+        self.assertEqual(
+            [self.estado(h) for h in self.herramientas[:3]], [Estado.DISPONIBLE, Estado.DAÑADA, Estado.BAJA],
+        )
+        self.assertFalse(Prestamo.objects.filter(pk__in=[p.pk for p in self.prestamos],
+                                                 fecha_devolucion_real__isnull=True).exists())
+        self.assertFalse(UbicacionHerramienta.objects.filter(herramienta__in=self.herramientas[:3],
+                                                             prestamo__isnull=False).exists())
+
+    def test_crea_la_ubicacion_si_faltaba(self):
+        # ej: préstamos cargados con bulk_create antes de reconstruir_ubicaciones
+        devuelto, conservado = self.prestamos[:2]
+        UbicacionHerramienta.objects.filter(herramienta=devuelto.herramienta).delete()
+        otra = datos.bodega(obra=self.obra)
+        UbicacionHerramienta.objects.filter(herramienta=conservado.herramienta).update(bodega=otra)
+        devolver_prestamos([devuelto.pk, conservado.pk])
+        ubicacion = UbicacionHerramienta.objects.get(herramienta=devuelto.herramienta)
+        self.assertEqual((ubicacion.bodega_id, ubicacion.prestamo_id), (self.bodega.pk, None))
+        self.assertEqual(UbicacionHerramienta.objects.get(herramienta=conservado.herramienta).bodega_id, otra.pk)
+
+    def test_rechaza_cerrados_e_inexistentes_sin_tocarlos(self):
+        devolver_prestamos([self.prestamos[0].pk])
+        cerrado = Prestamo.objects.get(pk=self.prestamos[0].pk).fecha_devolucion_real
+        resultado = devolver_prestamos([self.prestamos[0].pk, 999999, self.prestamos[1].pk])
+        self.assertEqual([r['resultado'] for r in resultado], [YA_CERRADO, NO_ENCONTRADO, 'DEVUELTO'])
+        self.assertEqual(Prestamo.objects.get(pk=self.prestamos[0].pk).fecha_devolucion_real, cerrado)
+
+    def test_por_obrero_solo_cierra_los_suyos(self):
+        resultado = devolver_prestamos(obrero=self.obrero)
+        self.assertEqual({r['prestamo'] for r in resultado}, {p.pk for p in self.prestamos})
+        self.assertEqual(Prestamo.objects.get(pk=self.ajeno.pk).estado, Prestamo.EstadoPrestamo.ACTIVO)
+
+    def test_exige_algun_filtro(self):
+        with self.assertRaises(ErrorPrestamo):
+            devolver_prestamos()
+        self.assertEqual(Prestamo.objects.activos().count(), 4)
+
+    @skipUnless(connection.features.has_select_for_update, 'el motor no soporta SELECT ... FOR UPDATE')
+    def test_bloquea_los_prestamos(self):
+        with CaptureQueriesContext(connection) as consultas:
+            devolver_prestamos(obra=self.obra)
+        self.assertIn('FOR UPDATE', consultas[1]['sql'])
+
+    def test_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pocas:
+            devolver_prestamos([self.prestamos[0].pk])
+        with self.assertNumQueries(len(pocas)):
+            devolver_prestamos([p.pk for p in self.prestamos[1:]] + [self.ajeno.pk])
+
+
+class MarcarAtrasadosTests(PrestamosBase):
+
+    def setUp(self):
+        super().setUp()
+        self.prestamos = self.prestar(self.herramientas)
+        self.manana = timezone.localdate() + timedelta(days=8)
+
+    def notificados(self):
+        recibidos = []
+        receptor = lambda prestamos, **kwargs: recibidos.append(prestamos)  # noqa: E731
+        prestamos_actualizados.connect(receptor, sender=Prestamo)
+        self.addCleanup(prestamos_actualizados.disconnect, receptor, sender=Prestamo)
+        return recibidos
+
+    def test_marca_y_desmarca_notificando_solo_esos_ids(self):
+        marcar_atrasados(self.manana)
+        devuelto, extendido = self.prestamos[:2]
+        devolver_prestamos([devuelto.pk])
+        Prestamo.objects.filter(pk=extendido.pk).update(fecha_devolucion_estimada=self.manana)
+        Prestamo.objects.filter(pk=devuelto.pk).update(atrasado=True)
+        recibidos = self.notificados()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(marcar_atrasados(self.manana), (0, 2))
+        self.assertEqual(sorted(recibidos[0]), sorted([devuelto.pk, extendido.pk]))
+        self.assertEqual(
+            set(Prestamo.objects.atrasados().values_list('pk', flat=True)), {p.pk for p in self.prestamos[2:]},
+        )
+
+    def test_sin_cambios_no_escribe_ni_notifica(self):
+        marcar_atrasados(self.manana)
+        recibidos = self.notificados()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(marcar_atrasados(self.manana), (0, 0))
+        self.assertEqual(recibidos, [])
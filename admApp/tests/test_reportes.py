@@ -0,0 +1,43 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from admApp import reportes
+from admApp.models import Obra
+
+from . import datos
+
+
+class ObtenerReportesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.obra = datos.obra(presupuesto_estimado=Decimal('1000'))
+
+    def presupuesto(self):
+        return reportes.obtener_reportes([self.obra.pk])[self.obra.pk]['presupuesto_estimado']
+
+    def test_invalidar_obras_recalcula(self):
+        self.presupuesto()
+        Obra.objects.filter(pk=self.obra.pk).update(presupuesto_estimado=Decimal('2000'))
+        self.assertEqual(self.presupuesto(), Decimal('1000'))
+        reportes.invalidar_obras([self.obra.pk])
+        self.assertEqual(self.presupuesto(), Decimal('2000'))
+
+    def test_un_cambio_durante_el_calculo_no_deja_el_reporte_viejo(self):
+        original = reportes.reporte_obras
+
+        def calcular_y_cambiar(obras):
+            # el queryset se evalúa antes del cambio, como una lectura concurrente
+            filas = list(original(obras).values(*reportes.CAMPOS))
+            Obra.objects.filter(pk=self.obra.pk).update(presupuesto_estimado=Decimal('3000'))
+            reportes.invalidar_obras([self.obra.pk])
+            consulta = mock.Mock()
+            consulta.values.return_value = filas
+            return consulta
+
+        with mock.patch.object(reportes, 'reporte_obras', calcular_y_cambiar):
+            self.assertEqual(self.presupuesto(), Decimal('1000'))
+        self.assertEqual(self.presupuesto(), Decimal('3000'))
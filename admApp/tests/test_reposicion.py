@@ -0,0 +1,89 @@
+from datetime import datetime, time, timedelta
+from unittest import skipUnless
+
+from django.test import TestCase
+from django.utils import timezone
+
+from admApp.models import MovimientoInventario
+from admApp.reposicion import planificar
+
+from . import datos
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+CONFIG = {'VENTANA_CORTA': 7, 'VENTANA_LARGA': 28, 'DIAS_ENTREGA': 7, 'DIAS_COBERTURA': 30}
+
+
+@skipUnless(numpy, 'el planificador requiere NumPy')
+class PlanificarTests(TestCase):
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.bodega = datos.bodega()
+
+    def par(self, cantidad, stock_minimo=10):
+        material = datos.material(stock_minimo=stock_minimo)
+        datos.stock(self.bodega, material, cantidad)
+        return material
+
+    def salida(self, material, cantidad, hace_dias, bodega=None):
+        movimiento = MovimientoInventario.objects.create(
+            material=material, bodega_origen=bodega or self.bodega, cantidad=cantidad,
+            tipo_movimiento=MovimientoInventario.TipoMovimiento.SALIDA,
+        )
+        fecha = timezone.make_aware(datetime.combine(self.hoy - timedelta(days=hace_dias), time(12)))
+        MovimientoInventario.objects.filter(pk=movimiento.pk).update(fecha_movimiento=fecha)
+
+    def planificar(self):
+        return planificar(hoy=self.hoy, **CONFIG)
+
+    def fila(self, plan, material):
+        return next(fila for fila in plan['filas'] if fila['material_id'] == material.pk)
+
+    def test_sin_salidas_no_repone(self):
+        self.par(50)
+        plan = self.planificar()
+        self.assertEqual((plan['pares'], plan['a_reponer'], plan['filas']), (1, 0, []))
+
+    def test_bajo_el_minimo_sin_consumo_repone_hasta_el_minimo(self):
+        material = self.par(3)
+        fila = self.fila(self.planificar(), material)
+        self.assertEqual(fila['tasa_diaria'], 0)
+        self.assertIsNone(fila['dias_para_quiebre'])
+        self.assertIsNone(fila['fecha_quiebre'])
+        self.assertEqual(fila['cantidad_sugerida'], 7)
+
+    def test_un_pico_en_la_ventana_corta_manda_sobre_la_larga(self):
+        material = self.par(60)
+        self.salida(material, 70, hace_dias=1)
+        fila = self.fila(self.planificar(), material)
+        # 70 / 7 días, no 70 / 28
+        self.assertEqual(fila['tasa_diaria'], 10)
+        self.assertEqual(fila['dias_para_quiebre'], 6)
+        self.assertEqual(fila['fecha_quiebre'], self.hoy + timedelta(days=6))
+        self.assertEqual(fila['cantidad_sugerida'], 10 * (7 + 30) + 10 - 60)
+
+    def test_salida_fuera_de_la_ventana_corta_usa_la_larga(self):
+        material = self.par(20)
+        self.salida(material, 56, hace_dias=20)
+        self.assertEqual(self.fila(self.planificar(), material)['tasa_diaria'], 2)
+
+    def test_salidas_fuera_de_la_ventana_no_cuentan(self):
+        material = self.par(50)
+        self.salida(material, 1000, hace_dias=29)
+        # el día en curso aún no está completo
+        self.salida(material, 1000, hace_dias=0)
+        # de otra bodega, donde el material no tiene stock
+        self.salida(material, 1000, hace_dias=1, bodega=datos.bodega())
+        self.assertEqual(self.planificar()['a_reponer'], 0)
+
+    def test_ordena_por_dias_a_quiebre(self):
+        lento, rapido = self.par(40), self.par(40)
+        self.salida(lento, 35, hace_dias=2)
+        self.salida(rapido, 140, hace_dias=2)
+        plan = self.planificar()
+        self.assertEqual([fila['material_id'] for fila in plan['filas']], [rapido.pk, lento.pk])
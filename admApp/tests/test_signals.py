@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from admApp import reportes, uso_herramientas
+from admApp.models import ConsumoMensual, Prestamo
+from admApp.prestamos import prestar_herramientas
+
+from . import datos
+
+
+class InvalidarReportesPorPreciosTests(TestCase):
+
+    def setUp(self):
+        self.obra, self.otra_obra = datos.obra(), datos.obra()
+        self.material = datos.material()
+        ConsumoMensual.objects.create(obra=self.obra, material=self.material, mes=date.today().replace(day=1))
+
+    def guardar(self, **kwargs):
+        with mock.patch.object(reportes, 'invalidar_obras') as obras, \
+                mock.patch.object(reportes, 'invalidar_todo') as todo, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.material.save(**kwargs)
+        self.assertFalse(todo.called)
+        return [set(llamada.args[0]) for llamada in obras.call_args_list]
+
+    def test_cambio_de_precio_invalida_las_obras_que_lo_consumieron(self):
+        self.material.precio_unitario = Decimal('1500')
+        self.assertEqual(self.guardar(), [{self.obra.pk}])
+
+    def test_otros_campos_no_invalidan(self):
+        self.material.descripcion = 'Otra'
+        self.assertEqual(self.guardar(), [])
+        self.material.precio_unitario = Decimal('2000')
+        self.assertEqual(self.guardar(update_fields=['descripcion']), [])
+
+    def test_alta_no_invalida(self):
+        with mock.patch.object(reportes, 'invalidar_obras') as obras, \
+                mock.patch.object(reportes, 'invalidar_todo') as todo, \
+                self.captureOnCommitCallbacks(execute=True):
+            datos.material()
+        self.assertFalse(obras.called or todo.called)
+
+
+class InvalidarUsoHerramientasTests(TestCase):
+
+    def setUp(self):
+        self.herramienta = datos.herramienta(tipo='Eléctrica')
+
+    def guardar(self):
+        with mock.patch.object(uso_herramientas, 'invalidar') as invalidar, \
+                mock.patch.object(uso_herramientas, 'invalidar_todo') as todo, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.herramienta.save()
+        self.assertFalse(todo.called)
+        return [set(llamada.args[1]) for llamada in invalidar.call_args_list]
+
+    def test_cambio_de_tipo_invalida_ambos_tipos(self):
+        self.herramienta.tipo = 'Manual'
+        self.assertEqual(self.guardar(), [{'Eléctrica', 'Manual'}])
+
+    def test_otros_campos_no_invalidan(self):
+        self.herramienta.marca = 'Otra'
+        self.assertEqual(self.guardar(), [])
+
+    def test_alta_invalida_su_tipo_y_la_lista_de_tipos(self):
+        uso_herramientas.tipos()
+        with self.captureOnCommitCallbacks(execute=True):
+            datos.herramienta(tipo='Neumática')
+        self.assertIn('Neumática', uso_herramientas.tipos())
+
+
+class InvalidarUsoPrestamoTests(TestCase):
+
+    def test_mover_un_prestamo_invalida_los_grupos_anteriores_y_nuevos(self):
+        obra, otra_obra = datos.obra(), datos.obra()
+        herramienta, otra = datos.herramienta(tipo='Eléctrica'), datos.herramienta(tipo='Manual')
+        prestamo = prestar_herramientas(
+            [herramienta], datos.obrero(), obra, datos.bodega(), date.today() + timedelta(days=7),
+        )[0]
+        prestamo = Prestamo.objects.get(pk=prestamo.pk)
+        prestamo.herramienta, prestamo.obra = otra, otra_obra
+        with mock.patch.object(uso_herramientas, 'invalidar') as invalidar, \
+                self.captureOnCommitCallbacks(execute=True):
+            prestamo.save()
+        herramientas, tipos, obras = invalidar.call_args.args
+        self.assertEqual(set(herramientas), {herramienta.pk, otra.pk})
+        self.assertEqual(set(tipos), {'Eléctrica', 'Manual'})
+        self.assertEqual(set(obras), {obra.pk, otra_obra.pk})
@@ -0,0 +1,87 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from admApp.ledger import MovimientoInvalido, StockInsuficiente
+from admApp.models import InventarioMaterial, MovimientoInventario, Transferencia, Usuario
+from admApp.transferencias import transferir
+
+from . import datos
+
+
+class TransferirTests(TestCase):
+
+    def setUp(self):
+        self.origen, self.destino = datos.bodega(), datos.bodega()
+        self.material, self.otro = datos.material(), datos.material()
+        datos.stock(self.origen, self.material, 10)
+        datos.stock(self.origen, self.otro, 5)
+
+    def cantidad(self, bodega, material):
+        return InventarioMaterial.objects.get(bodega=bodega, material=material).cantidad_actual
+
+    def test_suma_las_lineas_repetidas_en_un_movimiento(self):
+        transferencia = transferir(
+            self.origen, self.destino, [(self.material, 3), (self.material.pk, 2), (self.otro, 1)],
+        )
+        self.assertEqual(MovimientoInventario.objects.filter(transferencia=transferencia).count(), 2)
+        self.assertEqual(self.cantidad(self.origen, self.material), 5)
+        self.assertEqual(self.cantidad(self.destino, self.material), 5)
+
+    def test_rechaza_materiales_inactivos_sin_stock_o_inexistentes(self):
+        inactivo = datos.material(activo=False)
+        datos.stock(self.origen, inactivo, 5)
+        agotado = datos.material()
+        datos.stock(self.origen, agotado, 0)
+        solo_en_destino = datos.material()
+        datos.stock(self.destino, solo_en_destino, 5)
+        for material in (inactivo.pk, agotado.pk, solo_en_destino.pk, 999999):
+            with self.assertRaises(MovimientoInvalido) as error:
+                transferir(self.origen, self.destino, [(self.material, 1), (material, 1)])
+            self.assertIn(str(material), str(error.exception))
+        self.assertFalse(Transferencia.objects.exists())
+        self.assertEqual(self.cantidad(self.origen, self.material), 10)
+
+    def test_stock_insuficiente_no_traspasa_ninguna_linea(self):
+        with self.assertRaises(StockInsuficiente):
+            transferir(self.origen, self.destino, [(self.material, 1), (self.otro, 6)])
+        self.assertFalse(Transferencia.objects.exists())
+        self.assertEqual(self.cantidad(self.origen, self.material), 10)
+
+    def test_misma_bodega_o_sin_lineas(self):
+        with self.assertRaises(MovimientoInvalido):
+            transferir(self.origen, self.origen, [(self.material, 1)])
+        with self.assertRaises(MovimientoInvalido):
+            transferir(self.origen, self.destino, [])
+
+
+class TransferenciaCreateTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(datos.usuario(rol=Usuario.TipoRol.BODEGUERO))
+        self.origen, self.destino = datos.bodega(), datos.bodega()
+        self.material = datos.material()
+        datos.stock(self.origen, self.material, 10)
+
+    def post(self, cantidades):
+        return self.client.post(reverse('transferencia_create'), {
+            'bodega_origen': self.origen.pk, 'bodega_destino': self.destino.pk, 'observaciones': '',
+            **{f'cantidad_{pk}': cantidad for pk, cantidad in cantidades.items()},
+        })
+
+    def test_traspasa_las_cantidades(self):
+        respuesta = self.post({self.material.pk: 4})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(
+            InventarioMaterial.objects.get(bodega=self.destino, material=self.material).cantidad_actual, 4,
+        )
+
+    def test_material_inexistente_o_inactivo_es_error_del_formulario(self):
+        inactivo = datos.material(activo=False)
+        datos.stock(self.origen, inactivo, 5)
+        sin_stock = datos.material()
+        for pk in (999999, inactivo.pk, sin_stock.pk):
+            respuesta = self.post({self.material.pk: 1, pk: 1})
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTrue(respuesta.context['form'].non_field_errors())
+        self.assertFalse(Transferencia.objects.exists())
+        self.assertEqual(InventarioMaterial.objects.get(bodega=self.origen, material=self.material).cantidad_actual, 10)
@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from admApp import uso_herramientas
+
+
+class ObtenerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.prestamos = 1
+
+    def prestamos_del_tipo(self):
+        return uso_herramientas.obtener('tipo', ['Eléctrica'])['Eléctrica']['prestamos']
+
+    def calcular(self, nivel, claves):
+        return {clave: {'clave': clave, 'prestamos': self.prestamos} for clave in claves}
+
+    def test_invalidar_recalcula_solo_el_grupo(self):
+        with mock.patch.object(uso_herramientas, 'estadisticas', self.calcular):
+            self.prestamos_del_tipo()
+            self.prestamos = 2
+            self.assertEqual(self.prestamos_del_tipo(), 1)
+            uso_herramientas.invalidar(tipos=['Eléctrica'])
+            self.assertEqual(self.prestamos_del_tipo(), 2)
+
+    def test_un_cambio_durante_el_calculo_no_deja_el_valor_viejo(self):
+        def calcular_y_cambiar(nivel, claves):
+            filas = self.calcular(nivel, claves)
+            # otra transacción cierra un préstamo mientras se calcula
+            self.prestamos = 2
+            uso_herramientas.invalidar(tipos=['Eléctrica'])
+            return filas
+
+        with mock.patch.object(uso_herramientas, 'estadisticas', calcular_y_cambiar):
+            self.assertEqual(self.prestamos_del_tipo(), 1)
+        with mock.patch.object(uso_herramientas, 'estadisticas', self.calcular):
+            self.assertEqual(self.prestamos_del_tipo(), 2)
@@ -0,0 +1,71 @@
+"""
+Transferencias de materiales entre bodegas (ej: de la bodega central a la de
+una obra).
+
+transferir() crea el documento Transferencia y registra todas sus líneas como
+movimientos TRANSFERENCIA con ledger.registrar_movimientos(): descuenta el
+origen y suma al destino en la misma transacción, con un solo bulk_create de
+movimientos. La cantidad de consultas no depende de cuántas líneas traiga.
+
+Solo se traspasan materiales activos con stock en la bodega de origen; la
+validación está aquí y no en la vista para que la API y la consola reciban el
+mismo error.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .ledger import MovimientoInvalido, registrar_movimientos
+from .models import InventarioMaterial, MovimientoInventario, Transferencia
+
+
+MAX_LINEAS = 500
+
+
+def transferir(origen, destino, lineas, usuario=None, observaciones=''):
+    """
+    Traspasa materiales de `origen` a `destino` (instancias de Bodega).
+
+    `lineas` es un iterable de (material, cantidad); material puede ser
+    instancia o id y las líneas repetidas se suman. Si falta stock de alguna
+    no se traspasa ninguna (ledger.StockInsuficiente); si alguno no existe,
+    está inactivo o no tiene stock en el origen, MovimientoInvalido. Devuelve
+    la Transferencia creada.
+    """
+    if origen.pk == destino.pk:
+        raise MovimientoInvalido('La bodega de origen y la de destino deben ser distintas')
+    cantidades = defaultdict(int)
+    for material, cantidad in lineas:
+        if not cantidad or cantidad < 1:
+            raise MovimientoInvalido('La cantidad debe ser mayor a cero')
+        cantidades[getattr(material, 'pk', material)] += cantidad
+    if not cantidades:
+        raise MovimientoInvalido('La transferencia no tiene líneas')
+    if len(cantidades) > MAX_LINEAS:
+        raise MovimientoInvalido(f'Una transferencia admite hasta {MAX_LINEAS} materiales')
+
+    with transaction.atomic():
+        disponibles = set(InventarioMaterial.objects.filter(
+            bodega=origen, material_id__in=cantidades, cantidad_actual__gt=0, material__activo=True,
+        ).values_list('material_id', flat=True))
+        faltantes = sorted(set(cantidades) - disponibles)
+        if faltantes:
+            raise MovimientoInvalido(
+                'Hay materiales que no existen, están inactivos o no tienen stock en la bodega de origen '
+                f'(ids {", ".join(map(str, faltantes))})'
+            )
+        transferencia = Transferencia.objects.create(
+            bodega_origen=origen, bodega_destino=destino, usuario_responsable=usuario, observaciones=observaciones,
+        )
+        registrar_movimientos([
+            MovimientoInventario(
+                material_id=material_id, cantidad=cantidad,
+                tipo_movimiento=MovimientoInventario.TipoMovimiento.TRANSFERENCIA,
+                bodega_origen=origen, bodega_destino=destino,
+                # Solo informativo: una transferencia no cuenta como consumo de la obra
+                obra_id=destino.obra_id,
+                motivo=observaciones, transferencia=transferencia,
+            )
+            for material_id, cantidad in cantidades.items()
+        ], usuario=usuario)
+    return transferencia
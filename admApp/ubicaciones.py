@@ -0,0 +1,140 @@
+"""
+Ubicación actual de cada herramienta (UbicacionHerramienta).
+
+La bodega sale de InventarioHerramienta (si hay varias filas, la del ingreso
+más reciente) y el obrero/obra del préstamo activo. En vez de combinar esas
+tablas herramienta por herramienta, se guarda una fila por herramienta que
+se mantiene así:
+
+    prestar_herramientas()   registrar_prestamos(), en la misma transacción
+    devolver_prestamos()     registrar_devoluciones(), en la misma transacción
+    señales                  actualizar() tras el commit, al crear una
+                             herramienta o al cambiar InventarioHerramienta o
+                             un Prestamo guardado uno a uno (admin)
+
+actualizar() recalcula desde las tablas de origen con tres consultas sin
+importar cuántas herramientas sean. reconstruir_ubicaciones() (comando
+reconstruir_ubicaciones) rehace la tabla completa, por ejemplo después de
+cargar datos con bulk_create.
+"""
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .models import Herramienta, InventarioHerramienta, Prestamo, UbicacionHerramienta
+
+
+CAMPOS = ['bodega', 'prestamo', 'obrero', 'obra', 'desde']
+
+TAMANO_LOTE = 2000
+
+
+def _guardar(filas, campos=CAMPOS):
+    """INSERT de las filas; las que ya existen actualizan solo `campos`."""
+    opciones = {}
+    if connection.features.supports_update_conflicts_with_target:
+        # MySQL no acepta indicar la clave del conflicto (usa cualquier UNIQUE)
+        opciones['unique_fields'] = ['herramienta']
+    UbicacionHerramienta.objects.bulk_create(
+        filas, batch_size=TAMANO_LOTE, update_conflicts=True, update_fields=campos, **opciones,
+    )
+
+
+def _calcular(ids):
+    """UbicacionHerramienta (sin guardar) de las herramientas existentes en `ids`."""
+    bodegas = {}
+    for herramienta_id, bodega_id, ingreso in (
+        InventarioHerramienta.objects.filter(herramienta_id__in=ids)
+        .order_by('herramienta_id', 'fecha_ingreso', 'id')
+        .values_list('herramienta_id', 'bodega_id', 'fecha_ingreso')
+    ):
+        # la última fila de cada herramienta queda en el dict
+        bodegas[herramienta_id] = (bodega_id, ingreso)
+
+    activos = {}
+    for prestamo in (
+        Prestamo.objects.activos().filter(herramienta_id__in=ids)
+        .order_by('herramienta_id', 'fecha_prestamo', 'id')
+        .only('id', 'herramienta_id', 'obrero_id', 'obra_id', 'fecha_prestamo')
+    ):
+        activos[prestamo.herramienta_id] = prestamo
+
+    devoluciones = dict(
+        Prestamo.objects.filter(herramienta_id__in=ids, fecha_devolucion_real__isnull=False)
+        .order_by().values('herramienta_id').annotate(ultima=Max('fecha_devolucion_real'))
+        .values_list('herramienta_id', 'ultima')
+    )
+
+    filas = []
+    for herramienta_id in ids:
+        bodega_id, ingreso = bodegas.get(herramienta_id, (None, None))
+        prestamo = activos.get(herramienta_id)
+        if prestamo is not None:
+            filas.append(UbicacionHerramienta(
+                herramienta_id=herramienta_id, bodega_id=bodega_id, prestamo_id=prestamo.pk,
+                obrero_id=prestamo.obrero_id, obra_id=prestamo.obra_id, desde=prestamo.fecha_prestamo,
+            ))
+        else:
+            fechas = [f for f in (ingreso, devoluciones.get(herramienta_id)) if f is not None]
+            filas.append(UbicacionHerramienta(
+                herramienta_id=herramienta_id, bodega_id=bodega_id, desde=max(fechas, default=None),
+            ))
+    return filas
+
+
+def actualizar(herramienta_ids):
+    """Recalcula la ubicación de esas herramientas desde las tablas de origen."""
+    ids = set(herramienta_ids)
+    if not ids:
+        return
+    with transaction.atomic():
+        # Herramientas borradas mientras tanto: su fila ya se fue en cascada
+        existentes = sorted(Herramienta.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        _guardar(_calcular(existentes))
+
+
+def registrar_prestamos(prestamos):
+    """
+    Marca como prestadas las herramientas de préstamos recién creados. La
+    bodega de una fila nueva es la del préstamo; en las existentes no cambia.
+    """
+    if any(p.pk is None for p in prestamos):
+        # MySQL no devuelve los ids de bulk_create
+        actualizar(p.herramienta_id for p in prestamos)
+        return
+    _guardar([
+        UbicacionHerramienta(
+            herramienta_id=p.herramienta_id, bodega_id=p.bodega_id, prestamo_id=p.pk,
+            obrero_id=p.obrero_id, obra_id=p.obra_id, desde=p.fecha_prestamo,
+        )
+        for p in prestamos
+    ], campos=['prestamo', 'obrero', 'obra', 'desde'])
+
+
+def registrar_devoluciones(herramientas, fecha):
+    """
+    Las herramientas, pares (herramienta_id, bodega_id del préstamo), vuelven
+    a su bodega desde `fecha`. Como en registrar_prestamos(), la bodega solo
+    se usa si la herramienta aún no tenía fila.
+    """
+    _guardar([
+        UbicacionHerramienta(herramienta_id=herramienta_id, bodega_id=bodega_id, desde=fecha)
+        for herramienta_id, bodega_id in herramientas
+    ], campos=['prestamo', 'obrero', 'obra', 'desde'])
+
+
+def reconstruir_ubicaciones(tamano_lote=TAMANO_LOTE):
+    """Vacía y vuelve a llenar la tabla para todas las herramientas. Devuelve las filas creadas."""
+    total = 0
+    with transaction.atomic():
+        UbicacionHerramienta.objects.all().delete()
+        ids = Herramienta.objects.order_by('pk').values_list('pk', flat=True)
+        lote = []
+        for pk in ids.iterator(chunk_size=tamano_lote):
+            lote.append(pk)
+            if len(lote) >= tamano_lote:
+                UbicacionHerramienta.objects.bulk_create(_calcular(lote))
+                total += len(lote)
+                lote = []
+        UbicacionHerramienta.objects.bulk_create(_calcular(lote))
+        total += len(lote)
+    return total
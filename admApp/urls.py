@@ -1,5 +1,15 @@
-from django.urls import path
-from . import views
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views, api, async_views
+
+router = DefaultRouter()
+router.register('herramientas', api.HerramientaViewSet)
+router.register('materiales', api.MaterialViewSet)
+router.register('bodegas', api.BodegaViewSet)
+router.register('inventario', api.InventarioMaterialViewSet)
+router.register('prestamos', api.PrestamoViewSet)
+router.register('movimientos', api.MovimientoInventarioViewSet)
+router.register('ubicaciones', api.UbicacionHerramientaViewSet)
 
 urlpatterns = [
     path('dashboard', views.dashboard, name='dashboard'),
@@ -9,6 +19,8 @@ urlpatterns = [
     path('herramientas/nueva/', views.herramienta_create, name='herramienta_create'),
     path('herramientas/editar/<int:pk>/', views.herramienta_update, name='herramienta_update'),
     path('herramientas/eliminar/<int:pk>/', views.herramienta_delete, name='herramienta_delete'),
+    path('herramientas/ubicacion/', views.herramientas_ubicacion, name='herramientas_ubicacion'),
+    path('herramientas/uso/', views.herramientas_uso, name='herramientas_uso'),
 
     # Materiales
     path('materiales/', views.materiales_list, name='materiales_list'),
@@ -19,8 +31,10 @@ urlpatterns = [
     # Obras y Actividades
     path('obras/', views.obras_list, name='obras_list'),
     path('obras/nueva/', views.obra_create, name='obra_create'),
+    path('obras/finanzas/', views.obras_finanzas, name='obras_finanzas'),
     path('obras/editar/<int:pk>/', views.obra_update, name='obra_update'),
     path('obras/eliminar/<int:pk>/', views.obra_delete, name='obra_delete'),
+    path('obras/<int:pk>/consumo/', views.obra_consumo, name='obra_consumo'),
 
     path('obras/<int:id_obra>/actividades/', views.actividades_list, name='actividades_list'),
     path('obras/<int:id_obra>/actividades/nueva/', views.actividad_create, name='actividad_create'),
@@ -41,14 +55,47 @@ urlpatterns = [
     path('bodegas/', views.bodegas_list, name='bodegas_list'),
     path('bodegas/nueva/', views.bodega_create, name='bodega_create'),
     path('bodegas/<int:pk>/', views.bodega_detail, name='bodega_detail'),
+    path('bodegas/<int:pk>/historico/', views.bodega_stock_historico, name='bodega_stock_historico'),
+    path('bodegas/<int:pk>/eventos/', views.bodega_stock_eventos, name='bodega_stock_eventos'),
+    path('bodegas/<int:pk>/cambios/', views.bodega_stock_cambios, name='bodega_stock_cambios'),
 
     # Inventario
     path('inventario/', views.inventario_list, name='inventario_list'),
+    path('inventario/bajo-minimo/', views.inventario_bajo_minimo, name='inventario_bajo_minimo'),
+    path('inventario/bajo-minimo/resumen/', views.inventario_bajo_minimo_resumen, name='inventario_bajo_minimo_resumen'),
+    path('inventario/reposicion/', views.inventario_reposicion, name='inventario_reposicion'),
+
+    # Transferencias entre bodegas
+    path('transferencias/', views.transferencias_list, name='transferencias_list'),
+    path('transferencias/nueva/', views.transferencia_create, name='transferencia_create'),
+    path('transferencias/<int:pk>/', views.transferencia_detail, name='transferencia_detail'),
 
     # Préstamos
     path('prestamos/', views.prestamos_list, name='prestamos_list'),
     path('prestamos/nuevo/', views.prestamo_create, name='prestamo_create'),
+    path('prestamos/lote/', views.prestamo_lote_create, name='prestamo_lote_create'),
+    path('prestamos/devolver/', views.prestamos_devolucion_masiva, name='prestamos_devolucion_masiva'),
+    path('prestamos/atrasados/', views.prestamos_atrasados, name='prestamos_atrasados'),
     path('prestamos/<int:pk>/devolver/', views.prestamo_devolver, name='prestamo_devolver'),
 
+    # Búsqueda global
+    path('buscar/', views.buscar, name='buscar'),
+    path('buscar/sugerencias/', views.buscar_json, name='buscar_json'),
+
+    # Exportaciones
+    path('exportar/movimientos/', views.exportar_movimientos, name='exportar_movimientos'),
+    path('exportar/prestamos/', views.exportar_prestamos, name='exportar_prestamos'),
+
+    # Vistas async de solo lectura (servidas por ASGI)
+    path('async/dashboard', async_views.dashboard, name='async_dashboard'),
+    path('async/bodegas/<int:pk>/', async_views.bodega_detail, name='async_bodega_detail'),
+    path('async/inventario/bajo-minimo/resumen/', async_views.inventario_bajo_minimo_resumen,
+         name='async_inventario_bajo_minimo_resumen'),
+
+    # API REST (va antes del router: 'lote' o 'devolucion' calzarían como pk)
+    path('api/v1/prestamos/lote/', api.PrestamoLoteView.as_view(), name='api_prestamo_lote'),
+    path('api/v1/prestamos/devolucion/', api.PrestamoDevolucionView.as_view(), name='api_prestamo_devolucion'),
+    path('api/v1/', include(router.urls)),
+
 
 ]
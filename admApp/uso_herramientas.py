@@ -0,0 +1,263 @@
+"""
+Uso de herramientas: utilización, duración de los préstamos y tasas de
+atraso, daño y extravío, por herramienta, por tipo y por obra, sobre los
+préstamos de los últimos VENTANA días.
+
+    utilización      tiempo prestado dentro de la ventana / (ventana *
+                     herramientas del grupo); los préstamos activos cuentan
+                     hasta ahora. Por obra no aplica: se informa
+                     `en_uso_promedio` (herramientas prestadas en promedio)
+    duración         promedio y p95 de los préstamos cerrados en la ventana
+    tasa de atraso   cerrados después de la fecha estimada / cerrados
+    tasa de daño     cerrados como dañados / cerrados (ídem extravío)
+
+estadisticas() resuelve un nivel completo, o solo las claves pedidas, con
+dos consultas agrupadas: un GROUP BY con los conteos y sumas, y CUME_DIST()
+particionado por grupo para el p95 (SQLite 3.25+ / MySQL 8+). Para tipo se
+suma un COUNT de herramientas por tipo.
+
+obtener() guarda cada grupo en el caché con su propia versión, como
+reportes.py: al cerrarse o cambiar préstamos, o al dar de alta, borrar o
+cambiar de tipo una herramienta, las señales cambian la versión solo de las
+herramientas, tipos y obras afectados, y el siguiente pedido recalcula esos
+grupos en un lote. La clave incluye el día, así la ventana avanza aunque no
+haya préstamos nuevos.
+
+Configuración (settings.USO_HERRAMIENTAS): VENTANA (días) y CACHE_TIMEOUT.
+"""
+import time
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value, Window
+from django.db.models.functions import Coalesce, CumeDist, Greatest
+from django.utils import timezone
+
+from .models import Herramienta, Prestamo
+from .versiones import incrementar_versiones, leer_versiones
+
+
+PREFIJO = 'uso_herramientas'
+
+CONFIG_POR_DEFECTO = {
+    'VENTANA': 90,
+    'CACHE_TIMEOUT': 3600,
+}
+
+# Nivel -> columna de Prestamo por la que se agrupa
+NIVELES = {
+    'herramienta': 'herramienta_id',
+    'tipo': 'herramienta__tipo',
+    'obra': 'obra_id',
+}
+
+PERCENTIL = 0.95
+
+Estado = Prestamo.EstadoPrestamo
+
+_DURACION = ExpressionWrapper(F('fecha_devolucion_real') - F('fecha_prestamo'), output_field=DurationField())
+
+
+def configuracion():
+    return {**CONFIG_POR_DEFECTO, **getattr(settings, 'USO_HERRAMIENTAS', {})}
+
+
+def _dias(duracion):
+    return None if duracion is None else round(duracion.total_seconds() / 86400, 1)
+
+
+def _tasa(parte, total):
+    return round(parte * 100 / total, 1) if total else None
+
+
+def prestamos_en_ventana(inicio, fin):
+    """Préstamos que estuvieron abiertos en algún momento entre inicio y fin."""
+    return Prestamo.objects.filter(
+        Q(fecha_devolucion_real__gt=inicio) | Q(fecha_devolucion_real__isnull=True),
+        fecha_prestamo__lt=fin,
+    ).order_by()
+
+
+def _herramientas_por_tipo(tipos=None):
+    queryset = Herramienta.objects.order_by()
+    if tipos is not None:
+        queryset = queryset.filter(tipo__in=tipos)
+    return dict(queryset.values('tipo').annotate(total=Count('id')).values_list('tipo', 'total'))
+
+
+def estadisticas(nivel, claves=None, dias=None, ahora=None):
+    """
+    {clave: dict} del nivel ('herramienta', 'tipo' u 'obra'). Con `claves`
+    solo esos grupos, incluidos los que no tuvieron préstamos (uso 0); sin
+    ellas, todas las herramientas o todos los tipos, o las obras con
+    préstamos en la ventana.
+    """
+    campo = NIVELES[nivel]
+    dias = dias or configuracion()['VENTANA']
+    fin = ahora or timezone.now()
+    inicio = fin - timedelta(days=dias)
+    prestamos = prestamos_en_ventana(inicio, fin)
+    if claves is not None:
+        claves = list(claves)
+        prestamos = prestamos.filter(**{f'{campo}__in': claves})
+
+    en_ventana = ExpressionWrapper(
+        Coalesce(F('fecha_devolucion_real'), Value(fin)) - Greatest(F('fecha_prestamo'), Value(inicio)),
+        output_field=DurationField(),
+    )
+    cerrado = Q(fecha_devolucion_real__isnull=False)
+    totales = {
+        fila[campo]: fila
+        for fila in prestamos.values(campo).annotate(
+            prestamos=Count('id', filter=Q(fecha_prestamo__gte=inicio)),
+            cerrados=Count('id', filter=cerrado),
+            atrasados=Count('id', filter=Q(fecha_devolucion_real__date__gt=F('fecha_devolucion_estimada'))),
+            vencidos=Count('id', filter=Q(
+                fecha_devolucion_real__isnull=True, fecha_devolucion_estimada__lt=timezone.localdate(fin),
+            )),
+            danados=Count('id', filter=Q(estado=Estado.DAÑADO)),
+            extraviados=Count('id', filter=Q(estado=Estado.EXTRAVIADO)),
+            tiempo_prestado=Sum(en_ventana),
+            duracion_media=Avg(_DURACION, filter=cerrado),
+        )
+    }
+
+    # p95: la menor duración cuya distribución acumulada dentro del grupo llega al percentil
+    p95 = {}
+    for clave, duracion in (
+        prestamos.filter(cerrado)
+        .annotate(
+            duracion=_DURACION,
+            acumulado=Window(CumeDist(), partition_by=[F(campo)], order_by=F('duracion').asc()),
+        )
+        .filter(acumulado__gte=PERCENTIL)
+        .values_list(campo, 'duracion')
+    ):
+        if clave not in p95 or duracion < p95[clave]:
+            p95[clave] = duracion
+
+    herramientas = None
+    if nivel == 'tipo':
+        herramientas = _herramientas_por_tipo(claves)
+        if claves is None:
+            claves = sorted(herramientas.keys() | totales.keys())
+    elif claves is None and nivel == 'herramienta':
+        # también las que no salieron nunca: son las que interesan
+        claves = Herramienta.objects.order_by('pk').values_list('pk', flat=True)
+    elif claves is None:
+        claves = list(totales)
+
+    resultado = {}
+    for clave in claves:
+        fila = totales.get(clave, {})
+        cerrados = fila.get('cerrados', 0)
+        tiempo = fila.get('tiempo_prestado') or timedelta(0)
+        en_uso = tiempo / timedelta(days=dias)
+        if nivel == 'herramienta':
+            cantidad = 1
+        elif nivel == 'tipo':
+            cantidad = herramientas.get(clave, 0)
+        else:
+            cantidad = None
+        resultado[clave] = {
+            'clave': clave,
+            'herramientas': cantidad,
+            'prestamos': fila.get('prestamos', 0),
+            'cerrados': cerrados,
+            'vencidos': fila.get('vencidos', 0),
+            'dias_prestado': _dias(tiempo),
+            'en_uso_promedio': round(en_uso, 2),
+            'utilizacion': _tasa(en_uso, cantidad),
+            'duracion_media': _dias(fila.get('duracion_media')),
+            'duracion_p95': _dias(p95.get(clave)),
+            'tasa_atraso': _tasa(fila.get('atrasados', 0), cerrados),
+            'tasa_dano': _tasa(fila.get('danados', 0), cerrados),
+            'tasa_extravio': _tasa(fila.get('extraviados', 0), cerrados),
+        }
+    return resultado
+
+
+# ============================================
+# CACHÉ POR GRUPO
+# ============================================
+
+def _generacion():
+    """Igual que en reportes.py: cambia al invalidar todo y nunca repite un valor."""
+    generacion = cache.get(f'{PREFIJO}:generacion')
+    if generacion is None:
+        cache.add(f'{PREFIJO}:generacion', time.time_ns(), None)
+        generacion = cache.get(f'{PREFIJO}:generacion')
+    return generacion
+
+
+def _clave_version(generacion, nivel, clave):
+    # los tipos son texto libre: sin espacios para memcached
+    return f'{PREFIJO}:{generacion}:{nivel}:{quote(str(clave))}:version'
+
+
+def obtener(nivel, claves):
+    """
+    {clave: dict} de estadisticas() para esas claves. Lo que falta en caché
+    se calcula en un solo lote y se guarda bajo la versión de cada grupo
+    leída antes de calcular (ver versiones.leer_versiones).
+    """
+    generacion = _generacion()
+    claves = list(claves)
+    version = leer_versiones(_clave_version(generacion, nivel, clave) for clave in claves)
+    hoy = timezone.localdate()
+    claves = {
+        f'{_clave_version(generacion, nivel, clave)}:{version[_clave_version(generacion, nivel, clave)]}:{hoy}': clave
+        for clave in claves
+    }
+    encontrados = cache.get_many(claves)
+    resultado = {claves[k]: v for k, v in encontrados.items()}
+    faltan = {clave: k for k, clave in claves.items() if k not in encontrados}
+    if faltan:
+        nuevos = estadisticas(nivel, list(faltan))
+        cache.set_many({faltan[clave]: fila for clave, fila in nuevos.items()}, configuracion()['CACHE_TIMEOUT'])
+        resultado.update(nuevos)
+    return resultado
+
+
+def tipos():
+    """Tipos de herramienta existentes, ordenados (en caché con la misma generación)."""
+    clave_version = _clave_version(_generacion(), 'lista', 'tipos')
+    clave = f'{clave_version}:{leer_versiones([clave_version])[clave_version]}'
+    valor = cache.get(clave)
+    if valor is None:
+        valor = sorted(_herramientas_por_tipo())
+        cache.set(clave, valor, configuracion()['CACHE_TIMEOUT'])
+    return valor
+
+
+def invalidar(herramientas=(), tipos=(), obras=()):
+    """Cambia la versión solo de los grupos indicados."""
+    generacion = _generacion()
+    incrementar_versiones([
+        _clave_version(generacion, nivel, clave)
+        for nivel, grupo in (('herramienta', herramientas), ('tipo', tipos), ('obra', obras))
+        for clave in set(grupo) if clave is not None
+    ])
+
+
+def invalidar_lista_de_tipos():
+    """Al dar de alta, borrar o cambiar el tipo de una herramienta puede aparecer o desaparecer un tipo."""
+    incrementar_versiones([_clave_version(_generacion(), 'lista', 'tipos')])
+
+
+def grupos_de_prestamos(prestamo_ids):
+    """(herramientas, tipos, obras) a las que pertenecen esos préstamos, para invalidar()."""
+    filas = list(
+        Prestamo.objects.filter(pk__in=prestamo_ids).order_by()
+        .values_list('herramienta_id', 'herramienta__tipo', 'obra_id').distinct()
+    )
+    return tuple(zip(*filas)) if filas else ((), (), ())
+
+
+def invalidar_todo():
+    try:
+        cache.incr(f'{PREFIJO}:generacion')
+    except ValueError:
+        _generacion()
@@ -0,0 +1,97 @@
+"""
+Versiones por modelo para el caché de fragmentos de los listados.
+
+Cada modelo tiene un número de versión en el caché compartido que las señales
+incrementan al guardar o borrar (y con movimientos_registrados /
+prestamos_actualizados, porque las operaciones masivas no disparan
+post_save). Los templates usan la versión como parte de la clave de
+{% cache %}: mientras no cambie, el cuerpo de la tabla sale del caché sin
+consultar la base de datos ni renderizar las filas.
+
+    {% load cache %}
+    {% cache fragmento.timeout inventario_list fragmento.version user.rol request.GET.urlencode %}
+        ... filas y paginación ...
+    {% endcache %}
+
+La hora del último incremento de cada modelo sirve de Last-Modified para los
+GET condicionales (condicional.py).
+"""
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+PREFIJO = 'version'
+
+
+def _clave(modelo):
+    return f'{PREFIJO}:{modelo._meta.label_lower}'
+
+
+def _clave_fecha(modelo):
+    return f'{_clave(modelo)}:fecha'
+
+
+def leer_versiones(claves):
+    """
+    {clave: versión} de contadores en el caché. Los que no están parten de la
+    hora actual, para que nunca vuelvan a un valor ya usado.
+
+    Otros cachés (reportes.py, uso_herramientas.py) guardan cada valor bajo su
+    versión leída antes de calcularlo: si una invalidación la cambia mientras
+    tanto, el valor queda en una clave que ya nadie lee.
+    """
+    claves = list(claves)
+    encontradas = cache.get_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            cache.add(clave, time.time_ns(), None)
+            encontradas[clave] = cache.get(clave)
+    return encontradas
+
+
+def incrementar_versiones(claves):
+    for clave in claves:
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.add(clave, time.time_ns(), None)
+
+
+def versiones(*modelos):
+    """Versión combinada de los modelos, como texto."""
+    claves = [_clave(modelo) for modelo in modelos]
+    encontradas = leer_versiones(claves)
+    return '.'.join(str(encontradas[clave]) for clave in claves)
+
+
+def incrementar(*modelos):
+    ahora = time.time()
+    incrementar_versiones([_clave(modelo) for modelo in modelos])
+    for modelo in modelos:
+        cache.set(_clave_fecha(modelo), ahora, None)
+
+
+def modificado(*modelos):
+    """
+    Hora (aware, UTC) del último cambio conocido entre los modelos. Si el
+    caché la perdió se toma la hora actual: el cliente descarga la página
+    una vez más, pero nunca recibe un 304 indebido.
+    """
+    claves = [_clave_fecha(modelo) for modelo in modelos]
+    encontradas = cache.get_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            cache.add(clave, time.time(), None)
+            encontradas[clave] = cache.get(clave)
+    return datetime.fromtimestamp(max(encontradas.values()), tz=timezone.utc)
+
+
+def fragmento(*modelos):
+    """Contexto para {% cache %}: versión de los modelos que muestra el fragmento y su vida máxima."""
+    return {
+        'version': versiones(*modelos),
+        'timeout': getattr(settings, 'FRAGMENTOS_CACHE_TIMEOUT', 3600),
+    }
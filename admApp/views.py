@@ -1,9 +1,28 @@
+from datetime import datetime, time
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Herramienta, Material, Obra, Actividad, Usuario, Obrero, Bodega, InventarioMaterial, Prestamo
-from .forms import HerramientaForm, MaterialForm, ObraForm, ActividadForm, UsuarioForm, ObreroForm, BodegaForm, PrestamoForm
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseBadRequest
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Herramienta, Material, Obra, Actividad, Usuario, Obrero, Bodega, InventarioMaterial, Prestamo, UbicacionHerramienta, Transferencia
+from .forms import HerramientaForm, MaterialForm, ObraForm, ActividadForm, UsuarioForm, ObreroForm, BodegaForm, PrestamoForm, PrestamoLoteForm, DevolucionMasivaForm, TransferenciaForm
 from .decorators import admin_required, admin_or_supervisor, admin_or_bodeguero, staff_only
+from .pagination import paginar
+from .metrics import obtener_metricas
+from .snapshots import stock_bodega_en_fecha
+from .consumos import consumo_mensual
+from .reportes import obtener_reportes
+from .versiones import fragmento
+from .eventos import StreamStock, configuracion as config_en_vivo, desde_de_request, sse_disponible
+from .condicional import condicional_bodega, condicional_por_versiones
+from .ledger import ErrorInventario
+from .transferencias import transferir
+from .reposicion import PlanificacionNoDisponible, obtener_plan
+from .prestamos import prestar_herramientas, devolver_prestamos, ErrorPrestamo, YA_CERRADO, NO_ENCONTRADO
+from . import busqueda, exports, uso_herramientas
 
 
 # ============================================
@@ -12,13 +31,7 @@ from .decorators import admin_required, admin_or_supervisor, admin_or_bodeguero,
 @login_required
 def dashboard(request):
     """Dashboard principal - todos los usuarios autenticados"""
-    context = {
-        'total_obras': Obra.objects.count(),
-        'total_herramientas': Herramienta.objects.filter(activo=True).count(),
-        'total_materiales': Material.objects.filter(activo=True).count(),
-        'total_obreros': Obrero.objects.count(),
-    }
-    return render(request, 'admApp/dashboard.html', context)
+    return render(request, 'admApp/dashboard.html', obtener_metricas())
 
 
 # ============================================
@@ -27,8 +40,11 @@ def dashboard(request):
 @login_required
 @admin_or_bodeguero
 def herramientas_list(request):
-    herramientas = Herramienta.objects.all()
-    return render(request, 'admApp/herramientas_list.html', {'herramientas': herramientas})
+    herramientas = paginar(request, Herramienta.objects.all())
+    return render(request, 'admApp/herramientas_list.html', {
+        'herramientas': herramientas,
+        'fragmento': fragmento(Herramienta),
+    })
 
 
 @login_required
@@ -65,14 +81,85 @@ def herramienta_delete(request, pk):
     return render(request, 'admApp/confirm_delete.html', {'object': herramienta})
 
 
+# Filtros de herramientas_ubicacion: parámetro -> columna de UbicacionHerramienta
+FILTROS_UBICACION = {'bodega': 'bodega_id', 'obra': 'obra_id', 'obrero': 'obrero_id'}
+
+
+@login_required
+@admin_or_bodeguero
+def herramientas_ubicacion(request):
+    """Dónde está cada herramienta: una consulta sobre UbicacionHerramienta"""
+    ubicaciones = UbicacionHerramienta.objects.select_related('herramienta', 'bodega', 'obrero__usuario', 'obra')
+    filtros = {}
+    for parametro, columna in FILTROS_UBICACION.items():
+        valor = request.GET.get(parametro, '')
+        if valor.isdigit():
+            ubicaciones = ubicaciones.filter(**{columna: valor})
+            filtros[parametro] = valor
+    prestadas = request.GET.get('prestadas')
+    if prestadas in ('si', 'no'):
+        ubicaciones = ubicaciones.filter(prestamo__isnull=prestadas == 'no')
+    return render(request, 'admApp/herramientas_ubicacion.html', {
+        'ubicaciones': paginar(request, ubicaciones),
+        'filtros': filtros,
+        'prestadas': prestadas,
+    })
+
+
+@login_required
+@admin_or_bodeguero
+def herramientas_uso(request):
+    """
+    Utilización, duración de los préstamos y tasas de atraso/daño por tipo,
+    por herramienta (filtrable por tipo) o por obra, desde el caché de
+    uso_herramientas.py.
+    """
+    nivel = request.GET.get('nivel')
+    if nivel not in uso_herramientas.NIVELES:
+        nivel = 'tipo'
+    tipo = request.GET.get('tipo', '')
+    pagina = None
+    if nivel == 'tipo':
+        claves = uso_herramientas.tipos()
+        nombres = {}
+    elif nivel == 'herramienta':
+        herramientas = Herramienta.objects.only('id', 'nombre', 'marca', 'numero_serie', 'tipo')
+        if tipo:
+            herramientas = herramientas.filter(tipo=tipo)
+        pagina = paginar(request, herramientas)
+        claves = [h.pk for h in pagina]
+        nombres = {h.pk: f'{h.nombre} {h.marca}'.strip() for h in pagina}
+    else:
+        pagina = paginar(request, Obra.objects.only('id', 'nombre', 'fecha_inicio'))
+        claves = [obra.pk for obra in pagina]
+        nombres = {obra.pk: obra.nombre for obra in pagina}
+
+    estadisticas = uso_herramientas.obtener(nivel, claves)
+    filas = [{**estadisticas[clave], 'nombre': nombres.get(clave, clave)} for clave in claves]
+    if nivel == 'tipo':
+        # primero los tipos más ociosos
+        filas.sort(key=lambda fila: (fila['utilizacion'] is None, fila['utilizacion'] or 0))
+    return render(request, 'admApp/herramientas_uso.html', {
+        'nivel': nivel,
+        'tipo': tipo,
+        'tipos': uso_herramientas.tipos(),
+        'filas': filas,
+        'pagina': pagina,
+        'ventana': uso_herramientas.configuracion()['VENTANA'],
+    })
+
+
 # ============================================
 # CRUD MATERIALES (Admin o Bodeguero)
 # ============================================
 @login_required
 @admin_or_bodeguero
 def materiales_list(request):
-    materiales = Material.objects.all()
-    return render(request, 'admApp/materiales_list.html', {'materiales': materiales})
+    materiales = paginar(request, Material.objects.all())
+    return render(request, 'admApp/materiales_list.html', {
+        'materiales': materiales,
+        'fragmento': fragmento(Material),
+    })
 
 
 @login_required
@@ -115,8 +202,8 @@ def material_delete(request, pk):
 @login_required
 @admin_or_supervisor
 def obras_list(request):
-    obras = Obra.objects.all()
-    return render(request, 'admApp/obras_list.html', {'obras': obras})
+    obras = paginar(request, Obra.objects.all())
+    return render(request, 'admApp/obras_list.html', {'obras': obras, 'fragmento': fragmento(Obra)})
 
 
 @login_required
@@ -153,6 +240,37 @@ def obra_delete(request, pk):
     return render(request, 'admApp/confirm_delete.html', {'object': obra})
 
 
+@login_required
+@admin_or_supervisor
+def obras_finanzas(request):
+    """Cartera de obras: presupuesto contra gasto, desde el caché de reportes.py"""
+    obras = Obra.objects.all()
+    estado = request.GET.get('estado')
+    if estado in Obra.EstadoObra.values:
+        obras = obras.filter(estado=estado)
+    pagina = paginar(request, obras.only('id', 'fecha_inicio'))
+    reportes = obtener_reportes([obra.pk for obra in pagina])
+    return render(request, 'admApp/obras_finanzas.html', {
+        'pagina': pagina,
+        'reportes': [reportes[obra.pk] for obra in pagina if obra.pk in reportes],
+        'estados': Obra.EstadoObra.choices,
+        'estado': estado,
+    })
+
+
+@login_required
+@admin_or_supervisor
+def obra_consumo(request, pk):
+    """Consumo de materiales por mes, leído de los acumulados (ConsumoMensual)"""
+    obra = get_object_or_404(Obra, pk=pk)
+    desde = parse_date(request.GET.get('desde') or '')
+    hasta = parse_date(request.GET.get('hasta') or '')
+    consumos = consumo_mensual(obra=obra, desde=desde, hasta=hasta)
+    return render(request, 'admApp/obra_consumo.html', {
+        'obra': obra, 'consumos': consumos, 'desde': desde, 'hasta': hasta,
+    })
+
+
 # ============================================
 # CRUD ACTIVIDADES (Admin o Supervisor)
 # ============================================
@@ -203,8 +321,8 @@ def actividad_delete(request, pk):
 @login_required
 @admin_required
 def usuarios_list(request):
-    usuarios = Usuario.objects.all()
-    return render(request, 'admApp/usuarios_list.html', {'usuarios': usuarios})
+    usuarios = paginar(request, Usuario.objects.all())
+    return render(request, 'admApp/usuarios_list.html', {'usuarios': usuarios, 'fragmento': fragmento(Usuario)})
 
 
 @login_required
@@ -247,8 +365,11 @@ def usuario_delete(request, pk):
 @login_required
 @admin_required
 def obreros_list(request):
-    obreros = Obrero.objects.all()
-    return render(request, 'admApp/obreros_list.html', {'obreros': obreros})
+    obreros = paginar(request, Obrero.objects.select_related('usuario'))
+    return render(request, 'admApp/obreros_list.html', {
+        'obreros': obreros,
+        'fragmento': fragmento(Obrero, Usuario),
+    })
 
 
 @login_required
@@ -292,7 +413,10 @@ def obrero_delete(request, pk):
 @admin_or_bodeguero
 def bodegas_list(request):
     bodegas = Bodega.objects.select_related('encargado').all()
-    return render(request, 'admApp/bodegas_list.html', {'bodegas': bodegas})
+    return render(request, 'admApp/bodegas_list.html', {
+        'bodegas': bodegas,
+        'fragmento': fragmento(Bodega, Usuario),
+    })
 
 
 @login_required
@@ -308,10 +432,57 @@ def bodega_create(request):
 
 @login_required
 @admin_or_bodeguero
+@condicional_bodega
 def bodega_detail(request, pk):
     bodega = get_object_or_404(Bodega, pk=pk)
-    inventarios = InventarioMaterial.objects.filter(bodega=bodega).select_related('material')
-    return render(request, 'admApp/bodega_detail.html', {'bodega': bodega, 'inventarios': inventarios})
+    inventarios = InventarioMaterial.objects.filter(bodega=bodega).select_related('material').con_alerta()
+    return render(request, 'admApp/bodega_detail.html', {
+        'bodega': bodega,
+        'inventarios': inventarios,
+        'desde': timezone.now(),
+        'en_vivo': sse_disponible(request),
+        'intervalo': config_en_vivo()['INTERVALO'],
+    })
+
+
+@login_required
+@admin_or_bodeguero
+def bodega_stock_cambios(request, pk):
+    """Cambios de stock desde ?desde= (JSON); la página lo consulta bajo WSGI en vez del stream"""
+    bodega = get_object_or_404(Bodega.objects.only('pk'), pk=pk)
+    return JsonResponse(StreamStock(bodega.pk, desde_de_request(request)).sondeo())
+
+
+@login_required
+@admin_or_bodeguero
+def bodega_stock_eventos(request, pk):
+    """Stream SSE con los cambios de stock de la bodega (ver eventos.py)"""
+    bodega = get_object_or_404(Bodega.objects.only('pk'), pk=pk)
+    stream = StreamStock(bodega.pk, desde_de_request(request))
+    eventos = stream.aeventos() if sse_disponible(request) else stream.eventos()
+    response = StreamingHttpResponse(eventos, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx no debe acumular el stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@admin_or_bodeguero
+def bodega_stock_historico(request, pk):
+    """Stock de la bodega al cierre de ?fecha=AAAA-MM-DD, desde los snapshots"""
+    bodega = get_object_or_404(Bodega, pk=pk)
+    fecha = parse_date(request.GET.get('fecha') or '')
+    stock = []
+    if fecha:
+        corte = timezone.make_aware(datetime.combine(fecha, time.max))
+        cantidades = stock_bodega_en_fecha(bodega, corte)
+        materiales = Material.objects.in_bulk(cantidades)
+        stock = sorted(
+            ((materiales[material_id], cantidad) for material_id, cantidad in cantidades.items()),
+            key=lambda fila: fila[0].nombre,
+        )
+    return render(request, 'admApp/bodega_stock_historico.html', {'bodega': bodega, 'fecha': fecha, 'stock': stock})
 
 
 # ============================================
@@ -319,15 +490,124 @@ def bodega_detail(request, pk):
 # ============================================
 @login_required
 @admin_or_bodeguero
+@condicional_por_versiones(InventarioMaterial, Material, Bodega)
 def inventario_list(request):
-    inventarios = InventarioMaterial.objects.select_related('bodega', 'material').all()
-    
-    inventarios_con_alerta = []
-    for inv in inventarios:
-        inv.alerta = inv.cantidad_actual < inv.material.stock_minimo
-        inventarios_con_alerta.append(inv)
-    
-    return render(request, 'admApp/inventario_list.html', {'inventarios': inventarios_con_alerta})
+    inventarios = paginar(request, InventarioMaterial.objects.select_related('bodega', 'material').con_alerta())
+    return render(request, 'admApp/inventario_list.html', {
+        'inventarios': inventarios,
+        'fragmento': fragmento(InventarioMaterial, Material, Bodega),
+    })
+
+
+@login_required
+@admin_or_bodeguero
+def inventario_bajo_minimo(request):
+    """Solo las filas bajo stock mínimo, filtradas en la base de datos"""
+    inventarios = (InventarioMaterial.objects.bajo_minimo()
+                   .select_related('bodega', 'material')
+                   .annotate(faltante=F('material__stock_minimo') - F('cantidad_actual')))
+    bodega_id = request.GET.get('bodega')
+    if bodega_id and bodega_id.isdigit():
+        inventarios = inventarios.filter(bodega_id=bodega_id)
+    return render(request, 'admApp/inventario_bajo_minimo.html', {'inventarios': paginar(request, inventarios)})
+
+
+@login_required
+@admin_or_bodeguero
+def inventario_bajo_minimo_resumen(request):
+    """Conteos de alertas de stock por bodega y por material (JSON)"""
+    return JsonResponse({
+        'total': InventarioMaterial.objects.bajo_minimo().count(),
+        'por_bodega': list(InventarioMaterial.objects.conteo_bajo_minimo_por_bodega()),
+        'por_material': list(InventarioMaterial.objects.conteo_bajo_minimo_por_material()),
+    })
+
+
+@login_required
+@admin_or_bodeguero
+def inventario_reposicion(request):
+    """Qué reponer primero, según la fecha proyectada de quiebre de stock (ver reposicion.py)"""
+    bodega_id = request.GET.get('bodega', '')
+    bodega = int(bodega_id) if bodega_id.isdigit() else None
+    try:
+        plan, error = obtener_plan(bodega), None
+    except PlanificacionNoDisponible as e:
+        plan, error = None, str(e)
+    return render(request, 'admApp/inventario_reposicion.html', {'plan': plan, 'error': error, 'bodega': bodega})
+
+
+# ============================================
+# TRANSFERENCIAS ENTRE BODEGAS (Admin o Bodeguero)
+# ============================================
+@login_required
+@admin_or_bodeguero
+def transferencias_list(request):
+    transferencias = paginar(request, Transferencia.objects
+                             .select_related('bodega_origen', 'bodega_destino', 'usuario_responsable')
+                             .annotate(lineas=Count('movimientos')))
+    return render(request, 'admApp/transferencias_list.html', {'transferencias': transferencias})
+
+
+def _lineas_transferencia(datos):
+    """(material_id, cantidad) de los campos cantidad_<material> con valor; None si alguno no es válido"""
+    lineas = []
+    for clave, valor in datos.items():
+        if not clave.startswith('cantidad_') or not valor.strip():
+            continue
+        material_id, valor = clave.removeprefix('cantidad_'), valor.strip()
+        if not material_id.isdigit() or not valor.isdigit():
+            return None
+        if int(valor):
+            lineas.append((int(material_id), int(valor)))
+    return lineas
+
+
+@login_required
+@admin_or_bodeguero
+def transferencia_create(request):
+    """
+    GET con origen y destino lista el stock de la bodega de origen; POST
+    traspasa las cantidades indicadas como un solo documento.
+    """
+    form = TransferenciaForm(request.POST or request.GET or None)
+    inventario = None
+    if form.is_valid():
+        datos = form.cleaned_data
+        # Solo se traspasan materiales activos con stock en el origen
+        inventario = list(InventarioMaterial.objects.filter(
+            bodega=datos['bodega_origen'], cantidad_actual__gt=0, material__activo=True,
+        ).select_related('material').order_by('material__nombre'))
+        if request.method == 'POST':
+            lineas = _lineas_transferencia(request.POST)
+            if lineas is None:
+                form.add_error(None, 'Las cantidades deben ser números enteros positivos')
+            elif not lineas:
+                form.add_error(None, 'Indique la cantidad de al menos un material')
+            else:
+                try:
+                    transferencia = transferir(
+                        datos['bodega_origen'], datos['bodega_destino'], lineas,
+                        usuario=request.user, observaciones=datos['observaciones'],
+                    )
+                except ErrorInventario as e:
+                    # incluye materiales inexistentes, inactivos o sin stock en el origen
+                    form.add_error(None, str(e))
+                else:
+                    messages.success(request, f'Transferencia #{transferencia.pk} registrada: {len(lineas)} materiales')
+                    return redirect('transferencia_detail', transferencia.pk)
+        for inv in inventario:
+            inv.pedido = request.POST.get(f'cantidad_{inv.material_id}', '')
+    return render(request, 'admApp/transferencia_form.html', {'form': form, 'inventario': inventario})
+
+
+@login_required
+@admin_or_bodeguero
+def transferencia_detail(request, pk):
+    transferencia = get_object_or_404(
+        Transferencia.objects.select_related('bodega_origen', 'bodega_destino', 'usuario_responsable'), pk=pk,
+    )
+    lineas = transferencia.movimientos.select_related('material').order_by('material__nombre')
+    return render(request, 'admApp/transferencia_detail.html', {'transferencia': transferencia, 'lineas': lineas})
 
 
 # ============================================
@@ -335,51 +615,186 @@ def inventario_list(request):
 # ============================================
 @login_required
 @admin_or_bodeguero
+@condicional_por_versiones(Prestamo, Herramienta, Obrero, Usuario, Obra)
 def prestamos_list(request):
-    prestamos = Prestamo.objects.select_related('herramienta', 'obrero__usuario', 'obra').all().order_by('-fecha_prestamo')
-    return render(request, 'admApp/prestamos_list.html', {'prestamos': prestamos})
+    prestamos = paginar(request, Prestamo.objects.select_related('herramienta', 'obrero__usuario', 'obra'))
+    return render(request, 'admApp/prestamos_list.html', {
+        'prestamos': prestamos,
+        'fragmento': fragmento(Prestamo, Herramienta, Obrero, Usuario, Obra),
+    })
+
+
+@login_required
+@admin_or_bodeguero
+def prestamos_atrasados(request):
+    """Préstamos marcados como atrasados, del más atrasado al más reciente"""
+    atrasados = Prestamo.objects.atrasados()
+    prestamos = paginar(request, atrasados.select_related('herramienta', 'obrero__usuario', 'obra')
+                        .order_by('fecha_devolucion_estimada'))
+    return render(request, 'admApp/prestamos_atrasados.html', {
+        'prestamos': prestamos,
+        'total_atrasados': atrasados.count(),
+    })
 
 
 @login_required
 @admin_or_bodeguero
 def prestamo_create(request):
-    from datetime import date
-    
     form = PrestamoForm(request.POST or None)
     if form.is_valid():
-        prestamo = form.save(commit=False)
-        prestamo.estado = Prestamo.EstadoPrestamo.ACTIVO
-        prestamo.usuario_registro = request.user
-        prestamo.save()
-        
-        # Marcar herramienta como prestada
-        herramienta = prestamo.herramienta
-        herramienta.estado = 'EN_USO'
-        herramienta.save()
-        
-        messages.success(request, f'Préstamo registrado: {herramienta.nombre} → {prestamo.obrero.usuario.get_full_name()}')
-        return redirect('prestamos_list')
+        datos = form.cleaned_data
+        try:
+            prestamo, = prestar_herramientas(
+                [datos['herramienta']], datos['obrero'], datos['obra'], datos['bodega'],
+                datos['fecha_devolucion_estimada'], usuario=request.user,
+                observaciones=datos['observaciones_prestamo'],
+            )
+        except ErrorPrestamo as e:
+            form.add_error('herramienta', str(e))
+        else:
+            messages.success(request, f'Préstamo registrado: {prestamo.herramienta.nombre} → {prestamo.obrero.usuario.get_full_name()}')
+            return redirect('prestamos_list')
     return render(request, 'admApp/prestamo_form.html', {'form': form})
 
 
+@login_required
+@admin_or_bodeguero
+def prestamo_lote_create(request):
+    """Entrega de un kit: varias herramientas a un obrero en una sola operación"""
+    form = PrestamoLoteForm(request.POST or None)
+    if form.is_valid():
+        datos = form.cleaned_data
+        try:
+            creados = prestar_herramientas(
+                datos['herramientas'], datos['obrero'], datos['obra'], datos['bodega'],
+                datos['fecha_devolucion_estimada'], usuario=request.user,
+                observaciones=datos['observaciones_prestamo'],
+            )
+        except ErrorPrestamo as e:
+            form.add_error('herramientas', str(e))
+        else:
+            messages.success(request, f'{len(creados)} herramientas prestadas a {datos["obrero"].usuario.get_full_name()}')
+            return redirect('prestamos_list')
+    return render(request, 'admApp/prestamo_lote_form.html', {'form': form})
+
+
 @login_required
 @admin_or_bodeguero
 def prestamo_devolver(request, pk):
-    from datetime import datetime
-    
-    prestamo = get_object_or_404(Prestamo, pk=pk)
+    prestamo = get_object_or_404(Prestamo.objects.select_related('herramienta', 'obrero__usuario'), pk=pk)
     
     if request.method == 'POST':
-        prestamo.estado = Prestamo.EstadoPrestamo.DEVUELTO
-        prestamo.fecha_devolucion_real = datetime.now()
-        prestamo.save()
-        
-        # Marcar herramienta como disponible
-        herramienta = prestamo.herramienta
-        herramienta.estado = 'DISPONIBLE'
-        herramienta.save()
-        
-        messages.success(request, f'Herramienta devuelta: {herramienta.nombre}')
+        resultado, = devolver_prestamos(ids=[prestamo.pk])
+        if resultado['resultado'] == YA_CERRADO:
+            messages.warning(request, f'El préstamo ya estaba cerrado ({prestamo.get_estado_display()})')
+        else:
+            messages.success(request, f'Herramienta devuelta: {prestamo.herramienta.nombre}')
         return redirect('prestamos_list')
     
     return render(request, 'admApp/prestamo_devolver.html', {'prestamo': prestamo})
+
+
+@login_required
+@admin_or_bodeguero
+def prestamos_devolucion_masiva(request):
+    """
+    Cierre de todos los préstamos activos de un obrero u obra. GET lista los
+    préstamos; POST devuelve los marcados, cada uno como DEVUELTO, DAÑADO o
+    EXTRAVIADO, y muestra el resultado por préstamo.
+    """
+    if request.method == 'POST':
+        ids = [pk for pk in request.POST.getlist('prestamos') if pk.isdigit()]
+        estados = {pk: request.POST.get(f'estado_{pk}') for pk in ids}
+        resultados = devolver_prestamos(
+            ids=ids,
+            danados=[pk for pk, estado in estados.items() if estado == Prestamo.EstadoPrestamo.DAÑADO],
+            extraviados=[pk for pk, estado in estados.items() if estado == Prestamo.EstadoPrestamo.EXTRAVIADO],
+            observaciones=request.POST.get('observaciones_devolucion', ''),
+        )
+        detalle = Prestamo.objects.select_related('herramienta', 'obrero__usuario').in_bulk([r['prestamo'] for r in resultados])
+        for resultado in resultados:
+            resultado['objeto'] = detalle.get(resultado['prestamo'])
+        cerrados = sum(1 for r in resultados if r['resultado'] not in (YA_CERRADO, NO_ENCONTRADO))
+        messages.success(request, f'{cerrados} préstamos cerrados')
+        return render(request, 'admApp/prestamos_devolucion.html', {'form': DevolucionMasivaForm(), 'resultados': resultados})
+
+    form = DevolucionMasivaForm(request.GET or None)
+    activos = None
+    if form.is_valid():
+        activos = Prestamo.objects.activos().select_related('herramienta', 'obrero__usuario', 'obra')
+        if form.cleaned_data['obrero']:
+            activos = activos.filter(obrero=form.cleaned_data['obrero'])
+        if form.cleaned_data['obra']:
+            activos = activos.filter(obra=form.cleaned_data['obra'])
+        activos = activos.order_by('fecha_devolucion_estimada', 'id')
+    return render(request, 'admApp/prestamos_devolucion.html', {
+        'form': form,
+        'activos': activos,
+        'estados_cierre': [Prestamo.EstadoPrestamo.DEVUELTO, Prestamo.EstadoPrestamo.DAÑADO, Prestamo.EstadoPrestamo.EXTRAVIADO],
+    })
+
+
+# ============================================
+# BÚSQUEDA GLOBAL (Admin, Supervisor o Bodeguero)
+# ============================================
+def _buscar(request, limite):
+    texto = request.GET.get('q', '').strip()
+    tipos = busqueda.TIPOS_POR_ROL.get(request.user.rol, [])
+    return texto, busqueda.buscar(texto, tipos=tipos, limite=limite)
+
+
+@login_required
+@staff_only
+def buscar(request):
+    texto, resultados = _buscar(request, limite=50)
+    for resultado in resultados:
+        resultado.url = busqueda.url_resultado(resultado)
+    return render(request, 'admApp/buscar.html', {'q': texto, 'resultados': resultados})
+
+
+@login_required
+@staff_only
+def buscar_json(request):
+    """Sugerencias para el buscador del menú"""
+    _, resultados = _buscar(request, limite=10)
+    return JsonResponse({'resultados': [
+        {
+            'tipo': r.tipo,
+            'id': r.objeto_id,
+            'titulo': r.titulo,
+            'detalle': r.contenido,
+            'url': busqueda.url_resultado(r),
+        }
+        for r in resultados
+    ]})
+
+
+# ============================================
+# EXPORTACIONES (Admin o Supervisor)
+# ============================================
+def _exportar(request, nombre, queryset_func, columnas):
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exports.FORMATOS:
+        return HttpResponseBadRequest('formato debe ser csv o jsonl')
+    try:
+        queryset = queryset_func(request.GET.get('desde'), request.GET.get('hasta'), request.GET.get('bodega'))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    content_type, extension = exports.FORMATOS[formato]
+    response = StreamingHttpResponse(exports.lineas(queryset, columnas, formato), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.{extension}"'
+    return response
+
+
+@login_required
+@admin_or_supervisor
+def exportar_movimientos(request):
+    """?formato=csv|jsonl&desde=AAAA-MM-DD&hasta=AAAA-MM-DD&bodega=<id>"""
+    return _exportar(request, 'movimientos', exports.movimientos_para_exportar, exports.COLUMNAS_MOVIMIENTOS)
+
+
+@login_required
+@admin_or_supervisor
+def exportar_prestamos(request):
+    """?formato=csv|jsonl&desde=AAAA-MM-DD&hasta=AAAA-MM-DD&bodega=<id>"""
+    return _exportar(request, 'prestamos', exports.prestamos_para_exportar, exports.COLUMNAS_PRESTAMOS)
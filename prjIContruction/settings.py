@@ -64,6 +64,7 @@ INSTALLED_APPS = [
 # Define el orden de ejecución de middleware para procesar requests y responses
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',          # Seguridad HTTP
+    'admApp.middleware.InstrumentacionMiddleware',            # Métricas de consultas y tiempos por vista
     'django.contrib.sessions.middleware.SessionMiddleware',   # Manejo de sesiones
     'django.middleware.common.CommonMiddleware',              # Procesamiento común
     'django.middleware.csrf.CsrfViewMiddleware',              # Protección CSRF
@@ -94,6 +95,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'admApp.context_processors.instrumentacion',
             ],
         },
     },
@@ -177,11 +179,117 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# ==============================================================================
+# CONFIGURACIÓN DE LA API REST (Django REST Framework)
+# ==============================================================================
+# API de solo lectura bajo /administracion/api/v1/ (ver admApp/api.py)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+}
+
+
+# ==============================================================================
+# INSTRUMENTACIÓN DE VISTAS (admApp/middleware.py)
+# ==============================================================================
+# MUESTREO: fracción de requests medidos; 0 = apagado (por defecto). Para
+#   activarlo: INSTRUMENTACION_MUESTREO=1.0 en desarrollo, ej: 0.01 en producción
+# UMBRAL_N1: repeticiones del mismo SQL para reportar un posible N+1
+# CABECERAS: agrega Server-Timing, X-DB-Queries y X-N1-Sospecha a la respuesta
+INSTRUMENTACION = {
+    'MUESTREO': config('INSTRUMENTACION_MUESTREO', default=0.0, cast=float),
+    'UMBRAL_N1': config('INSTRUMENTACION_UMBRAL_N1', default=5, cast=int),
+    'CABECERAS': config('INSTRUMENTACION_CABECERAS', default=DEBUG, cast=bool),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'admApp.instrumentacion': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
+# ==============================================================================
+# CONFIGURACIÓN DE CACHÉ
+# ==============================================================================
+# Caché en memoria por defecto; en producción conviene uno compartido entre
+# procesos (ej: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://127.0.0.1:6379/1)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='iconstruction'),
+    }
+}
+
+# Vida máxima de las métricas del dashboard (se invalidan antes por señales)
+METRICAS_CACHE_TIMEOUT = config('METRICAS_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Vida máxima del reporte financiero por obra (admApp/reportes.py)
+REPORTES_CACHE_TIMEOUT = config('REPORTES_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Vida máxima de los fragmentos de listados en caché; las claves incluyen la
+# versión de los modelos mostrados, así que un cambio los invalida antes
+FRAGMENTOS_CACHE_TIMEOUT = config('FRAGMENTOS_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Stock en vivo por bodega (admApp/eventos.py): segundos entre sondeos (bajo
+# WSGI la página consulta cada INTERVALO en vez de abrir el stream SSE) y
+# duración máxima de cada conexión SSE bajo ASGI
+STOCK_EN_VIVO = {
+    'INTERVALO': config('STOCK_EN_VIVO_INTERVALO', default=5, cast=int),
+    'DURACION': config('STOCK_EN_VIVO_DURACION', default=300, cast=int),
+}
+
+# Planificador de reposición (admApp/reposicion.py): ventanas del promedio de
+# salidas, días de entrega y de cobertura de un pedido, y vida del plan en caché
+REPOSICION = {
+    'VENTANA_CORTA': config('REPOSICION_VENTANA_CORTA', default=7, cast=int),
+    'VENTANA_LARGA': config('REPOSICION_VENTANA_LARGA', default=28, cast=int),
+    'DIAS_ENTREGA': config('REPOSICION_DIAS_ENTREGA', default=7, cast=int),
+    'DIAS_COBERTURA': config('REPOSICION_DIAS_COBERTURA', default=30, cast=int),
+    'CACHE_TIMEOUT': config('REPOSICION_CACHE_TIMEOUT', default=900, cast=int),
+}
+
+# Estadísticas de uso de herramientas (admApp/uso_herramientas.py): días de
+# préstamos que abarcan y vida máxima de cada grupo en caché
+USO_HERRAMIENTAS = {
+    'VENTANA': config('USO_HERRAMIENTAS_VENTANA', default=90, cast=int),
+    'CACHE_TIMEOUT': config('USO_HERRAMIENTAS_CACHE_TIMEOUT', default=3600, cast=int),
+}
+
+
 # ==============================================================================
 # CONFIGURACIÓN DE SESIONES Y AUTENTICACIÓN
 # ==============================================================================
-# Motor de almacenamiento de sesiones (base de datos)
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Motor de almacenamiento de sesiones: caché con respaldo en base de datos
+# (escribe en ambos, lee del caché y solo va a la BD si la sesión no está).
+# Con el caché local por defecto cada worker tendría su propia copia (un
+# logout no llegaría a los demás), así que ahí se usa solo la base de datos
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.db' if CACHES['default']['BACKEND'].endswith('.LocMemCache')
+    else 'django.contrib.sessions.backends.cached_db'
+)
+
+# Backend que carga el usuario de la sesión desde un caché en memoria
+# (ver admApp/backends.py); se invalida al guardar o borrar un Usuario. Solo
+# se activa con un CACHE_BACKEND compartido entre procesos: con LocMemCache
+# consulta la base de datos como ModelBackend
+AUTHENTICATION_BACKENDS = ['admApp.backends.CachedModelBackend']
+
+USUARIOS_CACHE = {
+    'TAMANO': config('USUARIOS_CACHE_TAMANO', default=1000, cast=int),
+    'TTL': config('USUARIOS_CACHE_TTL', default=60, cast=int),
+}
 
 # URL de redirección cuando el usuario no está autenticado
 LOGIN_URL = '/login/'
@@ -193,6 +301,16 @@ LOGOUT_REDIRECT_URL = '/login/'
 AUTH_USER_MODEL = 'admApp.Usuario'
 
 
+# ==============================================================================
+# CONFIGURACIÓN DE PAGINACIÓN
+# ==============================================================================
+# Filas por página en los listados (paginación por cursor, ver admApp/pagination.py)
+PAGINACION_TAMANO_PAGINA = config('PAGINACION_TAMANO_PAGINA', default=50, cast=int)
+
+# Máximo que se acepta en ?page_size= para evitar páginas gigantes
+PAGINACION_TAMANO_MAXIMO = config('PAGINACION_TAMANO_MAXIMO', default=500, cast=int)
+
+
 # ==============================================================================
 # CONFIGURACIÓN ADICIONAL DE MODELOS
 # ==============================================================================